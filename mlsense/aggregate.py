@@ -0,0 +1,270 @@
+"""Running sentiment aggregates that do not retain per-comment results."""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from .sentiment import AnalizadorSentimiento, ETIQUETAS
+
+
+class AgregadoSentimiento:
+    """Running count, sum and sum of squares of global and per-aspect scores.
+
+    Also keeps a label histogram. Results can be added and removed in O(1),
+    so the aggregate follows a changing set of comments without re-analyzing it.
+    """
+
+    def __init__(self):
+        """Initialize empty aggregate."""
+        self.n = 0
+        self.suma = 0.0
+        self.suma_cuadrados = 0.0
+        self.histograma = {etiqueta: 0 for etiqueta in ETIQUETAS}
+        self.aspectos_n = {}
+        self.aspectos_suma = {}
+        self.aspectos_suma_cuadrados = {}
+
+    def agregar(self, resultado: Dict[str, Any], peso: int = 1):
+        """Add one analyzed comment.
+
+        Args:
+            resultado: Output of AnalizadorSentimiento.analizar_comentario
+            peso: Number of identical comments this result stands for
+                (see mlsense.dedup.colapsar_duplicados)
+        """
+        score = resultado['score']
+        self.n += peso
+        self.suma += score * peso
+        self.suma_cuadrados += score * score * peso
+        self.histograma[resultado['etiqueta']] += peso
+
+        for aspecto, score in resultado.get('aspectos', {}).items():
+            self.aspectos_n[aspecto] = self.aspectos_n.get(aspecto, 0) + peso
+            self.aspectos_suma[aspecto] = self.aspectos_suma.get(aspecto, 0.0) + score * peso
+            self.aspectos_suma_cuadrados[aspecto] = self.aspectos_suma_cuadrados.get(aspecto, 0.0) + score * score * peso
+
+    def quitar(self, resultado: Dict[str, Any], peso: int = 1):
+        """Remove a previously added comment result.
+
+        Args:
+            resultado: The same result that was passed to agregar
+            peso: The weight it was added with
+
+        Raises:
+            ValueError: If the aggregate holds fewer than peso comments
+        """
+        if self.n < peso:
+            raise ValueError("Cannot remove more comments than the aggregate holds")
+
+        score = resultado['score']
+        self.n -= peso
+        self.suma -= score * peso
+        self.suma_cuadrados -= score * score * peso
+        self.histograma[resultado['etiqueta']] -= peso
+        if self.n == 0:
+            self.suma = 0.0
+            self.suma_cuadrados = 0.0
+
+        for aspecto, score in resultado.get('aspectos', {}).items():
+            n = self.aspectos_n.get(aspecto, 0) - peso
+            if n <= 0:
+                self.aspectos_n.pop(aspecto, None)
+                self.aspectos_suma.pop(aspecto, None)
+                self.aspectos_suma_cuadrados.pop(aspecto, None)
+                continue
+            self.aspectos_n[aspecto] = n
+            self.aspectos_suma[aspecto] -= score * peso
+            self.aspectos_suma_cuadrados[aspecto] -= score * score * peso
+
+    @property
+    def media(self) -> float:
+        """Mean comment score (0.0 if empty)."""
+        return self.suma / self.n if self.n else 0.0
+
+    @property
+    def varianza(self) -> float:
+        """Population variance of comment scores (0.0 if empty)."""
+        return self._varianza(self.n, self.suma, self.suma_cuadrados)
+
+    @property
+    def desviacion(self) -> float:
+        """Population standard deviation of comment scores."""
+        return math.sqrt(self.varianza)
+
+    def medias_aspectos(self) -> Dict[str, float]:
+        """Return mean score per detected aspect.
+
+        Returns:
+            Dict mapping aspect name to mean score
+        """
+        return {
+            aspecto: self.aspectos_suma[aspecto] / n
+            for aspecto, n in self.aspectos_n.items()
+        }
+
+    def varianzas_aspectos(self) -> Dict[str, float]:
+        """Return population variance per detected aspect.
+
+        Returns:
+            Dict mapping aspect name to score variance
+        """
+        return {
+            aspecto: self._varianza(n, self.aspectos_suma[aspecto], self.aspectos_suma_cuadrados[aspecto])
+            for aspecto, n in self.aspectos_n.items()
+        }
+
+    @staticmethod
+    def _varianza(n: int, suma: float, suma_cuadrados: float) -> float:
+        """Variance from running moments, clamped against rounding below zero."""
+        if not n:
+            return 0.0
+        media = suma / n
+        return max(0.0, suma_cuadrados / n - media * media)
+
+    def resumen(self) -> Dict[str, Any]:
+        """Return aggregate as a plain dict.
+
+        Returns:
+            Dict with 'n', 'media', 'desviacion', 'histograma' and 'aspectos'
+        """
+        return {
+            'n': self.n,
+            'media': self.media,
+            'desviacion': self.desviacion,
+            'histograma': dict(self.histograma),
+            'aspectos': self.medias_aspectos(),
+        }
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Serialize running moments compactly (JSON-compatible).
+
+        Returns:
+            Dict with moments 'm' as [n, sum, sum_sq], label counts 'h' in
+            ETIQUETAS order, and per-aspect moments 'a'
+        """
+        return {
+            'm': [self.n, self.suma, self.suma_cuadrados],
+            'h': [self.histograma[etiqueta] for etiqueta in ETIQUETAS],
+            'a': {
+                aspecto: [n, self.aspectos_suma[aspecto], self.aspectos_suma_cuadrados[aspecto]]
+                for aspecto, n in self.aspectos_n.items()
+            },
+        }
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any]) -> 'AgregadoSentimiento':
+        """Rebuild an aggregate serialized with a_dict.
+
+        Args:
+            datos: Output of a_dict
+
+        Returns:
+            AgregadoSentimiento instance
+        """
+        agregado = cls()
+        agregado.n, agregado.suma, agregado.suma_cuadrados = datos['m']
+        agregado.histograma = dict(zip(ETIQUETAS, datos['h']))
+        for aspecto, (n, suma, suma_cuadrados) in datos['a'].items():
+            agregado.aspectos_n[aspecto] = n
+            agregado.aspectos_suma[aspecto] = suma
+            agregado.aspectos_suma_cuadrados[aspecto] = suma_cuadrados
+        return agregado
+
+
+class AgregadorProducto:
+    """Incrementally maintained sentiment scores for one product.
+
+    New reviews are analyzed once and folded into the running aggregate;
+    history is never re-analyzed. Removing a review re-analyzes only that
+    review to recover its contribution.
+    """
+
+    def __init__(self, analizador: AnalizadorSentimiento,
+                 aspectos_keywords: Optional[Dict[str, List[str]]] = None,
+                 agregado: Optional[AgregadoSentimiento] = None):
+        """Initialize aggregator.
+
+        Args:
+            analizador: Sentiment analyzer
+            aspectos_keywords: Optional aspect keywords
+            agregado: Existing aggregate to continue from (e.g. from desde_dict)
+        """
+        self.analizador = analizador
+        self.aspectos_keywords = aspectos_keywords
+        self.agregado = agregado if agregado is not None else AgregadoSentimiento()
+
+    def agregar(self, comentario: str, peso: int = 1) -> bool:
+        """Analyze and add one review. Blank reviews are ignored.
+
+        Args:
+            comentario: Review text
+            peso: Number of duplicate reviews it stands for
+
+        Returns:
+            True if the review was counted
+        """
+        if not comentario.strip():
+            return False
+        self.agregado.agregar(self.analizador.analizar_comentario(comentario, self.aspectos_keywords), peso)
+        return True
+
+    def quitar(self, comentario: str, peso: int = 1) -> bool:
+        """Remove one previously added review.
+
+        Args:
+            comentario: Review text
+            peso: The weight it was added with
+
+        Returns:
+            True if the review was subtracted
+        """
+        if not comentario.strip():
+            return False
+        self.agregado.quitar(self.analizador.analizar_comentario(comentario, self.aspectos_keywords), peso)
+        return True
+
+    def extender(self, comentarios: Iterable[str], pesos: Optional[Iterable[int]] = None) -> int:
+        """Add several reviews.
+
+        Args:
+            comentarios: Review texts
+            pesos: Optional multiplicity per review, aligned with comentarios
+
+        Returns:
+            Number of reviews counted
+        """
+        if pesos is None:
+            return sum(self.agregar(comentario) for comentario in comentarios)
+        return sum(self.agregar(comentario, peso) for comentario, peso in zip(comentarios, pesos))
+
+    @property
+    def n(self) -> int:
+        """Number of counted reviews."""
+        return self.agregado.n
+
+    @property
+    def score(self) -> float:
+        """Mean review score, as returned by analizar_multiples."""
+        return self.agregado.media
+
+    def medias_aspectos(self) -> Dict[str, float]:
+        """Return mean score per detected aspect."""
+        return self.agregado.medias_aspectos()
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Serialize the running aggregate."""
+        return self.agregado.a_dict()
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, Any], analizador: AnalizadorSentimiento,
+                   aspectos_keywords: Optional[Dict[str, List[str]]] = None) -> 'AgregadorProducto':
+        """Resume an aggregator from serialized moments.
+
+        Args:
+            datos: Output of a_dict
+            analizador: Sentiment analyzer for future reviews
+            aspectos_keywords: Aspect keywords used for the stored moments
+
+        Returns:
+            AgregadorProducto instance
+        """
+        return cls(analizador, aspectos_keywords, AgregadoSentimiento.desde_dict(datos))
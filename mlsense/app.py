@@ -5,14 +5,19 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import json
+import os
+import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any
 
 from .sentiment import AnalizadorSentimiento
 from .expert import ProductExpert
-from .parsers import parse_mercadolibre_html
+from .parsers import parse_mercadolibre_html, parse_many, merge_products
+from .parse_cache import CACHE_PARSEO
 from .fetcher import fetch_product_url, search_live, extract_html_from_page
 from .demo_data import generate_demo_data
+from .registry import cargar_config
+from .aggregate import AgregadorProducto
 
 
 def configurar_pagina():
@@ -46,11 +51,52 @@ def cargar_categoria(nombre_categoria: str) -> Dict[str, Any]:
     """
     ruta = Path(__file__).parent.parent / "lexicons" / f"categoria_{nombre_categoria}.json"
     if ruta.exists():
-        with open(ruta, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return cargar_config(ruta)
     return ProductExpert.crear_config_vacia(nombre_categoria, nombre_categoria.title())
 
 
+def _agregador_producto(producto: Dict[str, Any], analizador: AnalizadorSentimiento,
+                        categoria_config: Dict[str, Any]) -> AgregadorProducto:
+    """Return the product's running sentiment aggregate for this session.
+
+    Aggregates are kept in session state; on reruns or re-fetches only reviews
+    appended since the last call are analyzed. If earlier reviews changed,
+    the aggregate is rebuilt. Collapsed reviews count with their
+    'pesos_comentarios' multiplicity.
+
+    Args:
+        producto: Product dict with 'comentarios'
+        analizador: Sentiment analyzer
+        categoria_config: Category configuration (aspects)
+
+    Returns:
+        AgregadorProducto covering all product reviews
+    """
+    aspectos = categoria_config.get('aspectos', {})
+    comentarios = producto.get('comentarios', [])
+    pesos = producto.get('pesos_comentarios')
+    if pesos is None or len(pesos) != len(comentarios):
+        pesos = [1] * len(comentarios)
+    clave = (
+        producto.get('id') or producto.get('url') or producto.get('nombre', ''),
+        AnalizadorSentimiento._huella_aspectos(aspectos),
+    )
+
+    agregadores = st.session_state.setdefault('agregadores', {})
+    entrada = agregadores.get(clave)
+    if entrada is not None:
+        agregador, vistos, huella = entrada
+        if vistos > len(comentarios) or hash((tuple(comentarios[:vistos]), tuple(pesos[:vistos]))) != huella:
+            entrada = None
+
+    if entrada is None:
+        agregador, vistos = AgregadorProducto(analizador, aspectos), 0
+
+    agregador.extender(comentarios[vistos:], pesos[vistos:])
+    agregadores[clave] = (agregador, len(comentarios), hash((tuple(comentarios), tuple(pesos))))
+    return agregador
+
+
 def tab_datos_extraidos(productos: List[Dict[str, Any]]):
     """Display extracted products tab."""
     st.subheader("📋 Datos Extraídos")
@@ -74,7 +120,7 @@ def tab_datos_extraidos(productos: List[Dict[str, Any]]):
     with col1:
         if 'precio' in df_productos.columns:
             try:
-                precios = pd.to_numeric(df_productos['precio'], errors='coerce').dropna()
+                precios = df_productos['precio'].dropna()
                 st.metric("💰 Precio Promedio", f"${precios.mean():.2f}")
             except:
                 pass
@@ -82,7 +128,7 @@ def tab_datos_extraidos(productos: List[Dict[str, Any]]):
     with col2:
         if 'calificaciones' in df_productos.columns:
             try:
-                cals = pd.to_numeric(df_productos['calificaciones'], errors='coerce').sum()
+                cals = df_productos['calificaciones'].sum()
                 st.metric("⭐ Total Calificaciones", f"{int(cals)}")
             except:
                 pass
@@ -106,22 +152,9 @@ def tab_sentimientos(productos: List[Dict[str, Any]], categoria_config: Dict[str
         nombre = producto.get('nombre', 'Producto sin nombre')
 
         if comentarios:
-            score_general, analisis_comentarios = analizador.analizar_multiples(
-                comentarios,
-                categoria_config.get('aspectos', {})
-            )
-
-            aspectos_scores = {}
-            for analisis in analisis_comentarios:
-                for aspecto, score in analisis.get('aspectos', {}).items():
-                    if aspecto not in aspectos_scores:
-                        aspectos_scores[aspecto] = []
-                    aspectos_scores[aspecto].append(score)
-
-            aspectos_promedio = {
-                aspecto: sum(scores) / len(scores)
-                for aspecto, scores in aspectos_scores.items()
-            }
+            agregador = _agregador_producto(producto, analizador, categoria_config)
+            score_general = agregador.score
+            aspectos_promedio = agregador.medias_aspectos()
 
             inferencia = experto.inferir(score_general, aspectos_promedio)
 
@@ -129,7 +162,7 @@ def tab_sentimientos(productos: List[Dict[str, Any]], categoria_config: Dict[str
                 'nombre': nombre,
                 'score_general': score_general,
                 'etiqueta': analizador._clasificar_sentimiento(score_general),
-                'num_comentarios': len(comentarios),
+                'num_comentarios': agregador.n,
                 'recomendacion': inferencia['recomendacion'],
                 'confianza': inferencia['confianza'],
                 'razon': inferencia['razon'],
@@ -207,40 +240,37 @@ def tab_experto(productos: List[Dict[str, Any]], categoria_config: Dict[str, Any
         nombre = producto.get('nombre', 'Producto sin nombre')
 
         if comentarios:
-            score_general, analisis_comentarios = analizador.analizar_multiples(
-                comentarios,
-                categoria_config.get('aspectos', {})
-            )
-
-            aspectos_scores = {}
-            for analisis in analisis_comentarios:
-                for aspecto, score in analisis.get('aspectos', {}).items():
-                    if aspecto not in aspectos_scores:
-                        aspectos_scores[aspecto] = []
-                    aspectos_scores[aspecto].append(score)
-
-            aspectos_promedio = {
-                aspecto: sum(scores) / len(scores)
-                for aspecto, scores in aspectos_scores.items()
-            }
-
-            inferencia = experto.inferir(score_general, aspectos_promedio)
+            agregador = _agregador_producto(producto, analizador, categoria_config)
 
             recomendaciones.append({
                 'nombre': nombre,
-                'score': score_general,
-                'recomendacion': inferencia['recomendacion'],
-                'confianza': inferencia['confianza'],
-                'razon': inferencia['razon'],
-                'precio': producto.get('precio', '0'),
+                'score': agregador.score,
+                'precio': producto.get('precio', 0.0),
                 'url': producto.get('url', ''),
-                'aspectos': aspectos_promedio
+                'aspectos': agregador.medias_aspectos()
             })
 
     if not recomendaciones:
         st.warning("No hay suficientes datos para análisis.")
         return
 
+    nombres_aspectos = list(experto.aspectos)
+    matriz_aspectos = np.full((len(recomendaciones), len(nombres_aspectos)), np.nan)
+    for i, rec in enumerate(recomendaciones):
+        for j, aspecto in enumerate(nombres_aspectos):
+            matriz_aspectos[i, j] = rec['aspectos'].get(aspecto, np.nan)
+
+    inferencia = experto.inferir_lote(
+        np.array([rec['score'] for rec in recomendaciones]),
+        matriz_aspectos,
+        nombres_aspectos
+    )
+    for i, rec in enumerate(recomendaciones):
+        regla = inferencia['regla'][i]
+        rec['recomendacion'] = inferencia['recomendacion'][i]
+        rec['confianza'] = inferencia['confianza'][i]
+        rec['razon'] = experto.reglas[regla]['entonces'].get('razon', '') if regla >= 0 else experto.regla_default['razon']
+
     colores_recomendacion = {
         'COMPRAR': '#28a745',
         'EVITAR': '#dc3545',
@@ -255,7 +285,7 @@ def tab_experto(productos: List[Dict[str, Any]], categoria_config: Dict[str, Any
         <h4>{rec['nombre'][:70]}</h4>
         <p><strong>Recomendación:</strong> {rec['recomendacion']} (Confianza: {rec['confianza']:.0%})</p>
         <p><strong>Razón:</strong> {rec['razon']}</p>
-        <p><strong>Precio:</strong> ${rec['precio']} | <a href="{rec['url']}" target="_blank">Ver en MercadoLibre</a></p>
+        <p><strong>Precio:</strong> ${rec['precio']:.2f} | <a href="{rec['url']}" target="_blank">Ver en MercadoLibre</a></p>
         </div>
         """, unsafe_allow_html=True)
 
@@ -283,26 +313,15 @@ def tab_comparacion(productos: List[Dict[str, Any]], categoria_config: Dict[str,
     for producto in productos:
         comentarios = producto.get('comentarios', [])
         if comentarios:
-            score_general, _ = analizador.analizar_multiples(comentarios)
-
-            aspectos_scores = {}
-            for comentario in comentarios:
-                analisis = analizador.analizar_comentario(comentario, categoria_config.get('aspectos', {}))
-                for aspecto, score in analisis.get('aspectos', {}).items():
-                    if aspecto not in aspectos_scores:
-                        aspectos_scores[aspecto] = []
-                    aspectos_scores[aspecto].append(score)
-
-            aspectos_promedio = {
-                aspecto: sum(scores) / len(scores) if scores else 0
-                for aspecto, scores in aspectos_scores.items()
-            }
+            agregador = _agregador_producto(producto, analizador, categoria_config)
+            score_general = agregador.score
+            aspectos_promedio = agregador.medias_aspectos()
 
             inferencia = experto.inferir(score_general, aspectos_promedio)
 
             datos_comparacion.append({
                 'nombre': producto.get('nombre', '')[:50],
-                'precio': float(producto.get('precio', 0)),
+                'precio': producto.get('precio', 0.0),
                 'score_sentimiento': score_general,
                 'recomendacion': inferencia['recomendacion'],
                 'url': producto.get('url', '')
@@ -361,21 +380,22 @@ def tab_descargas(productos: List[Dict[str, Any]], categoria_config: Dict[str, A
     for producto in productos:
         comentarios = producto.get('comentarios', [])
         if comentarios:
-            score_general, _ = analizador.analizar_multiples(comentarios)
+            agregador = _agregador_producto(producto, analizador, categoria_config)
+            score_general, num_comentarios = agregador.score, agregador.n
         else:
-            score_general = 0.0
+            score_general, num_comentarios = 0.0, 0
 
         datos_export.append({
             'nombre': producto.get('nombre', ''),
-            'precio': producto.get('precio', ''),
+            'precio': producto.get('precio', 0.0),
             'moneda': producto.get('moneda', 'ARS'),
-            'estrellas': producto.get('estrellas', '0'),
-            'calificaciones': producto.get('calificaciones', '0'),
+            'estrellas': producto.get('estrellas', 0.0),
+            'calificaciones': producto.get('calificaciones', 0),
             'envio': producto.get('envio', ''),
             'descuento': producto.get('descuento', ''),
             'url': producto.get('url', ''),
             'score_sentimiento': score_general,
-            'num_comentarios': len(comentarios)
+            'num_comentarios': num_comentarios
         })
 
     df_export = pd.DataFrame(datos_export)
@@ -437,17 +457,37 @@ def sidebar_entrada_datos() -> tuple:
         )
 
         if archivos:
-            todos_productos = []
-            for archivo in archivos:
-                contenido = archivo.read().decode('utf-8', errors='replace')
-                prods, warnings = parse_mercadolibre_html(contenido)
-                todos_productos.extend(prods)
-
-                if warnings:
-                    with st.sidebar.expander(f"⚠️ {archivo.name}"):
-                        for warning in warnings:
+            contenidos = [archivo.getvalue() for archivo in archivos]
+            resultados = []
+            pendientes = []
+            for i, contenido in enumerate(contenidos):
+                cacheado = CACHE_PARSEO.get(contenido)
+                if cacheado is None:
+                    pendientes.append((i, contenido))
+                else:
+                    resultados.append({'fuente': i, 'productos': cacheado[0], 'warnings': cacheado[1], 'error': None})
+
+            for resultado in parse_many(pendientes, workers=min(os.cpu_count() or 1, len(pendientes))):
+                if resultado['error'] is None:
+                    CACHE_PARSEO.put(contenidos[resultado['fuente']], resultado['productos'], resultado['warnings'])
+                resultados.append(resultado)
+
+            resultados.sort(key=lambda r: r['fuente'])
+            for resultado in resultados:
+                avisos = resultado['warnings'] + ([resultado['error']] if resultado['error'] else [])
+                if avisos:
+                    with st.sidebar.expander(f"⚠️ {archivos[resultado['fuente']].name}"):
+                        for warning in avisos:
                             st.warning(warning)
 
+            todos_productos, productos_colapsados, comentarios_colapsados = merge_products(resultados)
+            if productos_colapsados or comentarios_colapsados:
+                st.sidebar.caption(f"♻️ {productos_colapsados} productos y {comentarios_colapsados} "
+                                   f"reseñas duplicadas colapsadas")
+            cache_stats = CACHE_PARSEO.stats()
+            st.sidebar.caption(f"🗃️ Caché de parseo: {cache_stats['hits']} aciertos, "
+                               f"{cache_stats['misses']} páginas parseadas")
+
             st.session_state.productos = todos_productos
             productos = todos_productos
 
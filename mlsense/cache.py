@@ -0,0 +1,89 @@
+"""Size-bounded in-memory caches with hit/miss/eviction counters."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with usage counters."""
+
+    def __init__(self, max_size: int = 1024):
+        """Initialize cache.
+
+        Args:
+            max_size: Maximum number of entries kept before evicting the oldest
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+
+        self.max_size = max_size
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, clave: Hashable, default: Optional[Any] = None) -> Any:
+        """Return cached value and mark it as recently used.
+
+        Args:
+            clave: Cache key
+            default: Value returned on miss
+
+        Returns:
+            Cached value or default
+        """
+        with self._lock:
+            try:
+                valor = self._datos[clave]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def put(self, clave: Hashable, valor: Any):
+        """Store value, evicting the least recently used entry if full.
+
+        Args:
+            clave: Cache key
+            valor: Value to store
+        """
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+            self._datos[clave] = valor
+            while len(self._datos) > self.max_size:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove all entries and reset counters."""
+        with self._lock:
+            self._datos.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return usage counters.
+
+        Returns:
+            Dict with 'hits', 'misses', 'evictions', 'size' and 'max_size'
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._datos),
+                'max_size': self.max_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._datos)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self._datos
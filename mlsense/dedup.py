@@ -0,0 +1,217 @@
+"""Exact and near-duplicate review collapsing (MinHash + LSH)."""
+
+import zlib
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from .normalize import normalizar_texto
+
+_PRIMO = np.uint64(4294967311)
+_TEXTOS_POR_BLOQUE = 2048
+
+
+def _shingles(texto_normalizado: str) -> List[int]:
+    """Hash word bigrams of a normalized text (the single token if shorter).
+
+    Args:
+        texto_normalizado: Output of normalizar_texto
+
+    Returns:
+        List of 32-bit shingle hashes
+    """
+    tokens = texto_normalizado.split()
+    if len(tokens) < 2:
+        return [zlib.crc32(texto_normalizado.encode('utf-8'))]
+    return list({zlib.crc32(f"{a} {b}".encode('utf-8')) for a, b in zip(tokens, tokens[1:])})
+
+
+def firmas_minhash(textos: List[str], num_permutaciones: int = 64, semilla: int = 1) -> np.ndarray:
+    """Compute MinHash signatures for normalized texts.
+
+    Permutations are universal hashes (a*x + b) mod p over 32-bit shingle
+    hashes, evaluated for all texts at once.
+
+    Args:
+        textos: Normalized texts
+        num_permutaciones: Signature length
+        semilla: Seed for the permutation coefficients
+
+    Returns:
+        uint64 array of shape (len(textos), num_permutaciones)
+    """
+    if not textos:
+        return np.zeros((0, num_permutaciones), dtype=np.uint64)
+
+    rng = np.random.default_rng(semilla)
+    a = rng.integers(1, 2 ** 32, size=num_permutaciones, dtype=np.uint64)
+    b = rng.integers(0, 2 ** 32, size=num_permutaciones, dtype=np.uint64)
+
+    firmas = np.empty((len(textos), num_permutaciones), dtype=np.uint64)
+    for desde in range(0, len(textos), _TEXTOS_POR_BLOQUE):
+        por_texto = [_shingles(texto) for texto in textos[desde:desde + _TEXTOS_POR_BLOQUE]]
+        longitudes = np.fromiter((len(s) for s in por_texto), dtype=np.int64, count=len(por_texto))
+        hashes = np.fromiter((h for s in por_texto for h in s), dtype=np.uint64, count=int(longitudes.sum()))
+        inicios = np.concatenate(([0], np.cumsum(longitudes)[:-1]))
+
+        permutados = (a[:, None] * hashes[None, :] + b[:, None]) % _PRIMO
+        firmas[desde:desde + len(por_texto)] = np.minimum.reduceat(permutados, inicios, axis=1).T
+    return firmas
+
+
+def colapsar_duplicados(comentarios: List[str], umbral: float = 0.8,
+                        num_permutaciones: int = 64, bandas: int = 16,
+                        peso_maximo: Optional[int] = None,
+                        pesos: Optional[List[int]] = None,
+                        clave_cercanos: Optional[Callable[[str], Hashable]] = None) -> Tuple[List[str], List[int], int]:
+    """Collapse exact and near-duplicate reviews into weighted representatives.
+
+    Reviews are first grouped by their normalized text (exact duplicates up
+    to case, accents and punctuation). Each group is represented by its first
+    review, weighted by the number of reviews it stands for, so weighted
+    aggregates of exact groups equal the uncollapsed ones. Blank reviews are
+    dropped, as in analizar_multiples.
+
+    Near-duplicates can differ in the one word that carries their sentiment
+    ("excelente" vs "horrible"), so they are only merged when clave_cercanos
+    is given: distinct texts are compared with MinHash signatures bucketed by
+    LSH bands, and pairs whose estimated Jaccard similarity of word bigrams
+    reaches umbral are merged if clave_cercanos maps both to the same value.
+    Passing the analyzed score (e.g. lambda c: analizador.analizar_comentario(c)['score'])
+    keeps weighted mean scores exact.
+
+    Args:
+        comentarios: Review texts
+        umbral: Minimum estimated Jaccard similarity to merge two texts
+        num_permutaciones: MinHash signature length
+        bandas: Number of LSH bands (must divide num_permutaciones)
+        peso_maximo: Optional cap on a group's weight, to limit spam floods
+        pesos: Optional existing multiplicity per review, so already collapsed
+            lists can be merged and collapsed again
+        clave_cercanos: Value near-duplicates must share to be merged. If
+            None, only exact duplicates are collapsed.
+
+    Returns:
+        Tuple of (representative reviews, weights, number of reviews collapsed).
+        The count is in reviews, not weight.
+
+    Raises:
+        ValueError: If bandas does not divide num_permutaciones
+    """
+    if num_permutaciones % bandas:
+        raise ValueError("bandas must divide num_permutaciones")
+
+    claves = {}
+    representantes = []
+    conteos = []
+    total = 0
+    if pesos is None:
+        pesos = [1] * len(comentarios)
+    for comentario, peso in zip(comentarios, pesos):
+        if not comentario.strip():
+            continue
+        total += 1
+        clave = normalizar_texto(comentario)
+        indice = claves.get(clave)
+        if indice is None:
+            claves[clave] = len(representantes)
+            representantes.append(comentario)
+            conteos.append(peso)
+        else:
+            conteos[indice] += peso
+
+    padre = list(range(len(representantes)))
+    if clave_cercanos is None:
+        return _resultado_grupos(representantes, conteos, padre, total, peso_maximo)
+    valores = [clave_cercanos(representante) for representante in representantes]
+
+    def raiz(i: int) -> int:
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    firmas = firmas_minhash(list(claves), num_permutaciones)
+    filas = num_permutaciones // bandas
+    for banda in range(bandas):
+        cubetas = {}
+        for i, fila in enumerate(firmas[:, banda * filas:(banda + 1) * filas]):
+            cubetas.setdefault(fila.tobytes(), []).append(i)
+        for miembros in cubetas.values():
+            for posicion, j in enumerate(miembros[1:], 1):
+                for i in miembros[:posicion]:
+                    ri, rj = raiz(i), raiz(j)
+                    if ri == rj:
+                        break
+                    if valores[i] != valores[j]:
+                        continue
+                    if np.count_nonzero(firmas[i] == firmas[j]) >= umbral * num_permutaciones:
+                        padre[max(ri, rj)] = min(ri, rj)
+                        break
+
+    return _resultado_grupos(representantes, conteos, [raiz(i) for i in range(len(padre))], total, peso_maximo)
+
+
+def _resultado_grupos(representantes: List[str], conteos: List[int], raices: List[int],
+                      total: int, peso_maximo: Optional[int]) -> Tuple[List[str], List[int], int]:
+    """Sum the weights of each group and pick its first review as representative."""
+    grupos = {}
+    for r, conteo in zip(raices, conteos):
+        grupos[r] = grupos.get(r, 0) + conteo
+
+    unicos = [representantes[r] for r in sorted(grupos)]
+    pesos_unicos = [grupos[r] for r in sorted(grupos)]
+    if peso_maximo is not None:
+        pesos_unicos = [min(peso, peso_maximo) for peso in pesos_unicos]
+
+    return unicos, pesos_unicos, total - len(unicos)
+
+
+def deduplicar_productos(productos: List[Dict[str, Any]], umbral: float = 0.8,
+                         clave_cercanos: Optional[Callable[[str], Hashable]] = None) -> Tuple[List[Dict[str, Any]], int, int]:
+    """Merge repeated products and collapse their duplicate reviews.
+
+    Products sharing an id (or url when the id is empty) are merged into the
+    first occurrence and their reviews concatenated. Each product's reviews
+    are then collapsed with colapsar_duplicados; multiplicities are stored in
+    'pesos_comentarios', aligned with 'comentarios'. Existing
+    'pesos_comentarios' are honored, so the function is idempotent.
+
+    Args:
+        productos: Products (Product instances or dicts)
+        umbral: Near-duplicate threshold for reviews
+        clave_cercanos: Value near-duplicate reviews must share to be merged
+            (see colapsar_duplicados). If None, only exact duplicates collapse.
+
+    Returns:
+        Tuple of (products, products collapsed, reviews collapsed)
+    """
+    por_clave = {}
+    resultado = []
+    for producto in productos:
+        clave = producto.get('id') or producto.get('url')
+        existente = por_clave.get(clave) if clave else None
+        comentarios = list(producto.get('comentarios', []))
+        pesos = producto.get('pesos_comentarios')
+        pesos = list(pesos) if pesos is not None and len(pesos) == len(comentarios) else [1] * len(comentarios)
+        if existente is None:
+            existente = producto.copy()
+            existente['comentarios'] = comentarios
+            existente['pesos_comentarios'] = pesos
+            if clave:
+                por_clave[clave] = existente
+            resultado.append(existente)
+        else:
+            existente['comentarios'].extend(comentarios)
+            existente['pesos_comentarios'].extend(pesos)
+
+    comentarios_colapsados = 0
+    for producto in resultado:
+        unicos, pesos, colapsados = colapsar_duplicados(producto['comentarios'], umbral,
+                                                        pesos=producto['pesos_comentarios'],
+                                                        clave_cercanos=clave_cercanos)
+        producto['comentarios'] = unicos
+        producto['pesos_comentarios'] = pesos
+        comentarios_colapsados += colapsados
+
+    return resultado, len(productos) - len(resultado), comentarios_colapsados
@@ -1,10 +1,12 @@
 """Generate realistic demo data for multiple product categories."""
 
 import random
-from typing import List, Dict, Any
+from typing import List
 
+from .product import Product
 
-def generate_demo_data(categoria: str = 'vinos', cantidad: int = 20, seed: int = 42) -> List[Dict[str, Any]]:
+
+def generate_demo_data(categoria: str = 'vinos', cantidad: int = 20, seed: int = 42) -> List[Product]:
     """Generate demo products for a category.
 
     Args:
@@ -13,7 +15,7 @@ def generate_demo_data(categoria: str = 'vinos', cantidad: int = 20, seed: int =
         seed: Random seed for reproducibility
 
     Returns:
-        List of product dicts
+        List of products
     """
     random.seed(seed)
 
@@ -27,7 +29,7 @@ def generate_demo_data(categoria: str = 'vinos', cantidad: int = 20, seed: int =
         return _generar_vinos(cantidad)
 
 
-def _generar_vinos(cantidad: int) -> List[Dict[str, Any]]:
+def _generar_vinos(cantidad: int) -> List[Product]:
     """Generate wine demo products."""
     nombres = [
         'Malbec Bodega Catena Zapata', 'Torrontés Etchart', 'Cabernet Sauvignon Achaval Ferrer',
@@ -71,24 +73,24 @@ def _generar_vinos(cantidad: int) -> List[Dict[str, Any]]:
                 comentario = random.choice(comentarios_positivos + comentarios_negativos)
             comentarios.append(comentario)
 
-        productos.append({
-            'nombre': f"{nombre} ({2023 - i % 5})",
-            'precio': str(precio),
-            'moneda': 'ARS',
-            'estrellas': str(estrellas),
-            'calificaciones': str(calificaciones),
-            'envio': random.choice(['Gratis', 'Con costo', 'Por pagar']),
-            'descuento': f"{random.randint(0, 30)}%" if random.random() > 0.6 else 'Sin descuento',
-            'url': f'https://articulo.mercadolibre.com.ar/mla-{1000000 + i}',
-            'id': f'mla_{1000000 + i}',
-            'vendedor': f'Bodega Premium {i % 5}',
-            'comentarios': comentarios
-        })
+        productos.append(Product(
+            nombre=f"{nombre} ({2023 - i % 5})",
+            precio=precio,
+            moneda='ARS',
+            estrellas=estrellas,
+            calificaciones=calificaciones,
+            envio=random.choice(['Gratis', 'Con costo', 'Por pagar']),
+            descuento=f"{random.randint(0, 30)}%" if random.random() > 0.6 else 'Sin descuento',
+            url=f'https://articulo.mercadolibre.com.ar/mla-{1000000 + i}',
+            id=f'mla_{1000000 + i}',
+            vendedor=f'Bodega Premium {i % 5}',
+            comentarios=comentarios,
+        ))
 
     return productos
 
 
-def _generar_electronica(cantidad: int) -> List[Dict[str, Any]]:
+def _generar_electronica(cantidad: int) -> List[Product]:
     """Generate electronics demo products."""
     nombres = [
         'Tablet Samsung Galaxy Tab', 'Smartphone Motorola Moto G50', 'Laptop ASUS VivoBook',
@@ -132,24 +134,24 @@ def _generar_electronica(cantidad: int) -> List[Dict[str, Any]]:
                 comentario = random.choice(comentarios_positivos + comentarios_negativos)
             comentarios.append(comentario)
 
-        productos.append({
-            'nombre': f"{nombre} #{i + 1}",
-            'precio': str(precio),
-            'moneda': 'ARS',
-            'estrellas': str(estrellas),
-            'calificaciones': str(calificaciones),
-            'envio': random.choice(['Gratis', 'Con costo']),
-            'descuento': f"{random.randint(5, 50)}%" if random.random() > 0.5 else 'Sin descuento',
-            'url': f'https://articulo.mercadolibre.com.ar/mla-{2000000 + i}',
-            'id': f'mla_{2000000 + i}',
-            'vendedor': f'Tech Store {i % 7}',
-            'comentarios': comentarios
-        })
+        productos.append(Product(
+            nombre=f"{nombre} #{i + 1}",
+            precio=precio,
+            moneda='ARS',
+            estrellas=estrellas,
+            calificaciones=calificaciones,
+            envio=random.choice(['Gratis', 'Con costo']),
+            descuento=f"{random.randint(5, 50)}%" if random.random() > 0.5 else 'Sin descuento',
+            url=f'https://articulo.mercadolibre.com.ar/mla-{2000000 + i}',
+            id=f'mla_{2000000 + i}',
+            vendedor=f'Tech Store {i % 7}',
+            comentarios=comentarios,
+        ))
 
     return productos
 
 
-def _generar_indumentaria(cantidad: int) -> List[Dict[str, Any]]:
+def _generar_indumentaria(cantidad: int) -> List[Product]:
     """Generate clothing demo products."""
     nombres = [
         'Remera Básica Algodon', 'Pantalon Jeans Azul', 'Campera Invierno Acolchada',
@@ -193,18 +195,18 @@ def _generar_indumentaria(cantidad: int) -> List[Dict[str, Any]]:
                 comentario = random.choice(comentarios_positivos + comentarios_negativos)
             comentarios.append(comentario)
 
-        productos.append({
-            'nombre': f"{nombre} Talle {random.choice(['XS', 'S', 'M', 'L', 'XL', 'XXL'])}",
-            'precio': str(precio),
-            'moneda': 'ARS',
-            'estrellas': str(estrellas),
-            'calificaciones': str(calificaciones),
-            'envio': random.choice(['Gratis', 'Con costo']),
-            'descuento': f"{random.randint(10, 40)}%" if random.random() > 0.5 else 'Sin descuento',
-            'url': f'https://articulo.mercadolibre.com.ar/mla-{3000000 + i}',
-            'id': f'mla_{3000000 + i}',
-            'vendedor': f'Fashion Store {i % 6}',
-            'comentarios': comentarios
-        })
+        productos.append(Product(
+            nombre=f"{nombre} Talle {random.choice(['XS', 'S', 'M', 'L', 'XL', 'XXL'])}",
+            precio=precio,
+            moneda='ARS',
+            estrellas=estrellas,
+            calificaciones=calificaciones,
+            envio=random.choice(['Gratis', 'Con costo']),
+            descuento=f"{random.randint(10, 40)}%" if random.random() > 0.5 else 'Sin descuento',
+            url=f'https://articulo.mercadolibre.com.ar/mla-{3000000 + i}',
+            id=f'mla_{3000000 + i}',
+            vendedor=f'Fashion Store {i % 6}',
+            comentarios=comentarios,
+        ))
 
     return productos
@@ -1,13 +1,155 @@
 """Configurable expert system for product recommendations based on rules and sentiment."""
 
-import json
-from typing import Dict, List, Optional, Any, Tuple
+import math
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from pathlib import Path
 
+import numpy as np
+
+from .metrics import MetricasReglas
+from .registry import cargar_config
+
+_INF = float('inf')
+
+
+class _ReglaCompilada:
+    """Rule condition flattened into numeric bounds, with its outcome precomputed.
+
+    Absent bounds are stored as -inf/inf, so every rule is checked with the
+    same comparisons as _evaluar_regla (including NaN scores, which pass).
+    """
+
+    __slots__ = ('indice', 'sentimiento_min', 'sentimiento_max', 'aspecto',
+                 'aspecto_min', 'aspecto_max', 'recomendacion', 'confianza', 'razon')
+
+    def __init__(self, indice: int, regla: Dict):
+        condicion = regla['si']
+        entonces = regla['entonces']
+        self.indice = indice
+        self.sentimiento_min = condicion.get('sentimiento_min', -_INF)
+        self.sentimiento_max = condicion.get('sentimiento_max', _INF)
+        self.aspecto = condicion.get('aspecto')
+        self.aspecto_min = condicion.get('aspecto_min', -_INF) if self.aspecto is not None else -_INF
+        self.aspecto_max = condicion.get('aspecto_max', _INF) if self.aspecto is not None else _INF
+        self.recomendacion = entonces['recomendacion']
+        self.confianza = entonces.get('confianza', 0.5)
+        self.razon = entonces.get('razon', '')
+
+    def cumple(self, sentimiento: float, aspectos: Dict[str, float]) -> bool:
+        """Return True if the rule condition holds for the given scores."""
+        if sentimiento < self.sentimiento_min or sentimiento > self.sentimiento_max:
+            return False
+        if self.aspecto is not None:
+            score = aspectos.get(self.aspecto, 0.0)
+            if score < self.aspecto_min or score > self.aspecto_max:
+                return False
+        return True
+
+
+def _cumplen(sentimientos: np.ndarray, columna: Optional[np.ndarray],
+             sentimiento_min: Any, sentimiento_max: Any,
+             aspecto_min: Any, aspecto_max: Any) -> np.ndarray:
+    """Vectorized _ReglaCompilada.cumple.
+
+    Bounds may be scalars or arrays that broadcast against the score columns
+    (e.g. one row of bounds per candidate threshold).
+
+    Args:
+        sentimientos: Global sentiment scores
+        columna: Aspect scores for the rule's aspect, or None if it has none
+        sentimiento_min: Lower sentiment bound
+        sentimiento_max: Upper sentiment bound
+        aspecto_min: Lower aspect bound
+        aspecto_max: Upper aspect bound
+
+    Returns:
+        Boolean mask of products for which the rule fires
+    """
+    cumple = ~((sentimientos < sentimiento_min) | (sentimientos > sentimiento_max))
+    if columna is not None:
+        cumple = cumple & (columna >= aspecto_min) & (columna <= aspecto_max)
+    return cumple
+
+
+class _Intervalos:
+    """Rules constrained on one score, as prefix/suffix bitmasks over sorted bounds.
+
+    Bit i of a mask stands for rule i. Rules with min <= x are a prefix of the
+    rules sorted by min, and rules with max >= x a suffix of those sorted by
+    max, so the rules whose interval contains x are one AND of two masks.
+    """
+
+    __slots__ = ('mascara', 'minimos', 'prefijos', 'maximos', 'sufijos')
+
+    def __init__(self, reglas: List[Tuple[int, float, float]]):
+        """Build from (rule index, min, max) triples."""
+        self.mascara = 0
+        for indice, _, _ in reglas:
+            self.mascara |= 1 << indice
+
+        por_minimo = sorted(reglas, key=lambda r: r[1])
+        self.minimos = [r[1] for r in por_minimo]
+        self.prefijos = [0]
+        for indice, _, _ in por_minimo:
+            self.prefijos.append(self.prefijos[-1] | (1 << indice))
+
+        por_maximo = sorted(reglas, key=lambda r: r[2])
+        self.maximos = [r[2] for r in por_maximo]
+        self.sufijos = [0]
+        for indice, _, _ in reversed(por_maximo):
+            self.sufijos.append(self.sufijos[-1] | (1 << indice))
+        self.sufijos.reverse()
+
+    def contienen(self, x: float) -> int:
+        """Return the mask of rules whose interval contains x (all of them for NaN)."""
+        if math.isnan(x):
+            return self.mascara
+        return self.prefijos[bisect_right(self.minimos, x)] & self.sufijos[bisect_left(self.maximos, x)]
+
+
+class _IndiceUmbrales:
+    """Threshold index over compiled rules for large rule sets.
+
+    Gives exactly the rules _ReglaCompilada.cumple accepts, without checking
+    each rule: one interval lookup for the global sentiment and one per aspect
+    that rules refer to.
+    """
+
+    __slots__ = ('sentimiento', 'aspectos')
+
+    def __init__(self, reglas: List[_ReglaCompilada]):
+        """Build the index from compiled rules."""
+        todas = (1 << len(reglas)) - 1
+        self.sentimiento = _Intervalos([(r.indice, r.sentimiento_min, r.sentimiento_max) for r in reglas])
+
+        por_aspecto = {}
+        for r in reglas:
+            if r.aspecto is not None:
+                por_aspecto.setdefault(r.aspecto, []).append((r.indice, r.aspecto_min, r.aspecto_max))
+        self.aspectos = []
+        for aspecto, grupo in por_aspecto.items():
+            intervalos = _Intervalos(grupo)
+            self.aspectos.append((aspecto, todas & ~intervalos.mascara, intervalos))
+
+    def disparadas(self, sentimiento: float, aspectos: Dict[str, float]) -> int:
+        """Return the mask of rules that fire for the given scores."""
+        mascara = self.sentimiento.contienen(sentimiento)
+        for aspecto, libres, intervalos in self.aspectos:
+            if not mascara:
+                break
+            mascara &= libres | intervalos.contienen(aspectos.get(aspecto, 0.0))
+        return mascara
+
 
 class ProductExpert:
     """Expert system for product recommendations using JSON-defined rules."""
 
+    # Rule count from which inferir looks rules up in a threshold index
+    # instead of checking each one.
+    MIN_REGLAS_INDICE = 32
+
     def __init__(self, categoria_config: Optional[Dict] = None, config_path: Optional[str] = None):
         """Initialize expert system with category configuration.
 
@@ -18,8 +160,7 @@ class ProductExpert:
         if categoria_config:
             self.config = categoria_config
         elif config_path:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
+            self.config = cargar_config(config_path)
         else:
             self.config = self._config_por_defecto()
 
@@ -30,6 +171,54 @@ class ProductExpert:
             'confianza': 0.5,
             'razon': 'Sin información suficiente'
         })
+        self.metricas: Optional[MetricasReglas] = None
+        self.recompilar()
+
+    def recompilar(self):
+        """Discard compiled rules. Call again after editing the rules in place.
+
+        Rules are compiled on first use, so constructing an expert (and
+        calling validar_config) works even when the rules are malformed.
+        """
+        self._compiladas: Optional[List[_ReglaCompilada]] = None
+        self._indice_compilado: Optional[_IndiceUmbrales] = None
+        if self.metricas is not None:
+            self.activar_metricas()
+
+    @property
+    def _reglas_compiladas(self) -> List[_ReglaCompilada]:
+        """Compiled rules, built from self.reglas on first access."""
+        if self._compiladas is None:
+            compiladas = [_ReglaCompilada(i, regla) for i, regla in enumerate(self.reglas)]
+            if len(compiladas) >= self.MIN_REGLAS_INDICE:
+                self._indice_compilado = _IndiceUmbrales(compiladas)
+            self._compiladas = compiladas
+        return self._compiladas
+
+    @property
+    def _indice(self) -> Optional[_IndiceUmbrales]:
+        """Threshold index of the compiled rules, or None for small rule sets."""
+        self._reglas_compiladas
+        return self._indice_compilado
+
+    def activar_metricas(self) -> MetricasReglas:
+        """Start counting rule evaluations, firings, wins and evaluation time.
+
+        While enabled, inferir checks every rule (bypassing the threshold
+        index) so each one can be timed. Counters restart from zero.
+
+        Returns:
+            The MetricasReglas collecting the counts (also self.metricas)
+        """
+        self.metricas = MetricasReglas(
+            [regla.razon for regla in self._reglas_compiladas],
+            self.config.get('categoria', '')
+        )
+        return self.metricas
+
+    def desactivar_metricas(self):
+        """Stop collecting metrics."""
+        self.metricas = None
 
     def _config_por_defecto(self) -> Dict:
         """Return default configuration."""
@@ -48,6 +237,9 @@ class ProductExpert:
     def inferir(self, sentimiento_global: float, aspectos: Dict[str, float]) -> Dict[str, Any]:
         """Infer recommendation based on global sentiment and aspect scores.
 
+        The fired rule with the highest confidence wins; ties go to the rule
+        listed first.
+
         Args:
             sentimiento_global: Overall sentiment score (-1 to 1)
             aspectos: Dict of aspect names to scores
@@ -56,26 +248,36 @@ class ProductExpert:
             Dict with 'recomendacion', 'confianza', 'razon', and 'reglas_disparadas' list
         """
         reglas_disparadas = []
+        ganadora = None
 
-        for regla in self.reglas:
-            if self._evaluar_regla(regla['si'], sentimiento_global, aspectos):
-                reglas_disparadas.append({
-                    'razon': regla['entonces'].get('razon', ''),
-                    'recomendacion': regla['entonces']['recomendacion']
-                })
-
-        if reglas_disparadas:
-            resultado = max(
-                [r for r in reglas_disparadas],
-                key=lambda x: self.reglas[
-                    next(i for i, r in enumerate(self.reglas)
-                         if r['entonces']['razon'] == x['razon'])
-                ]['entonces'].get('confianza', 0.5)
-            )
+        metricas = self.metricas
+        if metricas is None:
+            disparadas = self._disparadas(sentimiento_global, aspectos)
+        else:
+            disparadas, tiempos = self._disparadas_instrumentado(sentimiento_global, aspectos)
+
+        for regla in disparadas:
+            reglas_disparadas.append({
+                'razon': regla.razon,
+                'recomendacion': regla.recomendacion
+            })
+            if ganadora is None or regla.confianza > ganadora.confianza:
+                ganadora = regla
+
+        if metricas is not None:
+            num_reglas = len(self._reglas_compiladas)
+            ganadas, disparos = [0] * num_reglas, [0] * num_reglas
+            for regla in disparadas:
+                disparos[regla.indice] = 1
+            if ganadora is not None:
+                ganadas[ganadora.indice] = 1
+            metricas.registrar(ganadas, int(ganadora is None), [1] * num_reglas, disparos, tiempos)
+
+        if ganadora is not None:
             return {
-                'recomendacion': resultado['recomendacion'],
-                'confianza': self._obtener_confianza(resultado),
-                'razon': resultado['razon'],
+                'recomendacion': ganadora.recomendacion,
+                'confianza': ganadora.confianza,
+                'razon': ganadora.razon,
                 'reglas_disparadas': reglas_disparadas
             }
 
@@ -86,12 +288,133 @@ class ProductExpert:
             'reglas_disparadas': []
         }
 
-    def _obtener_confianza(self, resultado: Dict) -> float:
-        """Extract confidence from resultado dict."""
-        for regla in self.reglas:
-            if regla['entonces'].get('razon') == resultado['razon']:
-                return regla['entonces'].get('confianza', 0.5)
-        return 0.5
+    def _disparadas(self, sentimiento: float, aspectos: Dict[str, float]) -> List[_ReglaCompilada]:
+        """Return the rules whose condition holds, in rule order.
+
+        Large rule sets are looked up in the threshold index; smaller ones are
+        checked one by one. Both give the same rules.
+        """
+        if self._indice is None:
+            return [regla for regla in self._reglas_compiladas if regla.cumple(sentimiento, aspectos)]
+
+        reglas = self._reglas_compiladas
+        mascara = self._indice.disparadas(sentimiento, aspectos)
+        disparadas = []
+        while mascara:
+            bit = mascara & -mascara
+            disparadas.append(reglas[bit.bit_length() - 1])
+            mascara ^= bit
+        return disparadas
+
+    def _disparadas_instrumentado(self, sentimiento: float,
+                                  aspectos: Dict[str, float]) -> Tuple[List[_ReglaCompilada], List[float]]:
+        """Check every rule like _disparadas, timing each check.
+
+        Returns:
+            Tuple of (fired rules, evaluation seconds per rule)
+        """
+        reloj = time.perf_counter
+        tiempos = []
+        disparadas = []
+        for regla in self._reglas_compiladas:
+            inicio = reloj()
+            cumple = regla.cumple(sentimiento, aspectos)
+            tiempos.append(reloj() - inicio)
+            if cumple:
+                disparadas.append(regla)
+        return disparadas, tiempos
+
+    def inferir_lote(self, sentimientos: np.ndarray, aspectos: Optional[np.ndarray] = None,
+                     nombres_aspectos: Optional[Sequence[str]] = None,
+                     con_disparadas: bool = False) -> Dict[str, np.ndarray]:
+        """Infer recommendations for many products at once.
+
+        Each rule's bounds become boolean masks over the score columns and the
+        winner is the fired rule with the highest confidence (first listed on
+        ties), so every row matches inferir. Aspects missing from the matrix,
+        or NaN in it, count as 0.0, like aspects absent from inferir's dict.
+
+        Args:
+            sentimientos: Global sentiment score per product, shape (n,)
+            aspectos: Aspect score matrix, shape (n, len(nombres_aspectos))
+                (e.g. ResultadosColumnares.aspectos)
+            nombres_aspectos: Aspect per matrix column. Defaults to the
+                configured aspects in order.
+            con_disparadas: Also return the (n, rules) boolean matrix of fired rules
+
+        Returns:
+            Dict with 'recomendacion' (object array), 'confianza' (float64),
+            'regla' (int64 index into reglas, -1 for the default rule) and,
+            if requested, 'disparadas'
+        """
+        sentimientos = np.asarray(sentimientos, dtype=np.float64)
+        n = len(sentimientos)
+        columna_aspecto = self._columnas_aspectos(n, aspectos, nombres_aspectos)
+
+        mejor = np.full(n, -np.inf)
+        ganadora = np.full(n, -1, dtype=np.int64)
+        disparadas = np.zeros((n, len(self._reglas_compiladas)), dtype=bool) if con_disparadas else None
+
+        metricas = self.metricas
+        if metricas is not None:
+            disparos, tiempos = [], []
+
+        for regla in self._reglas_compiladas:
+            if metricas is not None:
+                inicio = time.perf_counter()
+            cumple = _cumplen(sentimientos, columna_aspecto(regla.aspecto),
+                              regla.sentimiento_min, regla.sentimiento_max,
+                              regla.aspecto_min, regla.aspecto_max)
+            if metricas is not None:
+                tiempos.append(time.perf_counter() - inicio)
+                disparos.append(int(np.count_nonzero(cumple)))
+            if disparadas is not None:
+                disparadas[:, regla.indice] = cumple
+            supera = cumple & (regla.confianza > mejor)
+            mejor[supera] = regla.confianza
+            ganadora[supera] = regla.indice
+
+        # The default recommendation is appended last, so index -1 selects it.
+        etiquetas = np.array(
+            [regla.recomendacion for regla in self._reglas_compiladas] + [self.regla_default['recomendacion']],
+            dtype=object
+        )
+        confianza = np.where(ganadora >= 0, mejor, self.regla_default['confianza'])
+
+        if metricas is not None:
+            num_reglas = len(self._reglas_compiladas)
+            ganadas = np.bincount(ganadora[ganadora >= 0], minlength=num_reglas)
+            metricas.registrar(ganadas, int(np.count_nonzero(ganadora < 0)), [n] * num_reglas, disparos, tiempos)
+
+        resultado = {
+            'recomendacion': etiquetas[ganadora],
+            'confianza': confianza,
+            'regla': ganadora,
+        }
+        if disparadas is not None:
+            resultado['disparadas'] = disparadas
+        return resultado
+
+    def _columnas_aspectos(self, n: int, aspectos: Optional[np.ndarray],
+                           nombres_aspectos: Optional[Sequence[str]]):
+        """Return a lookup from aspect name (or None) to its score column for batch evaluation.
+
+        NaN and unknown aspects read as 0.0; None (rules without an aspect) gives None.
+        """
+        if nombres_aspectos is None:
+            nombres_aspectos = list(self.aspectos)
+        columnas = {}
+        if aspectos is not None:
+            aspectos = np.nan_to_num(np.asarray(aspectos, dtype=np.float64), nan=0.0)
+            columnas = {nombre: aspectos[:, j] for j, nombre in enumerate(nombres_aspectos)}
+        ceros = np.zeros(n)
+
+        def columna(aspecto: Optional[str]) -> Optional[np.ndarray]:
+            if aspecto is None:
+                return None
+            return columnas.get(aspecto, ceros)
+
+        return columna
 
     def _evaluar_regla(self, condicion: Dict, sentimiento: float, aspectos: Dict[str, float]) -> bool:
         """Evaluate if rule condition is met.
@@ -183,6 +506,7 @@ class ProductExpert:
         for regla in self.reglas:
             if 'si' not in regla or 'entonces' not in regla:
                 errores.append("Each rule must have 'si' and 'entonces' clauses")
+                continue
 
             si_clause = regla['si']
             entonces_clause = regla['entonces']
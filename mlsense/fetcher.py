@@ -7,11 +7,12 @@ import ssl
 import logging
 import time
 import random
-import unicodedata
-import re
 from typing import Tuple, Optional, Dict, Any, List
 from pathlib import Path
 
+from .dedup import deduplicar_productos
+from .normalize import slug_busqueda
+
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,61 @@ USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15',
 ]
+_USER_AGENT_FETCH = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+
+def _cabeceras(user_agent: str = _USER_AGENT_FETCH) -> Dict[str, str]:
+    """Return browser-like request headers.
+
+    Args:
+        user_agent: User-Agent to send
+
+    Returns:
+        Dict of HTTP headers
+    """
+    return {
+        'User-Agent': user_agent,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'es-ES,es;q=0.9',
+    }
+
+
+def _motivo_reintento(e: Exception) -> Optional[str]:
+    """Return why a failed request is worth retrying without SSL verification.
+
+    Args:
+        e: Error raised by the request
+
+    Returns:
+        Short reason for the log, or None if the error is final
+    """
+    if isinstance(e, urllib.error.HTTPError):
+        return "403 Forbidden" if e.code == 403 else None
+    if isinstance(e, ssl.SSLError):
+        return "SSL error"
+    return None
+
+
+def _mensaje_error(e: Exception) -> str:
+    """Map a request error to the message shown to the user.
+
+    Args:
+        e: Error raised by the request
+
+    Returns:
+        Error message
+    """
+    if isinstance(e, urllib.error.HTTPError):
+        if e.code == 429:
+            return "Too many requests. MercadoLibre blocked this IP. Use Mode A (HTML upload)."
+        if 400 <= e.code < 500:
+            return f"Client error {e.code}: {e.reason}. Try uploading HTML instead."
+        return f"Server error {e.code}: {e.reason}"
+    if isinstance(e, urllib.error.URLError):
+        return f"Connection error: {str(e)}. Check URL and internet connection."
+    if isinstance(e, ssl.SSLError):
+        return f"Failed even without verification: {type(e).__name__}"
+    return f"Unexpected error: {type(e).__name__}: {str(e)[:100]}"
 
 
 def fetch_product_url(url: str, timeout: int = 15) -> Tuple[bool, Optional[Dict[str, Any]], str]:
@@ -39,11 +95,7 @@ def fetch_product_url(url: str, timeout: int = 15) -> Tuple[bool, Optional[Dict[
     if not url or not url.startswith('http'):
         return False, None, "Invalid URL format"
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'es-ES,es;q=0.9',
-    }
+    headers = _cabeceras()
 
     try:
         req = urllib.request.Request(url, headers=headers)
@@ -53,26 +105,12 @@ def fetch_product_url(url: str, timeout: int = 15) -> Tuple[bool, Optional[Dict[
             content = response.read().decode('utf-8', errors='replace')
             return True, content, "Success"
 
-    except (urllib.error.HTTPError, urllib.error.URLError) as e:
-        if isinstance(e, urllib.error.HTTPError):
-            if e.code == 403:
-                logger.warning(f"403 Forbidden from {url} - trying without SSL verification")
-                return _fetch_sin_verificacion(url, headers, timeout)
-            elif e.code == 429:
-                return False, None, "Too many requests. MercadoLibre blocked this IP. Use Mode A (HTML upload)."
-            elif 400 <= e.code < 500:
-                return False, None, f"Client error {e.code}: {e.reason}. Try uploading HTML instead."
-            else:
-                return False, None, f"Server error {e.code}: {e.reason}"
-        else:
-            return False, None, f"Connection error: {str(e)}. Check URL and internet connection."
-
-    except ssl.SSLError as e:
-        logger.warning(f"SSL error for {url} - trying without verification")
-        return _fetch_sin_verificacion(url, headers, timeout)
-
     except Exception as e:
-        return False, None, f"Unexpected error: {type(e).__name__}: {str(e)[:100]}"
+        motivo = _motivo_reintento(e)
+        if motivo is not None:
+            logger.warning(f"{motivo} from {url} - trying without SSL verification")
+            return _fetch_sin_verificacion(url, headers, timeout)
+        return False, None, _mensaje_error(e)
 
 
 def _fetch_sin_verificacion(url: str, headers: Dict, timeout: int) -> Tuple[bool, Optional[str], str]:
@@ -96,7 +134,52 @@ def _fetch_sin_verificacion(url: str, headers: Dict, timeout: int) -> Tuple[bool
             return True, content, "Success (unverified SSL)"
 
     except Exception as e:
-        return False, None, f"Failed even without verification: {type(e).__name__}"
+        return False, None, _mensaje_error(e)
+
+
+def fetch_products_streaming(url: str, timeout: int = 15,
+                             parar_en_json_ld: bool = True) -> Tuple[bool, List[Dict[str, Any]], str]:
+    """Fetch a product URL and parse it while the body downloads.
+
+    Chunks are fed to an IncrementalParser as they arrive. With
+    parar_en_json_ld, the connection is closed as soon as a JSON-LD block has
+    yielded products, instead of downloading the rest of the page.
+
+    Args:
+        url: Product URL
+        timeout: Request timeout in seconds
+        parar_en_json_ld: Stop reading once JSON-LD products have been seen
+
+    Returns:
+        Tuple of (success, products_list, message)
+    """
+    from .parsers import parse_stream
+
+    if not url or not url.startswith('http'):
+        return False, [], "Invalid URL format"
+
+    headers = _cabeceras()
+    intentos = (
+        (ssl.create_default_context, "Success"),
+        (ssl._create_unverified_context, "Success (unverified SSL)"),
+    )
+
+    for verificado, (crear_contexto, mensaje) in zip((True, False), intentos):
+        try:
+            req = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(req, timeout=timeout, context=crear_contexto()) as response:
+                productos, _, leidos = parse_stream(response, parar_en_json_ld=parar_en_json_ld)
+            logger.debug(f"Parsed {len(productos)} products from {leidos} bytes of {url}")
+            return True, productos, mensaje
+
+        except Exception as e:
+            motivo = _motivo_reintento(e)
+            if motivo is not None and verificado:
+                logger.warning(f"{motivo} from {url} - trying without SSL verification")
+                continue
+            return False, [], _mensaje_error(e)
+
+    return False, [], "Failed even without verification"
 
 
 def build_search_url(termino: str) -> str:
@@ -110,14 +193,7 @@ def build_search_url(termino: str) -> str:
     Returns:
         Full search URL
     """
-    termino = termino.strip()
-    termino = termino.lower()
-    termino = unicodedata.normalize('NFD', termino)
-    termino = ''.join(c for c in termino if unicodedata.category(c) != 'Mn')
-    termino = re.sub(r'[^a-z0-9\s]', '', termino)
-    termino = re.sub(r'\s+', '-', termino).strip('-')
-
-    return f"https://listado.mercadolibre.com.ar/{termino}"
+    return f"https://listado.mercadolibre.com.ar/{slug_busqueda(termino)}"
 
 
 def search_live(termino: str, max_productos: int = 15, con_comentarios: bool = True,
@@ -144,11 +220,7 @@ def search_live(termino: str, max_productos: int = 15, con_comentarios: bool = T
 
     search_url = build_search_url(termino)
 
-    headers = {
-        'User-Agent': random.choice(USER_AGENTS),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-        'Accept-Language': 'es-ES,es;q=0.9',
-    }
+    headers = _cabeceras(random.choice(USER_AGENTS))
 
     try:
         req = urllib.request.Request(search_url, headers=headers)
@@ -175,6 +247,10 @@ def search_live(termino: str, max_productos: int = 15, con_comentarios: bool = T
     if not prods_buscados:
         return [], warnings + ["No se encontraron productos en la búsqueda."]
 
+    prods_buscados, productos_colapsados, _ = deduplicar_productos(prods_buscados)
+    if productos_colapsados:
+        warnings.append(f"♻️ {productos_colapsados} productos repetidos en la búsqueda colapsados.")
+
     productos = prods_buscados[:max_productos]
 
     if con_comentarios and productos:
@@ -189,13 +265,12 @@ def search_live(termino: str, max_productos: int = 15, con_comentarios: bool = T
 
             time.sleep(random.uniform(1.5, 3.5))
 
-            success, html, msg = fetch_product_url(url, timeout=15)
+            success, prods_detail, msg = fetch_products_streaming(url, timeout=15)
 
-            if success and html:
-                prods_detail, _ = parse_mercadolibre_html(html)
-                if prods_detail:
-                    producto_detail = prods_detail[0]
-                    producto['comentarios'] = producto_detail.get('comentarios', [])
+            if success and prods_detail:
+                producto_detail = prods_detail[0]
+                producto['comentarios'] = producto_detail.get('comentarios', [])
+                producto.pop('pesos_comentarios', None)
 
             elif msg and "bloqueó" in msg.lower():
                 warnings.append(f"⚠️ Bloqueo a mitad de fetches de comentarios. "
@@ -205,7 +280,9 @@ def search_live(termino: str, max_productos: int = 15, con_comentarios: bool = T
 
             productos_con_reviews.append(producto)
 
-        productos = productos_con_reviews
+        productos, _, comentarios_colapsados = deduplicar_productos(productos_con_reviews)
+        if comentarios_colapsados:
+            warnings.append(f"♻️ {comentarios_colapsados} reseñas duplicadas colapsadas.")
 
     return productos, warnings
 
@@ -0,0 +1,423 @@
+"""Compiled lexicon tables for the sentiment engine."""
+
+import json
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .normalize import normalizar_texto
+
+NEGADOR = 0
+INTENSIFICADOR = 1
+ATENUADOR = 2
+POSITIVO = 3
+NEGATIVO = 4
+
+_CLAVES_CLASE = {
+    NEGADOR: 'negadores',
+    INTENSIFICADOR: 'intensificadores',
+    ATENUADOR: 'atenuadores',
+    POSITIVO: 'positivos',
+    NEGATIVO: 'negativos',
+}
+
+MAGIA_BINARIO = b'MLSLEX01'
+_CABECERA = struct.Struct('<8sIIII')
+
+
+def compilar_lexico(lexicon: Dict) -> Dict[str, Tuple[int, float]]:
+    """Compile a lexicon dict into a single token -> (class, weight) table.
+
+    Keys containing spaces are multi-word expressions; they stay in the table
+    under their original key and are matched through AutomataFrases.
+
+    Classes below POSITIVO are modifiers whose weight multiplies the running
+    multiplier (negators carry -1); POSITIVO and NEGATIVO weights are added to
+    the score. When a word appears in several lists, precedence follows the
+    scoring order: negadores, intensificadores, atenuadores, positivos, negativos.
+
+    Args:
+        lexicon: Parsed lexicon JSON
+
+    Returns:
+        Dict mapping token to (class, weight)
+    """
+    tabla = {}
+
+    for palabra, peso in lexicon.get('negativos', {}).items():
+        tabla[palabra] = (NEGATIVO, peso)
+    for palabra, peso in lexicon.get('positivos', {}).items():
+        tabla[palabra] = (POSITIVO, peso)
+    for palabra, peso in lexicon.get('atenuadores', {}).items():
+        tabla[palabra] = (ATENUADOR, peso)
+    for palabra, peso in lexicon.get('intensificadores', {}).items():
+        tabla[palabra] = (INTENSIFICADOR, peso)
+    for palabra in lexicon.get('negadores', []):
+        tabla[palabra] = (NEGADOR, -1)
+
+    return tabla
+
+
+class AutomataFrases:
+    """Aho-Corasick automaton over tokens for multi-word lexicon entries.
+
+    Built once per lexicon; matching is a single left-to-right pass over the
+    tokens, independent of the number of phrases.
+    """
+
+    __slots__ = ('_goto', '_fallo', '_salidas')
+
+    def __init__(self, frases: Dict[Tuple[str, ...], str]):
+        """Build automaton.
+
+        Args:
+            frases: Dict mapping token tuples to the lexicon key they came from
+        """
+        goto: List[Dict[str, int]] = [{}]
+        propias: List[Tuple[Tuple[int, str], ...]] = [()]
+
+        for tokens, clave in frases.items():
+            estado = 0
+            for token in tokens:
+                siguiente = goto[estado].get(token)
+                if siguiente is None:
+                    siguiente = len(goto)
+                    goto[estado][token] = siguiente
+                    goto.append({})
+                    propias.append(())
+                estado = siguiente
+            propias[estado] = ((len(tokens), clave),)
+
+        fallo = [0] * len(goto)
+        salidas = list(propias)
+        cola = deque(goto[0].values())
+        while cola:
+            estado = cola.popleft()
+            for token, siguiente in goto[estado].items():
+                f = fallo[estado]
+                while f and token not in goto[f]:
+                    f = fallo[f]
+                destino = goto[f].get(token, 0)
+                fallo[siguiente] = destino if destino != siguiente else 0
+                salidas[siguiente] = propias[siguiente] + salidas[fallo[siguiente]]
+                cola.append(siguiente)
+
+        self._goto = goto
+        self._fallo = fallo
+        self._salidas = salidas
+
+    @classmethod
+    def desde_tabla(cls, tabla: Dict[str, Tuple[int, float]]) -> Optional['AutomataFrases']:
+        """Build an automaton from the multi-word keys of a compiled table.
+
+        Phrase keys are normalized like comment text so that accented entries
+        (e.g. "nunca más") match tokenized comments.
+
+        Args:
+            tabla: Dict mapping lexicon key to (class, weight)
+
+        Returns:
+            AutomataFrases, or None if the table has no phrases
+        """
+        frases = {}
+        for clave in tabla:
+            if ' ' not in clave.strip():
+                continue
+            tokens = tuple(normalizar_texto(clave).split())
+            if len(tokens) > 1:
+                frases[tokens] = clave
+        return cls(frases) if frases else None
+
+    def buscar(self, tokens: List[str]) -> List[Tuple[int, int, str]]:
+        """Find non-overlapping phrase matches, leftmost first and longest on ties.
+
+        Args:
+            tokens: Normalized tokens
+
+        Returns:
+            List of (start index, length, lexicon key) in token order
+        """
+        goto = self._goto
+        raiz = goto[0]
+        fallo = self._fallo
+        salidas = self._salidas
+        coincidencias = []
+        estado = 0
+
+        for i, token in enumerate(tokens):
+            if estado == 0:
+                estado = raiz.get(token, 0)
+            else:
+                siguiente = goto[estado].get(token)
+                while siguiente is None and estado:
+                    estado = fallo[estado]
+                    siguiente = goto[estado].get(token)
+                estado = siguiente or 0
+            for largo, clave in salidas[estado]:
+                coincidencias.append((i - largo + 1, largo, clave))
+
+        if len(coincidencias) > 1:
+            coincidencias.sort(key=lambda c: (c[0], -c[1]))
+            elegidas = []
+            libre = 0
+            for coincidencia in coincidencias:
+                if coincidencia[0] >= libre:
+                    elegidas.append(coincidencia)
+                    libre = coincidencia[0] + coincidencia[1]
+            return elegidas
+        return coincidencias
+
+
+class LexiconCompilado:
+    """Immutable compiled lexicon shared by every analyzer using the same file.
+
+    Instances are cached process-wide by mlsense.registry and read concurrently
+    from several threads, so neither the source dict nor the table may be mutated.
+    """
+
+    __slots__ = ('_fuente', 'tabla', 'frases', '_lote')
+
+    def __init__(self, fuente: Optional[Dict], tabla: Optional[Dict[str, Tuple[int, float]]] = None):
+        """Compile lexicon.
+
+        Args:
+            fuente: Parsed lexicon JSON, or None if tabla is given
+            tabla: Already compiled table. If None, compiled from fuente.
+        """
+        self._fuente = fuente
+        self.tabla = compilar_lexico(fuente) if tabla is None else tabla
+        self.frases = AutomataFrases.desde_tabla(self.tabla)
+        self._lote = None
+
+    @classmethod
+    def desde_tabla(cls, tabla: Dict[str, Tuple[int, float]]) -> 'LexiconCompilado':
+        """Build from a compiled table; the source dict is reconstructed on first access.
+
+        Args:
+            tabla: Dict mapping token to (class, weight)
+
+        Returns:
+            LexiconCompilado instance
+        """
+        return cls(None, tabla)
+
+    @property
+    def fuente(self) -> Dict:
+        """Lexicon dict equivalent to the compiled table."""
+        if self._fuente is None:
+            fuente = {'positivos': {}, 'negativos': {}, 'negadores': [], 'intensificadores': {}, 'atenuadores': {}}
+            for token, (clase, peso) in self.tabla.items():
+                if clase == NEGADOR:
+                    fuente['negadores'].append(token)
+                else:
+                    fuente[_CLAVES_CLASE[clase]][token] = peso
+            self._fuente = fuente
+        return self._fuente
+
+    def arrays_lote(self) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+        """Return token-id vocabulary and per-id weight arrays for batch scoring.
+
+        Id 0 is reserved for tokens outside the lexicon. Modifier ids carry
+        their weight in the factor array; polar ids carry it in the polarity
+        array. Built on first use and then shared.
+
+        Returns:
+            Tuple of (vocabulary, factors, polarity)
+        """
+        if self._lote is None:
+            vocabulario = {}
+            factores = np.ones(len(self.tabla) + 1, dtype=np.float64)
+            polaridad = np.zeros(len(self.tabla) + 1, dtype=np.float64)
+
+            for token_id, (token, (clase, peso)) in enumerate(self.tabla.items(), start=1):
+                vocabulario[token] = token_id
+                if clase >= POSITIVO:
+                    polaridad[token_id] = peso
+                else:
+                    factores[token_id] = peso
+
+            self._lote = (vocabulario, factores, polaridad)
+        return self._lote
+
+
+def compilar_binario(ruta_json: str, ruta_salida: Optional[str] = None) -> str:
+    """Compile a lexicon JSON file into the binary memory-mappable format.
+
+    Layout (little-endian): header (magic, token count, entry count, string
+    blob size, reserved), float64 entry weights, uint32 string offsets
+    (token count + 1), uint32 entry index per token, uint8 entry classes, and
+    the UTF-8 string blob with tokens sorted by their encoded bytes and
+    separated by NUL. Entries are the distinct (class, weight) pairs.
+
+    Args:
+        ruta_json: Path to lexicon JSON file
+        ruta_salida: Output path. If None, uses ruta_json with a .bin suffix.
+
+    Returns:
+        Path of the written binary file
+    """
+    with open(ruta_json, 'r', encoding='utf-8') as f:
+        tabla = compilar_lexico(json.load(f))
+
+    if ruta_salida is None:
+        ruta_salida = str(Path(ruta_json).with_suffix('.bin'))
+
+    entradas = {}
+    codificados = sorted(
+        (token.encode('utf-8'), entradas.setdefault((clase, float(peso)), len(entradas)))
+        for token, (clase, peso) in tabla.items()
+    )
+    blob = b'\x00'.join(token for token, _ in codificados)
+
+    offsets = np.zeros(len(codificados) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(token) + 1 for token, _ in codificados])
+
+    # Write a sibling file and rename it over the output, so processes that
+    # have the old binary mapped keep reading it instead of a truncated file.
+    fd, temporal = tempfile.mkstemp(dir=Path(ruta_salida).parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_CABECERA.pack(MAGIA_BINARIO, len(codificados), len(entradas), len(blob), 0))
+            f.write(np.array([peso for _, peso in entradas], dtype='<f8').tobytes())
+            f.write(offsets.tobytes())
+            f.write(np.array([entrada for _, entrada in codificados], dtype='<u4').tobytes())
+            f.write(np.array([clase for clase, _ in entradas], dtype='u1').tobytes())
+            f.write(blob)
+        os.replace(temporal, ruta_salida)
+    except BaseException:
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
+        raise
+
+    return ruta_salida
+
+
+class LexiconBinario:
+    """Read-only view of a binary lexicon file.
+
+    Given a path, the file is memory-mapped and arrays are zero-copy views
+    over the mapping, so single lookups (binary search over the sorted string
+    table) need not load the whole file. Given bytes, the same views are built
+    over them. Analyzers do not keep a view: the registry decodes the file
+    once into a dict with a_tabla(), which scores much faster per token.
+    """
+
+    def __init__(self, ruta: Union[str, bytes]):
+        """Map binary lexicon file.
+
+        Args:
+            ruta: Path to binary lexicon file, or its contents as bytes
+
+        Raises:
+            ValueError: If the data is not a binary lexicon
+        """
+        if isinstance(ruta, bytes):
+            self._mmap = ruta
+            ruta = '<bytes>'
+        else:
+            with open(ruta, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _CABECERA.size or self._mmap[:len(MAGIA_BINARIO)] != MAGIA_BINARIO:
+            raise ValueError(f"Not a binary lexicon: {ruta}")
+        _, n, m, tamano_blob, _ = _CABECERA.unpack_from(self._mmap, 0)
+
+        pos = _CABECERA.size
+        self.pesos = np.frombuffer(self._mmap, dtype='<f8', count=m, offset=pos)
+        pos += 8 * m
+        self.offsets = np.frombuffer(self._mmap, dtype='<u4', count=n + 1, offset=pos)
+        pos += 4 * (n + 1)
+        self.entradas = np.frombuffer(self._mmap, dtype='<u4', count=n, offset=pos)
+        pos += 4 * n
+        self.clases = np.frombuffer(self._mmap, dtype='u1', count=m, offset=pos)
+        pos += m
+        self._inicio_blob = pos
+        self._tamano_blob = tamano_blob
+        self._n = n
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _token(self, i: int) -> bytes:
+        """Return encoded token i."""
+        inicio = self._inicio_blob + int(self.offsets[i])
+        fin = self._inicio_blob + int(self.offsets[i + 1]) - 1
+        return self._mmap[inicio:fin]
+
+    def _entrada(self, e: int) -> Tuple[int, float]:
+        """Return (class, weight) for entry e."""
+        return int(self.clases[e]), float(self.pesos[e])
+
+    def get(self, token: str, default: Optional[Tuple[int, float]] = None) -> Optional[Tuple[int, float]]:
+        """Look up a token by binary search.
+
+        Args:
+            token: Token to look up
+            default: Value returned if absent
+
+        Returns:
+            (class, weight) tuple or default
+        """
+        clave = token.encode('utf-8')
+        bajo, alto = 0, self._n
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            actual = self._token(medio)
+            if actual < clave:
+                bajo = medio + 1
+            elif actual > clave:
+                alto = medio
+            else:
+                return self._entrada(int(self.entradas[medio]))
+        return default
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def a_tabla(self) -> Dict[str, Tuple[int, float]]:
+        """Materialize the token -> (class, weight) hash table.
+
+        Each distinct (class, weight) tuple is built once and shared by every
+        token that uses it.
+
+        Returns:
+            Dict mapping token to (class, weight)
+        """
+        if self._n == 0:
+            return {}
+        blob = self._mmap[self._inicio_blob:self._inicio_blob + self._tamano_blob]
+        tokens = blob.decode('utf-8').split('\x00')
+        entradas = [self._entrada(e) for e in range(len(self.clases))]
+        return dict(zip(tokens, map(entradas.__getitem__, self.entradas.tolist())))
+
+
+def ruta_binaria(ruta_json: str) -> Optional[str]:
+    """Return the compiled binary next to a lexicon JSON if it is usable.
+
+    The binary is used when it exists and is not older than the JSON (or the
+    JSON is missing).
+
+    Args:
+        ruta_json: Path to lexicon JSON file
+
+    Returns:
+        Path to binary lexicon, or None to fall back to JSON
+    """
+    ruta = Path(ruta_json)
+    if ruta.suffix == '.bin':
+        return str(ruta)
+
+    binario = ruta.with_suffix('.bin')
+    if not binario.exists():
+        return None
+    if ruta.exists() and binario.stat().st_mtime_ns < ruta.stat().st_mtime_ns:
+        return None
+    return str(binario)
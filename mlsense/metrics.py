@@ -0,0 +1,143 @@
+"""Per-rule firing counters and timing for ProductExpert."""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+
+class MetricasReglas:
+    """Counters for one compiled rule set.
+
+    For each rule: how many products it was evaluated on, how often it fired,
+    how often it won, and the cumulative evaluation time. Rules that never
+    fire are dead; rules that fire for most products are overly broad.
+    """
+
+    def __init__(self, razones: Sequence[str], categoria: str = ''):
+        """Initialize zeroed counters.
+
+        Args:
+            razones: Reason of each rule, in rule order (used as labels)
+            categoria: Category identifier added to exported labels
+        """
+        self.razones = list(razones)
+        self.categoria = categoria
+        self._lock = threading.Lock()
+        self._reiniciar()
+
+    def reset(self):
+        """Zero every counter."""
+        with self._lock:
+            self._reiniciar()
+
+    def _reiniciar(self):
+        """Zero every counter (caller holds the lock or owns the object)."""
+        num_reglas = len(self.razones)
+        self.inferencias = 0
+        self.por_defecto = 0
+        self.evaluaciones = [0] * num_reglas
+        self.disparos = [0] * num_reglas
+        self.ganadas = [0] * num_reglas
+        self.tiempo = [0.0] * num_reglas
+
+    def registrar(self, ganadas: Sequence[int], por_defecto: int, evaluaciones: Sequence[int],
+                  disparos: Sequence[int], tiempo: Sequence[float]):
+        """Fold in the counts of one or more inferences.
+
+        Args:
+            ganadas: Wins per rule
+            por_defecto: Inferences resolved by the default rule
+            evaluaciones: Evaluations per rule
+            disparos: Times each rule fired
+            tiempo: Evaluation seconds per rule
+        """
+        with self._lock:
+            self.inferencias += int(sum(ganadas)) + por_defecto
+            self.por_defecto += por_defecto
+            for i in range(len(self.razones)):
+                self.ganadas[i] += int(ganadas[i])
+                self.evaluaciones[i] += evaluaciones[i]
+                self.disparos[i] += disparos[i]
+                self.tiempo[i] += tiempo[i]
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """Return a copy of the counters, optionally zeroing them atomically.
+
+        Args:
+            reset: Zero the counters after copying them
+
+        Returns:
+            Same structure as a_dict
+        """
+        with self._lock:
+            datos = self.a_dict()
+            if reset:
+                self._reiniciar()
+        return datos
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Return the counters as a plain dict.
+
+        Returns:
+            Dict with 'categoria', 'inferencias', 'por_defecto' and 'reglas', a
+            list with 'indice', 'razon', 'evaluaciones', 'disparos', 'ganadas',
+            'tasa_disparo' and 'tiempo_s' per rule
+        """
+        return {
+            'categoria': self.categoria,
+            'inferencias': self.inferencias,
+            'por_defecto': self.por_defecto,
+            'reglas': [
+                {
+                    'indice': i,
+                    'razon': razon,
+                    'evaluaciones': self.evaluaciones[i],
+                    'disparos': self.disparos[i],
+                    'ganadas': self.ganadas[i],
+                    'tasa_disparo': self.disparos[i] / self.evaluaciones[i] if self.evaluaciones[i] else 0.0,
+                    'tiempo_s': self.tiempo[i],
+                }
+                for i, razon in enumerate(self.razones)
+            ],
+        }
+
+    def reglas_muertas(self) -> List[int]:
+        """Return indexes of evaluated rules that never fired."""
+        return [i for i, (e, d) in enumerate(zip(self.evaluaciones, self.disparos)) if e and not d]
+
+    def a_prometheus(self, prefijo: str = 'mlsense_regla') -> str:
+        """Export the counters in Prometheus text exposition format.
+
+        Args:
+            prefijo: Metric name prefix
+
+        Returns:
+            Exposition text, one sample per rule and metric
+        """
+        datos = self.snapshot()
+        categoria = _escapar(self.categoria)
+        lineas = [
+            f'# HELP {prefijo}_inferencias_total Inferences run.',
+            f'# TYPE {prefijo}_inferencias_total counter',
+            f'{prefijo}_inferencias_total{{categoria="{categoria}"}} {datos["inferencias"]}',
+            f'# HELP {prefijo}_por_defecto_total Inferences resolved by the default rule.',
+            f'# TYPE {prefijo}_por_defecto_total counter',
+            f'{prefijo}_por_defecto_total{{categoria="{categoria}"}} {datos["por_defecto"]}',
+        ]
+        series = (
+            ('evaluaciones_total', 'evaluaciones', 'Products each rule was evaluated on.'),
+            ('disparos_total', 'disparos', 'Times each rule fired.'),
+            ('ganadas_total', 'ganadas', 'Times each rule decided the recommendation.'),
+            ('tiempo_segundos_total', 'tiempo_s', 'Cumulative rule evaluation time.'),
+        )
+        for nombre, clave, ayuda in series:
+            lineas.append(f'# HELP {prefijo}_{nombre} {ayuda}')
+            lineas.append(f'# TYPE {prefijo}_{nombre} counter')
+            for regla in datos['reglas']:
+                etiquetas = f'categoria="{categoria}",regla="{regla["indice"]}",razon="{_escapar(regla["razon"])}"'
+                lineas.append(f'{prefijo}_{nombre}{{{etiquetas}}} {regla[clave]}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _escapar(valor: Optional[str]) -> str:
+    """Escape a Prometheus label value."""
+    return str(valor or '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
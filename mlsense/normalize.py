@@ -0,0 +1,90 @@
+"""Shared text normalization for sentiment analysis and search URLs."""
+
+import re
+import unicodedata
+from typing import Dict
+
+_RE_REPETICIONES = re.compile(r'([a-z])\1{2,}')
+_RE_NO_ALFA = re.compile(r'[^a-z\s]')
+_RE_NO_ALFANUM = re.compile(r'[^a-z0-9\s]')
+_RE_ESPACIOS = re.compile(r'\s+')
+
+_RANGOS_LATINOS = (
+    (0x00C0, 0x0250),  # Latin-1 Supplement letters, Latin Extended-A and B
+    (0x1E00, 0x1F00),  # Latin Extended Additional
+)
+
+
+def _quitar_diacriticos_nfd(texto: str) -> str:
+    """Strip nonspacing marks after canonical decomposition (reference path)."""
+    texto = unicodedata.normalize('NFD', texto)
+    return ''.join(c for c in texto if unicodedata.category(c) != 'Mn')
+
+
+def _construir_tabla_diacriticos() -> Dict[int, str]:
+    """Precompute the str.translate mapping for accented Latin letters.
+
+    Only characters whose stripped decomposition contains no combining
+    characters are mapped, so translating is equivalent to the NFD path.
+    """
+    tabla = {}
+    for inicio, fin in _RANGOS_LATINOS:
+        for codigo in range(inicio, fin):
+            caracter = chr(codigo)
+            base = _quitar_diacriticos_nfd(caracter)
+            if base != caracter and not any(unicodedata.combining(c) for c in base):
+                tabla[codigo] = base
+    return tabla
+
+
+_TABLA_DIACRITICOS = _construir_tabla_diacriticos()
+
+
+def quitar_diacriticos(texto: str) -> str:
+    """Remove diacritics, matching NFD decomposition plus Mn stripping.
+
+    ASCII input is returned as is; accented Latin letters are resolved with a
+    precomputed translate table, and only text still containing other
+    non-ASCII characters goes through unicodedata.
+
+    Args:
+        texto: Text to strip
+
+    Returns:
+        Text without nonspacing marks
+    """
+    if texto.isascii():
+        return texto
+    texto = texto.translate(_TABLA_DIACRITICOS)
+    if texto.isascii():
+        return texto
+    return _quitar_diacriticos_nfd(texto)
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normalize text for sentiment analysis.
+
+    Args:
+        texto: Text to normalize
+
+    Returns:
+        Normalized text (lowercase, no diacritics, collapsed repetitions)
+    """
+    texto = quitar_diacriticos(texto.lower())
+    texto = _RE_REPETICIONES.sub(r'\1', texto)
+    texto = _RE_NO_ALFA.sub('', texto)
+    return texto.strip()
+
+
+def slug_busqueda(termino: str) -> str:
+    """Turn a search term into a MercadoLibre listing slug.
+
+    Args:
+        termino: Search term (e.g. "Celular Samsung A56")
+
+    Returns:
+        Lowercase, diacritic-free, hyphen-separated slug
+    """
+    termino = quitar_diacriticos(termino.strip().lower())
+    termino = _RE_NO_ALFANUM.sub('', termino)
+    return _RE_ESPACIOS.sub('-', termino).strip('-')
@@ -0,0 +1,183 @@
+"""Content-addressed cache of parse_mercadolibre_html results."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .cache import LRUCache
+from .parsers import PARSER_VERSION, parse_mercadolibre_html
+from .product import Product
+
+
+class CacheParseo:
+    """Cache of parsed pages keyed by a hash of the HTML bytes.
+
+    Keys are a BLAKE2b digest of the document plus PARSER_VERSION, so the
+    same page re-uploaded, re-run or replayed from an archive is parsed once,
+    and results from an older parser are never served. Entries are stored as
+    compact JSON in an in-memory LRU tier and, optionally, as one file per
+    page in a directory that survives restarts. Every hit decodes a fresh
+    copy, so callers may mutate the returned products.
+    """
+
+    def __init__(self, max_size: int = 256, directorio: Optional[Union[str, Path]] = None):
+        """Initialize cache.
+
+        Args:
+            max_size: Maximum pages kept in memory
+            directorio: Directory for the on-disk tier (created if missing), or
+                None to keep results in memory only
+        """
+        self._memoria = LRUCache(max_size)
+        self.directorio = Path(directorio) if directorio is not None else None
+        if self.directorio is not None:
+            self.directorio.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def clave(html: Union[str, bytes]) -> str:
+        """Return the cache key of a document.
+
+        Args:
+            html: Page as bytes or text (text is hashed as UTF-8)
+
+        Returns:
+            Parser version and hex digest, e.g. '1-3f9a...'
+        """
+        if isinstance(html, str):
+            html = html.encode('utf-8', errors='surrogatepass')
+        return f"{PARSER_VERSION}-{hashlib.blake2b(html, digest_size=16).hexdigest()}"
+
+    def parse(self, html: Union[str, bytes]) -> Tuple[List[Product], List[str]]:
+        """Return parse_mercadolibre_html's result, parsing only on a miss.
+
+        Args:
+            html: Page as bytes (decoded as UTF-8 on a miss) or text
+
+        Returns:
+            Tuple of (products_list, warnings_list)
+        """
+        resultado = self.get(html)
+        if resultado is not None:
+            return resultado
+
+        texto = html.decode('utf-8', errors='replace') if isinstance(html, bytes) else html
+        productos, warnings = parse_mercadolibre_html(texto)
+        self.put(html, productos, warnings)
+        return productos, warnings
+
+    def get(self, html: Union[str, bytes]) -> Optional[Tuple[List[Product], List[str]]]:
+        """Return the cached result of a document without parsing it.
+
+        Args:
+            html: Page as bytes or text
+
+        Returns:
+            Tuple of (products_list, warnings_list), or None on a miss
+        """
+        clave = self.clave(html)
+
+        datos = self._memoria.get(clave)
+        if datos is None:
+            datos = self._leer_disco(clave)
+            if datos is None:
+                return None
+            with self._lock:
+                self.disk_hits += 1
+            self._memoria.put(clave, datos)
+
+        productos, warnings = json.loads(datos)
+        return [Product.from_dict(producto) for producto in productos], warnings
+
+    def put(self, html: Union[str, bytes], productos: List[Product], warnings: List[str]):
+        """Store the result of a document parsed elsewhere (e.g. by parse_many).
+
+        Args:
+            html: Page as bytes or text
+            productos: Parsed products
+            warnings: Parse warnings
+        """
+        clave = self.clave(html)
+        datos = json.dumps([[dict(producto) for producto in productos], warnings],
+                           ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            self.misses += 1
+        self._memoria.put(clave, datos)
+        self._escribir_disco(clave, datos)
+
+    def _ruta(self, clave: str) -> Path:
+        """Return the on-disk file of a key."""
+        return self.directorio / f"{clave}.json"
+
+    def _leer_disco(self, clave: str) -> Optional[str]:
+        """Return the stored JSON of a key, or None if absent or unreadable."""
+        if self.directorio is None:
+            return None
+        try:
+            datos = self._ruta(clave).read_text(encoding='utf-8')
+            json.loads(datos)
+        except (OSError, ValueError):
+            return None
+        return datos
+
+    def _escribir_disco(self, clave: str, datos: str):
+        """Store an entry atomically, so readers never see a partial file."""
+        if self.directorio is None:
+            return
+        try:
+            fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(datos)
+            os.replace(temporal, self._ruta(clave))
+        except OSError:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+
+    def clear(self, disco: bool = False):
+        """Drop the in-memory tier and reset counters.
+
+        Args:
+            disco: Also delete the on-disk entries
+        """
+        self._memoria.clear()
+        with self._lock:
+            self.disk_hits = 0
+            self.misses = 0
+        if disco and self.directorio is not None:
+            for ruta in self.directorio.glob('*.json'):
+                try:
+                    ruta.unlink()
+                except OSError:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        """Return usage counters.
+
+        Returns:
+            Dict with 'hits' (memory), 'disk_hits', 'misses' (pages stored),
+            'evictions', 'size' and 'max_size' of the memory tier
+        """
+        memoria = self._memoria.stats()
+        with self._lock:
+            return {
+                'hits': memoria['hits'],
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': memoria['evictions'],
+                'size': memoria['size'],
+                'max_size': memoria['max_size'],
+            }
+
+
+CACHE_PARSEO = CacheParseo()
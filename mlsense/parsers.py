@@ -1,12 +1,314 @@
 """HTML parsers for MercadoLibre product data extraction."""
 
+import codecs
 import json
+import os
 import re
-from typing import List, Dict, Any, Tuple
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
 from html.parser import HTMLParser
 
+from .dedup import deduplicar_productos
+from .product import Product, _a_float
+
+# Bump when extraction output changes, so cached parse results are not reused.
+PARSER_VERSION = 2
+
+# Opening tags of the blocks each strategy needs. Patterns start with a
+# case-invariant literal, so the engine skips ahead to candidates instead of
+# trying a case-insensitive match at every offset. The JSON-LD tag is found
+# by its '+json">' tail and its fixed-width head is checked afterwards.
+_RE_COLA_JSON_LD = re.compile(r'\+(?i:json">)')
+_RE_CABEZA_JSON_LD = re.compile(r'<(?i:script type="application/ld)')
+_LARGO_CABEZA_JSON_LD = len('<script type="application/ld')
+_RE_APERTURA_ITEM = re.compile(r'<(?i:li[^>]*class="[^"]*ui-search-result[^"]*"[^>]*>)', re.DOTALL)
+_RE_CIERRE_SCRIPT = re.compile(r'</script>', re.IGNORECASE)
+_RE_CIERRE_ITEM = re.compile(r'</li>', re.IGNORECASE)
+_MARCA_ESTADO = 'window.__PRELOADED_STATE__'
+_RE_ASIGNACION_ESTADO = re.compile(r'window\.__PRELOADED_STATE__\s*=\s*')
+_DECODIFICADOR_JSON = json.JSONDecoder()
+
+Ruta = Tuple[Union[str, int], ...]
+Documento = Union[str, os.PathLike, Tuple[Any, Union[str, bytes]]]
+
+# Where search pages keep their listings; checked before walking the whole state.
+RUTAS_RESULTADOS: List[Ruta] = [
+    ('initialState', 'results'),
+    ('pageState', 'initialState', 'results'),
+]
+_MAX_RUTAS_APRENDIDAS = 8
+_TAMANO_BLOQUE = 1 << 16
+_LARGO_COLA = 32
+
+
+def _bloques(html_content: str, apertura: Callable[[str, int], Optional[int]],
+             cierre: 're.Pattern') -> List[str]:
+    """Return the body of each non-overlapping opening/closing tag pair.
+
+    Blocks are found as re.findall would with a lazy body: a block ends at
+    the first closing tag after its opening, and the next search starts
+    after that closing tag.
 
-def parse_mercadolibre_html(html_content: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    Args:
+        html_content: HTML string
+        apertura: Returns the end of the first opening tag at or after an
+            offset, or None
+        cierre: Closing tag pattern
+
+    Returns:
+        Block bodies in document order
+    """
+    cuerpos = []
+    posicion = 0
+    while True:
+        inicio = apertura(html_content, posicion)
+        if inicio is None:
+            return cuerpos
+        cierra = cierre.search(html_content, inicio)
+        if cierra is None:
+            return cuerpos
+        cuerpos.append(html_content[inicio:cierra.start()])
+        posicion = cierra.end()
+
+
+def _apertura_json_ld(html_content: str, posicion: int) -> Optional[int]:
+    """Return the end of the first JSON-LD <script> tag starting at or after posicion."""
+    for cola in _RE_COLA_JSON_LD.finditer(html_content, posicion + _LARGO_CABEZA_JSON_LD):
+        if _RE_CABEZA_JSON_LD.match(html_content, cola.start() - _LARGO_CABEZA_JSON_LD):
+            return cola.end()
+    return None
+
+
+def _apertura_item(html_content: str, posicion: int) -> Optional[int]:
+    """Return the end of the first result <li> tag starting at or after posicion."""
+    abre = _RE_APERTURA_ITEM.search(html_content, posicion)
+    return abre.end() if abre is not None else None
+
+
+def _inicios_estado(texto: str) -> List[int]:
+    """Return the offset of the object assigned at each __PRELOADED_STATE__ marker.
+
+    Args:
+        texto: Text to search (a page or a script body)
+
+    Returns:
+        Offsets of the opening braces
+    """
+    inicios = []
+    posicion = texto.find(_MARCA_ESTADO)
+    while posicion >= 0:
+        asignacion = _RE_ASIGNACION_ESTADO.match(texto, posicion)
+        if asignacion is not None and texto.startswith('{', asignacion.end()):
+            inicios.append(asignacion.end())
+        posicion = texto.find(_MARCA_ESTADO, posicion + 1)
+    return inicios
+
+
+class IncrementalParser(HTMLParser):
+    """Chunk-fed parser that emits products as their blocks complete.
+
+    Bytes can be fed as they arrive from a socket or file. Each JSON-LD
+    script and each result <li> is extracted as soon as its closing tag is
+    seen, so the caller can stop reading once it has what it needs (on
+    product pages the JSON-LD is usually near the top). Scripts holding
+    __PRELOADED_STATE__ are kept and only decoded by result(), which applies
+    the same strategy order as parse_mercadolibre_html.
+    """
+
+    def __init__(self, encoding: str = 'utf-8'):
+        """Initialize parser.
+
+        Args:
+            encoding: Encoding of the fed bytes; invalid sequences are replaced
+        """
+        super().__init__(convert_charrefs=False)
+        self._decodificador = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.bytes_leidos = 0
+        self.productos_json_ld: List[Product] = []
+        self.productos_items: List[Product] = []
+        self._scripts_estado: List[str] = []
+        self._items_vistos = 0
+        self._nuevos: List[Product] = []
+        self._script: Optional[str] = None
+        self._json_ld: List[str] = []
+        self._item: Optional[List[str]] = None
+        self._pendiente: List[str] = []
+        self._cola = ''
+
+    def feed_bytes(self, bloque: bytes) -> List[Product]:
+        """Feed a chunk of raw bytes.
+
+        Multi-byte characters split across chunks are decoded once complete.
+
+        Args:
+            bloque: Next chunk of the document
+
+        Returns:
+            Products whose JSON-LD block or result item completed in this chunk
+        """
+        self.bytes_leidos += len(bloque)
+        return self.feed(self._decodificador.decode(bloque))
+
+    def feed(self, data: str) -> List[Product]:
+        """Feed a chunk of decoded text.
+
+        Args:
+            data: Next chunk of the document
+
+        Returns:
+            Products whose JSON-LD block or result item completed in this chunk
+        """
+        # HTMLParser re-searches the whole buffered body of a <script> or
+        # <style> on every feed until its end tag shows up; hold chunks that
+        # cannot contain it so multi-MB bodies are not rescanned per chunk.
+        # cdata_elem and interesting are HTMLParser internals: if a Python
+        # version lacks them, every chunk is fed straight through.
+        cdata_elem = getattr(self, 'cdata_elem', None)
+        interesting = getattr(self, 'interesting', None)
+        if (cdata_elem is not None and hasattr(interesting, 'search')
+                and interesting.search(self._cola + data) is None):
+            self._pendiente.append(data)
+            self._cola = (self._cola + data)[-_LARGO_COLA:]
+            return []
+
+        self._pendiente.append(data)
+        data = ''.join(self._pendiente)
+        self._pendiente = []
+        self._cola = data[-_LARGO_COLA:]
+        super().feed(data)
+        nuevos, self._nuevos = self._nuevos, []
+        return nuevos
+
+    def close(self) -> List[Product]:
+        """Flush the decoder and any buffered text.
+
+        Unterminated JSON-LD scripts and result items are dropped.
+
+        Returns:
+            Products completed by the remaining input
+        """
+        nuevos = self.feed(self._decodificador.decode(b'', final=True))
+        if self._pendiente:
+            super().feed(''.join(self._pendiente))
+            self._pendiente = []
+        super().close()
+        nuevos.extend(self._nuevos)
+        self._nuevos = []
+        return nuevos
+
+    def result(self) -> Tuple[List[Product], List[str]]:
+        """Return the products of everything fed so far.
+
+        Strategies are applied in parse_mercadolibre_html's order: JSON-LD,
+        then __PRELOADED_STATE__, then result items.
+
+        Returns:
+            Tuple of (products_list, warnings_list)
+        """
+        if self.productos_json_ld:
+            return list(self.productos_json_ld), []
+
+        for script in self._scripts_estado:
+            productos, success = _extraer_preloaded_state(script)
+            if success and productos:
+                return productos, []
+
+        return list(self.productos_items), _avisos_dom(self._items_vistos, self.productos_items)
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if self._item is not None:
+            self._item.append(self.get_starttag_text())
+        if tag == 'script':
+            tipo = (dict(attrs).get('type') or '').lower()
+            self._script = 'json_ld' if tipo == 'application/ld+json' else 'otro'
+            self._json_ld = []
+        elif tag == 'li' and self._item is None and 'ui-search-result' in (dict(attrs).get('class') or ''):
+            self._item = []
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        if self._item is not None:
+            self._item.append(self.get_starttag_text())
+
+    def handle_endtag(self, tag: str):
+        if tag == 'script' and self._script is not None:
+            if self._script == 'json_ld':
+                try:
+                    productos = _parsear_json_ld_data(json.loads(''.join(self._json_ld)))
+                except (json.JSONDecodeError, AttributeError):
+                    productos = []
+                self.productos_json_ld.extend(productos)
+                self._nuevos.extend(productos)
+            self._script = None
+            self._json_ld = []
+
+        if self._item is None:
+            return
+        if tag != 'li':
+            self._item.append(f'</{tag}>')
+            return
+        self._items_vistos += 1
+        try:
+            producto = _extraer_producto_del_dom(''.join(self._item))
+        except Exception:
+            producto = None
+        self._item = None
+        if producto:
+            self.productos_items.append(producto)
+            self._nuevos.append(producto)
+
+    def handle_data(self, data: str):
+        if self._item is not None:
+            self._item.append(data)
+        if self._script == 'json_ld':
+            self._json_ld.append(data)
+        elif self._script == 'otro' and _MARCA_ESTADO in data:
+            self._scripts_estado.append(data)
+
+    def handle_entityref(self, name: str):
+        if self._item is not None:
+            self._item.append(f'&{name};')
+
+    def handle_charref(self, name: str):
+        if self._item is not None:
+            self._item.append(f'&#{name};')
+
+    def handle_comment(self, data: str):
+        if self._item is not None:
+            self._item.append(f'<!--{data}-->')
+
+
+def parse_stream(fuente: BinaryIO, tamano_bloque: int = _TAMANO_BLOQUE,
+                 parar_en_json_ld: bool = False) -> Tuple[List[Product], List[str], int]:
+    """Parse a binary stream (HTTP response or open file) chunk by chunk.
+
+    Args:
+        fuente: Object with a read(n) method returning bytes
+        tamano_bloque: Bytes requested per read
+        parar_en_json_ld: Stop reading as soon as a JSON-LD block has yielded
+            products. Later JSON-LD blocks are then not seen, which is fine for
+            product pages with a single Product block.
+
+    Returns:
+        Tuple of (products_list, warnings_list, bytes_read)
+    """
+    parser = IncrementalParser()
+    while True:
+        bloque = fuente.read(tamano_bloque)
+        if not bloque:
+            parser.close()
+            break
+        parser.feed_bytes(bloque)
+        if parar_en_json_ld and parser.productos_json_ld:
+            break
+
+    productos, warnings = parser.result()
+    return productos, warnings, parser.bytes_leidos
+
+
+def parse_mercadolibre_html(html_content: str,
+                            rutas: Optional[List[Ruta]] = None) -> Tuple[List[Product], List[str]]:
     """Parse MercadoLibre HTML and extract product data.
 
     Attempts multiple strategies:
@@ -14,8 +316,14 @@ def parse_mercadolibre_html(html_content: str) -> Tuple[List[Dict[str, Any]], Li
     2. __PRELOADED_STATE__ window variable
     3. Fallback DOM parsing with regex
 
+    Each strategy scans only for its own blocks, and the document is not
+    scanned again once a strategy has found products.
+
     Args:
         html_content: HTML string
+        rutas: Optional caller-owned list of learned state paths (see
+            _extraer_de_preloaded). None keeps the result a function of the
+            page alone.
 
     Returns:
         Tuple of (products_list, warnings_list)
@@ -27,7 +335,7 @@ def parse_mercadolibre_html(html_content: str) -> Tuple[List[Dict[str, Any]], Li
     if success and productos:
         return productos, warnings
 
-    productos, success = _extraer_preloaded_state(html_content)
+    productos, success = _extraer_preloaded_state(html_content, rutas=rutas)
     if success and productos:
         return productos, warnings
 
@@ -37,7 +345,130 @@ def parse_mercadolibre_html(html_content: str) -> Tuple[List[Dict[str, Any]], Li
     return productos, warnings
 
 
-def _extraer_json_ld(html_content: str) -> Tuple[List[Dict[str, Any]], bool]:
+def parse_many(documentos: Iterable[Documento], workers: int = 1,
+               en_vuelo: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Parse many documents, yielding each result as soon as it is ready.
+
+    With workers > 1, documents are parsed in a process pool and results come
+    back in completion order. At most en_vuelo documents are submitted at a
+    time, so an archive of any size is streamed rather than loaded at once.
+    A document that is malformed, or fails to read or parse, yields an
+    'error' instead of stopping the others.
+
+    Args:
+        documentos: Paths as str or os.PathLike (read inside the worker,
+            identified by str(path)) or (source id, HTML text or bytes) pairs
+        workers: Number of worker processes. 1 parses in the current process.
+        en_vuelo: Maximum documents submitted and not yet yielded. Defaults
+            to four per worker.
+
+    Returns:
+        Iterator of dicts with 'fuente' (source id), 'productos', 'warnings',
+        'segundos' (parse time) and 'error' (None on success)
+    """
+    if workers <= 1:
+        for documento in documentos:
+            tarea = _tarea_documento(documento)
+            yield _parsear_documento(*tarea) if isinstance(tarea, tuple) else tarea
+        return
+
+    en_vuelo = en_vuelo or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pendientes = {}
+        for documento in documentos:
+            tarea = _tarea_documento(documento)
+            if not isinstance(tarea, tuple):
+                yield tarea
+                continue
+            fuente, contenido = tarea
+            pendientes[executor.submit(_parsear_documento, fuente, contenido)] = fuente
+            if len(pendientes) >= en_vuelo:
+                listos, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    yield _resultado_futuro(futuro, pendientes.pop(futuro))
+        for futuro in list(pendientes):
+            yield _resultado_futuro(futuro, pendientes.pop(futuro))
+
+
+def merge_products(resultados: Iterable[Dict[str, Any]]) -> Tuple[List[Product], int, int]:
+    """Merge the products of several parse_many results.
+
+    Products are concatenated in the given order, skipping failed documents,
+    and deduplicated by id (or url) with mlsense.dedup.deduplicar_productos.
+
+    Args:
+        resultados: Result dicts from parse_many
+
+    Returns:
+        Tuple of (products, products collapsed, reviews collapsed)
+    """
+    productos = []
+    for resultado in resultados:
+        if resultado.get('error') is None:
+            productos.extend(resultado['productos'])
+    return deduplicar_productos(productos)
+
+
+def _tarea_documento(documento: Documento) -> Union[Tuple[Any, Union[str, bytes, os.PathLike]], Dict[str, Any]]:
+    """Return the (source id, content or path) task of a parse_many input.
+
+    Inputs that are neither a path nor a (source id, str or bytes) pair get
+    an error result instead, with the input itself as source id.
+    """
+    if isinstance(documento, (str, os.PathLike)):
+        return os.fspath(documento), Path(documento)
+    try:
+        fuente, contenido = documento
+        if not isinstance(contenido, (str, bytes)):
+            raise TypeError(f"document content must be str or bytes, not {type(contenido).__name__}")
+    except (TypeError, ValueError) as e:
+        return _resultado_error(documento, e)
+    return fuente, contenido
+
+
+def _parsear_documento(fuente: Any, contenido: Union[str, bytes, os.PathLike]) -> Dict[str, Any]:
+    """Read and parse one document, capturing any failure (runs in workers)."""
+    inicio = time.perf_counter()
+    try:
+        if isinstance(contenido, os.PathLike):
+            with open(contenido, 'rb') as f:
+                contenido = f.read()
+        if isinstance(contenido, bytes):
+            contenido = contenido.decode('utf-8', errors='replace')
+        productos, warnings = parse_mercadolibre_html(contenido)
+        error = None
+    except Exception as e:
+        productos, warnings = [], []
+        error = f"{type(e).__name__}: {str(e)[:100]}"
+    return {
+        'fuente': fuente,
+        'productos': productos,
+        'warnings': warnings,
+        'segundos': time.perf_counter() - inicio,
+        'error': error,
+    }
+
+
+def _resultado_futuro(futuro, fuente: Any) -> Dict[str, Any]:
+    """Return a worker's result, or an error result if the worker itself failed."""
+    try:
+        return futuro.result()
+    except Exception as e:
+        return _resultado_error(fuente, e)
+
+
+def _resultado_error(fuente: Any, e: Exception) -> Dict[str, Any]:
+    """Return the parse_many result of a document that could not be parsed."""
+    return {
+        'fuente': fuente,
+        'productos': [],
+        'warnings': [],
+        'segundos': 0.0,
+        'error': f"{type(e).__name__}: {str(e)[:100]}",
+    }
+
+
+def _extraer_json_ld(html_content: str) -> Tuple[List[Product], bool]:
     """Extract products from JSON-LD structured data.
 
     Args:
@@ -46,14 +477,11 @@ def _extraer_json_ld(html_content: str) -> Tuple[List[Dict[str, Any]], bool]:
     Returns:
         Tuple of (products_list, success_bool)
     """
-    json_ld_pattern = r'<script type="application/ld\+json">(.*?)</script>'
-    matches = re.findall(json_ld_pattern, html_content, re.DOTALL | re.IGNORECASE)
-
     productos = []
 
-    for match in matches:
+    for bloque in _bloques(html_content, _apertura_json_ld, _RE_CIERRE_SCRIPT):
         try:
-            data = json.loads(match)
+            data = json.loads(bloque)
             prods = _parsear_json_ld_data(data)
             productos.extend(prods)
         except json.JSONDecodeError:
@@ -62,7 +490,7 @@ def _extraer_json_ld(html_content: str) -> Tuple[List[Dict[str, Any]], bool]:
     return productos, bool(productos)
 
 
-def _parsear_json_ld_data(data: Dict) -> List[Dict[str, Any]]:
+def _parsear_json_ld_data(data: Dict) -> List[Product]:
     """Parse JSON-LD data structure.
 
     Args:
@@ -78,17 +506,12 @@ def _parsear_json_ld_data(data: Dict) -> List[Dict[str, Any]]:
     elif data.get('@type') == 'ItemList':
         for item in data.get('itemListElement', []):
             if 'url' in item:
-                productos.append({
-                    'nombre': item.get('name', 'Sin título'),
-                    'precio': _normalizar_precio(item.get('price', '')),
-                    'url': item['url'],
-                    'id': item.get('identifier', ''),
-                    'estrellas': '0',
-                    'calificaciones': '0',
-                    'envio': 'Desconocido',
-                    'descuento': 'Sin descuento',
-                    'comentarios': []
-                })
+                productos.append(Product(
+                    nombre=item.get('name', 'Sin título'),
+                    precio=_normalizar_precio(item.get('price', '')),
+                    url=item['url'],
+                    id=item.get('identifier', ''),
+                ))
     elif data.get('@type') == 'ItemList' or '@graph' in data:
         for item in data.get('@graph', []):
             if item.get('@type') == 'Product':
@@ -97,93 +520,174 @@ def _parsear_json_ld_data(data: Dict) -> List[Dict[str, Any]]:
     return productos
 
 
-def _extraer_producto_json_ld(item: Dict) -> Dict[str, Any]:
+def _extraer_producto_json_ld(item: Dict) -> Product:
     """Extract single product from JSON-LD Product.
 
     Args:
         item: Product JSON-LD object
 
     Returns:
-        Product dict
+        Product
     """
     agregacion = item.get('aggregateRating', {})
-    return {
-        'nombre': item.get('name', 'Sin título'),
-        'precio': _normalizar_precio(item.get('price', '0')),
-        'moneda': item.get('priceCurrency', 'ARS'),
-        'url': item.get('url', ''),
-        'id': item.get('sku', item.get('productID', '')),
-        'estrellas': str(agregacion.get('ratingValue', '0')),
-        'calificaciones': str(agregacion.get('reviewCount', '0')),
-        'envio': 'Desconocido',
-        'descuento': 'Sin descuento',
-        'vendedor': item.get('brand', {}).get('name', ''),
-        'comentarios': []
-    }
-
-
-def _extraer_preloaded_state(html_content: str) -> Tuple[List[Dict[str, Any]], bool]:
+    return Product(
+        nombre=item.get('name', 'Sin título'),
+        precio=_normalizar_precio(item.get('price', '0')),
+        moneda=item.get('priceCurrency', 'ARS'),
+        url=item.get('url', ''),
+        id=item.get('sku', item.get('productID', '')),
+        estrellas=agregacion.get('ratingValue', 0),
+        calificaciones=agregacion.get('reviewCount', 0),
+        vendedor=item.get('brand', {}).get('name', ''),
+    )
+
+
+def _extraer_preloaded_state(html_content: str, rutas: Optional[List[Ruta]] = None) -> Tuple[List[Product], bool]:
     """Extract products from __PRELOADED_STATE__ window variable.
 
+    Exactly one JSON value is decoded in place from each assignment with
+    JSONDecoder.raw_decode, so braces or '};' inside strings do not cut the
+    object short and the multi-MB state is never copied out of the page.
+
     Args:
         html_content: HTML string
+        rutas: Optional caller-owned list of learned paths, passed to _extraer_de_preloaded
 
     Returns:
         Tuple of (products_list, success_bool)
     """
-    pattern = r'window\.__PRELOADED_STATE__\s*=\s*(\{.*?\});'
-    matches = re.findall(pattern, html_content, re.DOTALL)
-
-    for match in matches:
+    fin_anterior = 0
+    for inicio in _inicios_estado(html_content):
+        if inicio < fin_anterior:
+            continue
         try:
-            data = json.loads(match)
-            productos = _extraer_de_preloaded(data)
-            if productos:
-                return productos, True
+            data, fin_anterior = _DECODIFICADOR_JSON.raw_decode(html_content, inicio)
         except json.JSONDecodeError:
             continue
+        productos = _extraer_de_preloaded(data, rutas)
+        if productos:
+            return productos, True
 
     return [], False
 
 
-def _extraer_de_preloaded(data: Dict) -> List[Dict[str, Any]]:
+def _extraer_de_preloaded(data: Dict, rutas: Optional[List[Ruta]] = None) -> List[Product]:
     """Extract products from parsed __PRELOADED_STATE__.
 
+    RUTAS_RESULTADOS are tried first; only if none of them holds listings is
+    the whole state walked. Learning is opt-in: a caller that passes its own
+    rutas list gets those paths tried next, and the list is extended with the
+    paths a full walk finds. Learned paths can shadow listings elsewhere in
+    the state, so with rutas the result also depends on earlier pages.
+
     Args:
         data: Parsed state object
+        rutas: Caller-owned list of learned paths, or None to not learn
 
     Returns:
         List of products
     """
+    for ruta in RUTAS_RESULTADOS + (rutas or []):
+        nodo = _seguir_ruta(data, ruta)
+        if isinstance(nodo, list):
+            productos = _productos_de_resultados(nodo)
+            if productos:
+                return productos
+
+    productos, encontradas = _recorrer_estado(data)
+    if rutas is not None:
+        for ruta in encontradas:
+            if ruta not in RUTAS_RESULTADOS and ruta not in rutas:
+                rutas.append(ruta)
+                del rutas[:-_MAX_RUTAS_APRENDIDAS]
+    return productos
+
+
+def _seguir_ruta(data: Any, ruta: Ruta) -> Any:
+    """Return the node at a path of dict keys and list indexes, or None."""
+    nodo = data
+    for paso in ruta:
+        if isinstance(paso, int):
+            if not isinstance(nodo, list) or not -len(nodo) <= paso < len(nodo):
+                return None
+        elif not isinstance(nodo, dict) or paso not in nodo:
+            return None
+        nodo = nodo[paso]
+    return nodo
+
+
+def _recorrer_estado(data: Any) -> Tuple[List[Product], List[Ruta]]:
+    """Walk the whole state depth-first with an explicit stack.
+
+    Visits nodes in the same order as a recursive walk, but only pushes
+    containers and does not descend into listings already taken from a
+    results list, so 'results' nested inside a listing are not counted twice.
+
+    Args:
+        data: Parsed state object
+
+    Returns:
+        Tuple of (products, paths of the results lists they came from)
+    """
     productos = []
+    encontradas = []
+    # Frames are (node, parent frame, key in parent, is a 'results' value);
+    # paths are rebuilt from parent links only when listings are found.
+    pila = [(data, None, None, False)]
+
+    while pila:
+        marco = pila.pop()
+        nodo, _, _, es_resultados = marco
+        if isinstance(nodo, dict):
+            resultados = nodo.get('results')
+            if isinstance(resultados, list):
+                encontrados = _productos_de_resultados(resultados)
+                if encontrados:
+                    productos.extend(encontrados)
+                    encontradas.append(_ruta_de(marco) + ('results',))
+            hijos = [
+                (valor, marco, clave, clave == 'results')
+                for clave, valor in nodo.items() if isinstance(valor, (dict, list))
+            ]
+        else:
+            hijos = [
+                (valor, marco, i, False) for i, valor in enumerate(nodo)
+                if isinstance(valor, list) or (isinstance(valor, dict) and not (es_resultados and 'title' in valor))
+            ]
+        hijos.reverse()
+        pila.extend(hijos)
 
-    def buscar_resultados(obj):
-        if isinstance(obj, dict):
-            if 'results' in obj and isinstance(obj['results'], list):
-                for item in obj['results']:
-                    if isinstance(item, dict) and 'title' in item:
-                        productos.append({
-                            'nombre': item.get('title', 'Sin título'),
-                            'precio': _normalizar_precio(str(item.get('price', 0))),
-                            'url': item.get('permalink', ''),
-                            'id': item.get('id', ''),
-                            'estrellas': str(item.get('reviews', {}).get('rating_average', 0)),
-                            'calificaciones': str(item.get('reviews', {}).get('total', 0)),
-                            'envio': 'Gratis' if item.get('shipping', {}).get('free_shipping') else 'Con costo',
-                            'descuento': f"{item.get('discount', 0)}%" if item.get('discount') else 'Sin descuento',
-                            'comentarios': []
-                        })
-            for value in obj.values():
-                buscar_resultados(value)
-        elif isinstance(obj, list):
-            for item in obj:
-                buscar_resultados(item)
-
-    buscar_resultados(data)
+    return productos, encontradas
+
+
+def _ruta_de(marco: Tuple) -> Ruta:
+    """Rebuild the path of a traversal frame from its parent links."""
+    pasos = []
+    while marco[1] is not None:
+        pasos.append(marco[2])
+        marco = marco[1]
+    return tuple(reversed(pasos))
+
+
+def _productos_de_resultados(resultados: List[Any]) -> List[Product]:
+    """Convert the listing entries of a results list into products."""
+    productos = []
+    for item in resultados:
+        if isinstance(item, dict) and 'title' in item:
+            productos.append(Product(
+                nombre=item.get('title', 'Sin título'),
+                precio=_normalizar_precio(str(item.get('price', 0))),
+                url=item.get('permalink', ''),
+                id=item.get('id', ''),
+                estrellas=item.get('reviews', {}).get('rating_average', 0),
+                calificaciones=item.get('reviews', {}).get('total', 0),
+                envio='Gratis' if item.get('shipping', {}).get('free_shipping') else 'Con costo',
+                descuento=f"{item.get('discount', 0)}%" if item.get('discount') else 'Sin descuento',
+            ))
     return productos
 
 
-def _extraer_dom_fallback(html_content: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+def _extraer_dom_fallback(html_content: str) -> Tuple[List[Product], List[str]]:
     """Fallback DOM parsing with regex patterns.
 
     Looks for MercadoLibre specific class patterns.
@@ -197,71 +701,64 @@ def _extraer_dom_fallback(html_content: str) -> Tuple[List[Dict[str, Any]], List
     productos = []
     warnings = []
 
-    patron_producto = r'<li[^>]*class="[^"]*ui-search-result[^"]*"[^>]*>(.*?)</li>'
-    matches = re.findall(patron_producto, html_content, re.DOTALL | re.IGNORECASE)
+    items = _bloques(html_content, _apertura_item, _RE_CIERRE_ITEM)
 
-    if not matches:
-        warnings.append("No structured data or classic DOM patterns found. HTML may be from unsupported page type.")
-        return [], warnings
+    if not items:
+        return [], _avisos_dom(0, [])
 
-    for match in matches:
+    for item in items:
         try:
-            producto = _extraer_producto_del_dom(match)
+            producto = _extraer_producto_del_dom(item)
             if producto:
                 productos.append(producto)
         except Exception as e:
             continue
 
-    if productos:
-        warnings.append(f"Extracted {len(productos)} products using fallback DOM parser. Some data may be incomplete.")
-    else:
-        warnings.append("Could not extract products from HTML. Page structure may have changed.")
-
+    warnings.extend(_avisos_dom(len(items), productos))
     return productos, warnings
 
 
-def _extraer_producto_del_dom(html_item: str) -> Dict[str, Any]:
+def _avisos_dom(num_items: int, productos: List[Product]) -> List[str]:
+    """Return the DOM fallback warnings for a number of items and their products."""
+    if not num_items:
+        return ["No structured data or classic DOM patterns found. HTML may be from unsupported page type."]
+    if productos:
+        return [f"Extracted {len(productos)} products using fallback DOM parser. Some data may be incomplete."]
+    return ["Could not extract products from HTML. Page structure may have changed."]
+
+
+def _extraer_producto_del_dom(html_item: str) -> Product:
     """Extract product from DOM item HTML.
 
     Args:
         html_item: HTML fragment
 
     Returns:
-        Product dict
+        Product
     """
-    producto = {
-        'nombre': '',
-        'precio': '0',
-        'estrellas': '0',
-        'calificaciones': '0',
-        'envio': 'Desconocido',
-        'descuento': 'Sin descuento',
-        'url': '',
-        'id': '',
-        'comentarios': []
-    }
+    producto = Product()
 
     nombre_match = re.search(r'<h2[^>]*>(.*?)</h2>', html_item, re.DOTALL | re.IGNORECASE)
     if nombre_match:
         texto = nombre_match.group(1)
         texto = re.sub(r'<[^>]*>', '', texto)
-        producto['nombre'] = texto.strip()[:200]
+        producto.nombre = texto.strip()[:200]
 
     precio_match = re.search(r'<span[^>]*class="[^"]*andes-money-amount__fraction[^"]*"[^>]*>([0-9.]+)</span>', html_item, re.IGNORECASE)
     if precio_match:
-        producto['precio'] = _normalizar_precio(precio_match.group(1))
+        producto.precio = _a_float(_normalizar_precio(precio_match.group(1)))
 
     url_match = re.search(r'href="([^"]*)"', html_item)
     if url_match:
-        producto['url'] = url_match.group(1)
+        producto.url = url_match.group(1)
 
     envio_match = re.search(r'envío gratis', html_item, re.IGNORECASE)
     if envio_match:
-        producto['envio'] = 'Gratis'
+        producto.envio = 'Gratis'
 
     stars_match = re.search(r'(\d+(?:[.,]\d)?)\s*(?:de 5|★)', html_item, re.IGNORECASE)
     if stars_match:
-        producto['estrellas'] = stars_match.group(1).replace(',', '.')
+        producto.estrellas = _a_float(stars_match.group(1).replace(',', '.'))
 
     return producto
 
@@ -0,0 +1,139 @@
+"""Compact product record produced by the parsers."""
+
+import sys
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional
+
+# Fields that hold one of a few repeated labels; their values are interned so
+# every product shares the same string objects.
+_INTERNADOS = ('envio', 'descuento', 'moneda')
+# Fields that may be absent; None means the key is missing.
+_OPCIONALES = ('moneda', 'vendedor', 'pesos_comentarios')
+
+
+def _a_float(valor: Any) -> float:
+    """Convert a parsed value to float, 0.0 if it is not numeric."""
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _a_int(valor: Any) -> int:
+    """Convert a parsed value to int, 0 if it is not numeric."""
+    try:
+        return int(float(valor))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+class Product(MutableMapping):
+    """One product, with numeric fields stored as numbers.
+
+    'precio' and 'estrellas' are floats and 'calificaciones' an int, so they
+    need no conversion downstream. 'envio', 'descuento' and 'moneda' are
+    interned. Fixed slots take well under half the memory of the equivalent
+    dict of strings.
+
+    Products also behave as mutable mappings with the keys parsers used to
+    emit (p['precio'], p.get('url'), dict(p), pd.DataFrame(productos)). The
+    optional keys 'moneda', 'vendedor' and 'pesos_comentarios' are absent
+    while unset.
+    """
+
+    __slots__ = ('nombre', 'precio', 'moneda', 'url', 'id', 'estrellas', 'calificaciones',
+                 'envio', 'descuento', 'vendedor', 'comentarios', 'pesos_comentarios')
+
+    def __init__(self, nombre: str = '', precio: Any = 0.0, url: str = '', id: str = '',
+                 estrellas: Any = 0.0, calificaciones: Any = 0, envio: str = 'Desconocido',
+                 descuento: str = 'Sin descuento', moneda: Optional[str] = None,
+                 vendedor: Optional[str] = None, comentarios: Optional[List[str]] = None,
+                 pesos_comentarios: Optional[List[int]] = None):
+        """Initialize product, converting numeric fields.
+
+        Args:
+            nombre: Title
+            precio: Price (number or numeric string; 0.0 if not numeric)
+            url: Product URL
+            id: Item identifier
+            estrellas: Rating average (number or numeric string)
+            calificaciones: Rating count (number or numeric string)
+            envio: Shipping label
+            descuento: Discount label
+            moneda: Currency code, if known
+            vendedor: Seller or brand, if known
+            comentarios: Review texts
+            pesos_comentarios: Multiplicity per review (see mlsense.dedup)
+        """
+        self.nombre = nombre
+        self.precio = _a_float(precio)
+        self.url = url
+        self.id = id
+        self.estrellas = _a_float(estrellas)
+        self.calificaciones = _a_int(calificaciones)
+        self.envio = sys.intern(str(envio))
+        self.descuento = sys.intern(str(descuento))
+        self.moneda = sys.intern(str(moneda)) if moneda is not None else None
+        self.vendedor = vendedor
+        self.comentarios = comentarios if comentarios is not None else []
+        self.pesos_comentarios = pesos_comentarios
+
+    @classmethod
+    def from_dict(cls, datos: Dict[str, Any]) -> 'Product':
+        """Build a product from a dict with the mapping keys (e.g. from to_dict).
+
+        Args:
+            datos: Product dict; unknown keys are ignored
+
+        Returns:
+            Product instance
+        """
+        return cls(**{clave: datos[clave] for clave in cls.__slots__ if clave in datos})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the product as a plain dict, as parsers used to emit it."""
+        return {clave: getattr(self, clave) for clave in self}
+
+    def copy(self) -> 'Product':
+        """Return a shallow copy."""
+        copia = Product.__new__(Product)
+        for clave in self.__slots__:
+            setattr(copia, clave, getattr(self, clave))
+        return copia
+
+    def __getitem__(self, clave: str) -> Any:
+        if clave in self.__slots__:
+            valor = getattr(self, clave)
+            if valor is not None or clave not in _OPCIONALES:
+                return valor
+        raise KeyError(clave)
+
+    def __setitem__(self, clave: str, valor: Any):
+        if clave not in self.__slots__:
+            raise KeyError(clave)
+        if clave in ('precio', 'estrellas'):
+            valor = _a_float(valor)
+        elif clave == 'calificaciones':
+            valor = _a_int(valor)
+        elif clave in _INTERNADOS and valor is not None:
+            valor = sys.intern(str(valor))
+        setattr(self, clave, valor)
+
+    def __delitem__(self, clave: str):
+        if clave not in _OPCIONALES or getattr(self, clave) is None:
+            raise KeyError(clave)
+        setattr(self, clave, None)
+
+    def __iter__(self) -> Iterator[str]:
+        for clave in self.__slots__:
+            if clave not in _OPCIONALES or getattr(self, clave) is not None:
+                yield clave
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        return (Product.from_dict, (self.to_dict(),))
+
+    def __repr__(self) -> str:
+        return f"Product({self.to_dict()!r})"
@@ -0,0 +1,153 @@
+"""Process-wide registry of parsed lexicon and category files."""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .lexicon import LexiconBinario, LexiconCompilado, ruta_binaria
+
+
+class _Entrada:
+    """Cached value with the file signature it was built from."""
+
+    __slots__ = ('firma', 'digest', 'valor')
+
+    def __init__(self, firma: Tuple[int, int], digest: Optional[str], valor: Any):
+        self.firma = firma
+        self.digest = digest
+        self.valor = valor
+
+
+class RegistroRecursos:
+    """Load each file once per process and share the parsed form.
+
+    A cached value is reused while the file's mtime and size are unchanged.
+    When they change, the file is re-read and only rebuilt if its content
+    hash differs. Values are shared across instances and threads and must be
+    treated as read-only.
+    """
+
+    def __init__(self):
+        """Initialize empty registry."""
+        self._entradas: Dict[Tuple[str, str], _Entrada] = {}
+        self._lock = threading.Lock()
+        self.cargas = 0
+
+    def obtener(self, ruta: str, tipo: str, constructor: Callable[[Any], Any],
+                por_contenido: bool = True) -> Any:
+        """Return the parsed value for a file, loading it if needed.
+
+        Args:
+            ruta: Path to the file
+            tipo: Kind of resource, so one file can be cached under several parsers
+            constructor: Builds the value from the raw file bytes, or from the
+                path when por_contenido is False
+            por_contenido: Read and hash the file. If False, the constructor
+                opens the file itself (e.g. to mmap it) and only mtime/size are checked.
+
+        Returns:
+            Shared parsed value
+        """
+        ruta = os.path.abspath(ruta)
+        clave = (ruta, tipo)
+        firma = self._firma(ruta)
+
+        entrada = self._entradas.get(clave)
+        if entrada is not None and entrada.firma == firma:
+            return entrada.valor
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada.firma == firma:
+                return entrada.valor
+
+            if por_contenido:
+                with open(ruta, 'rb') as f:
+                    datos = f.read()
+                digest = hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+                if entrada is not None and entrada.digest == digest:
+                    entrada.firma = firma
+                    return entrada.valor
+
+                valor = constructor(datos)
+            else:
+                digest = None
+                valor = constructor(ruta)
+            self._entradas[clave] = _Entrada(firma, digest, valor)
+            self.cargas += 1
+            return valor
+
+    def invalidar(self, ruta: Optional[str] = None):
+        """Drop cached values for one file, or for every file if ruta is None.
+
+        Args:
+            ruta: Path to forget, or None to clear the registry
+        """
+        with self._lock:
+            if ruta is None:
+                self._entradas.clear()
+                return
+            ruta = os.path.abspath(ruta)
+            for clave in [c for c in self._entradas if c[0] == ruta]:
+                del self._entradas[clave]
+
+    @staticmethod
+    def _firma(ruta: str) -> Tuple[int, int]:
+        """Return (mtime_ns, size) for a file."""
+        stat = os.stat(ruta)
+        return stat.st_mtime_ns, stat.st_size
+
+
+REGISTRO = RegistroRecursos()
+
+
+def cargar_lexico(ruta: str) -> LexiconCompilado:
+    """Return the shared compiled lexicon for a lexicon file.
+
+    A binary lexicon (see mlsense.lexicon.compilar_binario) next to the JSON
+    is preferred when it is up to date; its pre-compiled table is decoded
+    instead of parsing and compiling the JSON. Otherwise the JSON is loaded.
+    Either way the table is an ordinary dict private to this process.
+
+    Args:
+        ruta: Path to lexicon JSON (or .bin) file
+
+    Returns:
+        LexiconCompilado instance
+    """
+    binario = ruta_binaria(str(ruta))
+    if binario is not None:
+        return REGISTRO.obtener(binario, 'lexico_bin', _lexico_desde_binario)
+    return REGISTRO.obtener(str(ruta), 'lexico', lambda datos: LexiconCompilado(json.loads(datos)))
+
+
+def _lexico_desde_binario(datos: bytes) -> LexiconCompilado:
+    """Build a compiled lexicon from the contents of a binary lexicon file."""
+    return LexiconCompilado.desde_tabla(LexiconBinario(datos).a_tabla())
+
+
+def cargar_config(ruta: str) -> Dict:
+    """Return the parsed category configuration for a JSON file.
+
+    The file is parsed once per process; each call gets its own copy, so an
+    expert can edit its rules without affecting other instances or sessions.
+
+    Args:
+        ruta: Path to categoria JSON file
+
+    Returns:
+        Category configuration dict owned by the caller
+    """
+    return _copiar_json(REGISTRO.obtener(str(ruta), 'config', json.loads))
+
+
+def _copiar_json(valor: Any) -> Any:
+    """Return a deep copy of parsed JSON data (dicts, lists and scalars)."""
+    if isinstance(valor, dict):
+        return {clave: _copiar_json(v) for clave, v in valor.items()}
+    if isinstance(valor, list):
+        return [_copiar_json(v) for v in valor]
+    return valor
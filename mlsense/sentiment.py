@@ -1,32 +1,75 @@
 """Sentiment analysis engine with Spanish rioplatense lexicon support."""
 
-import json
-import re
-import unicodedata
+import copy
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
+
+import numpy as np
+
+from .cache import LRUCache
+from .lexicon import POSITIVO
+from .normalize import normalizar_texto
+from .registry import cargar_lexico
+
+ETIQUETAS = ('Muy negativo', 'Negativo', 'Neutro', 'Positivo', 'Muy positivo')
 
 
 class AnalizadorSentimiento:
     """Sentiment analyzer using lexicon-based approach with Spanish support."""
 
-    def __init__(self, lexicon_path: Optional[str] = None):
+    MAX_INDICES_ASPECTOS = 32
+
+    def __init__(self, lexicon_path: Optional[str] = None, cache_size: int = 0):
         """Initialize sentiment analyzer with lexicon.
 
         Args:
             lexicon_path: Path to lexicon JSON file. If None, uses default general lexicon.
+            cache_size: Max entries in the token and result LRU caches. 0 disables caching.
         """
         if lexicon_path is None:
             lexicon_path = Path(__file__).parent.parent / "lexicons" / "lexicon_general.json"
 
-        with open(lexicon_path, 'r', encoding='utf-8') as f:
-            self.lexicon = json.load(f)
+        self.lexicon_path = str(lexicon_path)
+        self.cache_size = cache_size
+
+        self.lexico = cargar_lexico(lexicon_path)
+
+        self.tabla = self.lexico.tabla
+        self.frases = self.lexico.frases
+        self._vocabulario = None
+        self._factores_id = None
+        self._polaridad_id = None
+        self._indices_aspectos = {}
+        self._ultima_config = (None, (), None)
+
+        self._cache_tokens = LRUCache(cache_size) if cache_size > 0 else None
+        self._cache_resultados = LRUCache(cache_size) if cache_size > 0 else None
+
+    @property
+    def lexicon(self) -> Dict:
+        """Lexicon dict the analyzer was built from."""
+        return self.lexico.fuente
+
+    @property
+    def positivos(self) -> Dict[str, float]:
+        return self.lexicon.get('positivos', {})
 
-        self.positivos = self.lexicon.get('positivos', {})
-        self.negativos = self.lexicon.get('negativos', {})
-        self.negadores = self.lexicon.get('negadores', [])
-        self.intensificadores = self.lexicon.get('intensificadores', {})
-        self.atenuadores = self.lexicon.get('atenuadores', {})
+    @property
+    def negativos(self) -> Dict[str, float]:
+        return self.lexicon.get('negativos', {})
+
+    @property
+    def negadores(self) -> List[str]:
+        return self.lexicon.get('negadores', [])
+
+    @property
+    def intensificadores(self) -> Dict[str, float]:
+        return self.lexicon.get('intensificadores', {})
+
+    @property
+    def atenuadores(self) -> Dict[str, float]:
+        return self.lexicon.get('atenuadores', {})
 
     def normalizar(self, texto: str) -> str:
         """Normalize text for sentiment analysis.
@@ -37,12 +80,7 @@ class AnalizadorSentimiento:
         Returns:
             Normalized text (lowercase, no diacritics, collapsed repetitions)
         """
-        texto = texto.lower()
-        texto = unicodedata.normalize('NFD', texto)
-        texto = ''.join(c for c in texto if unicodedata.category(c) != 'Mn')
-        texto = re.sub(r'([a-z])\1{2,}', r'\1', texto)
-        texto = re.sub(r'[^a-z\s]', '', texto)
-        return texto.strip()
+        return normalizar_texto(texto)
 
     def tokenizar(self, texto: str) -> List[str]:
         """Tokenize text into words.
@@ -53,8 +91,14 @@ class AnalizadorSentimiento:
         Returns:
             List of tokens
         """
-        texto = self.normalizar(texto)
-        return re.findall(r'\b\w+\b', texto)
+        if self._cache_tokens is None:
+            return self.normalizar(texto).split()
+
+        tokens = self._cache_tokens.get(texto)
+        if tokens is None:
+            tokens = tuple(self.normalizar(texto).split())
+            self._cache_tokens.put(texto, tokens)
+        return list(tokens)
 
     def detectar_aspectos(self, tokens: List[str], aspectos_keywords: Dict[str, List[str]]) -> Dict[str, float]:
         """Detect sentiment for specific aspects in comment.
@@ -66,22 +110,119 @@ class AnalizadorSentimiento:
         Returns:
             Dict with aspect scores
         """
-        aspectos_score = {}
+        return self._detectar_aspectos_entradas(tokens, None, aspectos_keywords)
+
+    def _detectar_aspectos_entradas(self, tokens: List[str], entradas: Optional[List],
+                                    aspectos_keywords: Dict[str, List[str]]) -> Dict[str, float]:
+        """Detect aspect sentiment in a single pass over the tokens.
+
+        Each keyword hit scores its ±4-token window once, from lexicon entries
+        resolved once per comment, and the score is shared by every aspect the
+        keyword belongs to.
+
+        Args:
+            tokens: Tokenized comment
+            entradas: Lexicon entries per token, or None to resolve on first hit
+            aspectos_keywords: Dict mapping aspect names to keyword lists
+
+        Returns:
+            Dict with aspect scores, in aspectos_keywords order
+        """
+        orden, indice = self._indice_aspectos(aspectos_keywords)
+        acumulados = {}
 
+        for i, token in enumerate(tokens):
+            aspectos = indice.get(token)
+            if aspectos is None:
+                continue
+
+            if entradas is None:
+                entradas = self._resolver(tokens)
+            score = self._puntuar_entradas(entradas[max(0, i - 4):i + 5])
+            score = max(-1.0, min(1.0, score / 10.0))
+
+            for aspecto in aspectos:
+                acumulados.setdefault(aspecto, []).append(score)
+
+        return {
+            aspecto: sum(acumulados[aspecto]) / len(acumulados[aspecto])
+            for aspecto in orden if aspecto in acumulados
+        }
+
+    def _indice_aspectos(self, aspectos_keywords: Dict[str, List[str]]) -> Tuple[Tuple[str, ...], Dict[str, Tuple[str, ...]]]:
+        """Return the compiled keyword -> aspects index for an aspect config.
+
+        Keywords are normalized once per distinct config; compiled indexes are
+        kept per config fingerprint.
+
+        Args:
+            aspectos_keywords: Dict mapping aspect names to keyword lists
+
+        Returns:
+            Tuple of (aspect order, dict mapping normalized keyword to aspects)
+        """
+        huella, compilado = self._huella_config(aspectos_keywords)
+        if compilado is not None:
+            return compilado
+        compilado = self._indices_aspectos.get(huella)
+        if compilado is not None:
+            self._recordar_config(aspectos_keywords, huella, compilado)
+            return compilado
+
+        indice = {}
         for aspecto, keywords in aspectos_keywords.items():
-            keywords_norm = [self.normalizar(kw) for kw in keywords]
-            scores = []
+            for kw in keywords:
+                aspectos = indice.setdefault(self.normalizar(kw), [])
+                if aspecto not in aspectos:
+                    aspectos.append(aspecto)
 
-            for i, token in enumerate(tokens):
-                if token in keywords_norm:
-                    ventana = tokens[max(0, i-4):min(len(tokens), i+5)]
-                    score = self._calcular_sentimiento_ventana(ventana)
-                    scores.append(score)
+        compilado = (tuple(aspectos_keywords), {kw: tuple(a) for kw, a in indice.items()})
+        if len(self._indices_aspectos) >= self.MAX_INDICES_ASPECTOS:
+            self._indices_aspectos.clear()
+        self._indices_aspectos[huella] = compilado
+        self._recordar_config(aspectos_keywords, huella, compilado)
+        return compilado
 
-            if scores:
-                aspectos_score[aspecto] = sum(scores) / len(scores)
+    def _huella_config(self, aspectos_keywords: Optional[Dict[str, List[str]]]) -> Tuple[Tuple, Optional[Tuple]]:
+        """Return the fingerprint of an aspect config, reusing the last one seen.
 
-        return aspectos_score
+        Callers usually pass the same config for every comment. Its items are
+        compared against a copy of the last config seen, which is much cheaper
+        than rebuilding the fingerprint and still notices in-place edits.
+
+        Args:
+            aspectos_keywords: Dict mapping aspect names to keyword lists
+
+        Returns:
+            Tuple of (fingerprint, compiled index if already known or None)
+        """
+        items, huella, compilado = self._ultima_config
+        if aspectos_keywords and list(aspectos_keywords.items()) == items:
+            return huella, compilado
+        huella = self._huella_aspectos(aspectos_keywords)
+        if aspectos_keywords:
+            self._recordar_config(aspectos_keywords, huella, self._indices_aspectos.get(huella))
+        return huella, None
+
+    def _recordar_config(self, aspectos_keywords: Dict[str, List[str]], huella: Tuple,
+                         compilado: Optional[Tuple]):
+        """Remember a config's items, fingerprint and compiled index for _huella_config."""
+        items = [(aspecto, copy.copy(keywords)) for aspecto, keywords in aspectos_keywords.items()]
+        self._ultima_config = (items, huella, compilado)
+
+    @staticmethod
+    def _huella_aspectos(aspectos_keywords: Optional[Dict[str, List[str]]]) -> Tuple:
+        """Build a hashable fingerprint of an aspect config.
+
+        Args:
+            aspectos_keywords: Dict mapping aspect names to keyword lists
+
+        Returns:
+            Tuple of (aspect, keywords) pairs
+        """
+        if not aspectos_keywords:
+            return ()
+        return tuple((aspecto, tuple(keywords)) for aspecto, keywords in aspectos_keywords.items())
 
     def _calcular_sentimiento_ventana(self, ventana: List[str]) -> float:
         """Calculate sentiment for a word window.
@@ -92,22 +233,65 @@ class AnalizadorSentimiento:
         Returns:
             Sentiment score
         """
+        score = self._puntuar(ventana)
+        return max(-1.0, min(1.0, score / 10.0))
+
+    def _resolver(self, tokens: List[str]) -> List[Optional[Tuple[int, float]]]:
+        """Resolve tokens to lexicon entries with one table lookup per token.
+
+        Multi-word expressions found by the lexicon automaton replace their
+        tokens: the entry is placed on the first token and the rest resolve to None.
+
+        Args:
+            tokens: Normalized tokens
+
+        Returns:
+            List of (class, weight) tuples or None, aligned with tokens
+        """
+        tabla = self.tabla
+        entradas = list(map(tabla.get, tokens))
+        if self.frases is not None:
+            for inicio, largo, clave in self.frases.buscar(tokens):
+                entradas[inicio:inicio + largo] = [tabla[clave]] + [None] * (largo - 1)
+        return entradas
+
+    def _puntuar(self, tokens: List[str]) -> float:
+        """Accumulate raw lexicon score over tokens.
+
+        Args:
+            tokens: Sequence of normalized tokens
+
+        Returns:
+            Unclamped sentiment score
+        """
+        return self._puntuar_entradas(self._resolver(tokens))
+
+    @staticmethod
+    def _puntuar_entradas(entradas) -> float:
+        """Accumulate raw score over resolved lexicon entries.
+
+        Modifiers (negators, intensifiers, attenuators) multiply the running
+        multiplier; polar words add their weight scaled by it.
+
+        Args:
+            entradas: Iterable of (class, weight) tuples or None for unknown tokens
+
+        Returns:
+            Unclamped sentiment score
+        """
         score = 0.0
         multiplicador = 1.0
 
-        for i, word in enumerate(ventana):
-            if word in self.negadores:
-                multiplicador *= -1
-            elif word in self.intensificadores:
-                multiplicador *= self.intensificadores[word]
-            elif word in self.atenuadores:
-                multiplicador *= self.atenuadores[word]
-            elif word in self.positivos:
-                score += self.positivos[word] * multiplicador
-            elif word in self.negativos:
-                score += self.negativos[word] * multiplicador
+        for entrada in entradas:
+            if entrada is None:
+                continue
+            clase, peso = entrada
+            if clase >= POSITIVO:
+                score += peso * multiplicador
+            else:
+                multiplicador *= peso
 
-        return max(-1.0, min(1.0, score / 10.0))
+        return score
 
     def analizar_comentario(self, comentario: str,
                            aspectos_keywords: Optional[Dict[str, List[str]]] = None) -> Dict:
@@ -120,25 +304,25 @@ class AnalizadorSentimiento:
         Returns:
             Dict with 'score' (float -1 to 1), 'etiqueta' (str), and optional 'aspectos' (dict)
         """
+        if self._cache_resultados is None:
+            return self._analizar_comentario(comentario, aspectos_keywords)
+
+        clave = (comentario, self._huella_config(aspectos_keywords)[0])
+        resultado = self._cache_resultados.get(clave)
+        if resultado is None:
+            resultado = self._analizar_comentario(comentario, aspectos_keywords)
+            self._cache_resultados.put(clave, resultado)
+        return self._copiar_resultado(resultado)
+
+    def _analizar_comentario(self, comentario: str,
+                             aspectos_keywords: Optional[Dict[str, List[str]]] = None) -> Dict:
+        """Analyze a comment without consulting the result cache."""
         tokens = self.tokenizar(comentario)
         if not tokens:
             return {'score': 0.0, 'etiqueta': 'Neutro', 'aspectos': {}}
 
-        score = 0.0
-        multiplicador = 1.0
-
-        for word in tokens:
-            if word in self.negadores:
-                multiplicador *= -1
-            elif word in self.intensificadores:
-                multiplicador *= self.intensificadores[word]
-            elif word in self.atenuadores:
-                multiplicador *= self.atenuadores[word]
-            elif word in self.positivos:
-                score += self.positivos[word] * multiplicador
-            elif word in self.negativos:
-                score += self.negativos[word] * multiplicador
-
+        entradas = self._resolver(tokens)
+        score = self._puntuar_entradas(entradas)
         score = max(-1.0, min(1.0, score / (len(tokens) * 2)))
 
         etiqueta = self._clasificar_sentimiento(score)
@@ -149,10 +333,37 @@ class AnalizadorSentimiento:
         }
 
         if aspectos_keywords:
-            resultado['aspectos'] = self.detectar_aspectos(tokens, aspectos_keywords)
+            resultado['aspectos'] = self._detectar_aspectos_entradas(tokens, entradas, aspectos_keywords)
 
         return resultado
 
+    @staticmethod
+    def _copiar_resultado(resultado: Dict) -> Dict:
+        """Copy a cached result so callers can mutate it safely."""
+        copia = dict(resultado)
+        if 'aspectos' in copia:
+            copia['aspectos'] = dict(copia['aspectos'])
+        return copia
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Return hit/miss/eviction counters of the token and result caches.
+
+        Returns:
+            Dict with 'tokens' and 'resultados' counter dicts (empty if caching is disabled)
+        """
+        if self._cache_tokens is None:
+            return {}
+        return {
+            'tokens': self._cache_tokens.stats(),
+            'resultados': self._cache_resultados.stats(),
+        }
+
+    def limpiar_cache(self):
+        """Drop cached tokens and results and reset counters."""
+        if self._cache_tokens is not None:
+            self._cache_tokens.clear()
+            self._cache_resultados.clear()
+
     def _clasificar_sentimiento(self, puntuacion: float) -> str:
         """Classify sentiment score into category.
 
@@ -174,23 +385,237 @@ class AnalizadorSentimiento:
             return "Neutro"
 
     def analizar_multiples(self, comentarios: List[str],
-                          aspectos_keywords: Optional[Dict[str, List[str]]] = None) -> Tuple[float, List[Dict]]:
+                          aspectos_keywords: Optional[Dict[str, List[str]]] = None,
+                          workers: int = 1,
+                          tamano_chunk: Optional[int] = None,
+                          pesos: Optional[List[int]] = None) -> Tuple[float, List[Dict]]:
         """Analyze multiple comments and return aggregate score.
 
         Args:
             comentarios: List of comment texts
             aspectos_keywords: Optional aspect keywords
+            workers: Number of worker processes. 1 analyzes in the current process.
+            tamano_chunk: Comments per task sent to a worker. If None, splits
+                the input into about four chunks per worker.
+            pesos: Optional multiplicity per comment, aligned with comentarios
+                (e.g. from mlsense.dedup.colapsar_duplicados). The aggregate
+                score becomes the weighted mean.
 
         Returns:
             Tuple of (aggregate_score, list_of_results)
         """
-        resultados = []
-        for comentario in comentarios:
-            if comentario.strip():
-                resultados.append(self.analizar_comentario(comentario, aspectos_keywords))
+        if pesos is not None:
+            pares = [(c, p) for c, p in zip(comentarios, pesos) if c.strip()]
+            comentarios = [c for c, _ in pares]
+            pesos = [p for _, p in pares]
+        else:
+            comentarios = [c for c in comentarios if c.strip()]
+
+        if workers > 1 and len(comentarios) > 1:
+            resultados = self._analizar_en_paralelo(comentarios, aspectos_keywords, workers, tamano_chunk)
+        else:
+            resultados = [self.analizar_comentario(c, aspectos_keywords) for c in comentarios]
 
         if not resultados:
             return 0.0, []
 
+        if pesos is not None:
+            total = sum(pesos)
+            avg_score = sum(r['score'] * p for r, p in zip(resultados, pesos)) / total if total else 0.0
+            return avg_score, resultados
+
         avg_score = sum(r['score'] for r in resultados) / len(resultados)
         return avg_score, resultados
+
+    def analizar_stream(self, comentarios: Iterable[str],
+                        aspectos_keywords: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict]:
+        """Analyze comments lazily, yielding one result at a time.
+
+        Accepts any iterable (e.g. mlsense.streaming.leer_reviews) and keeps no
+        results, so memory does not grow with input size. Blank comments are
+        skipped, as in analizar_multiples.
+
+        Args:
+            comentarios: Iterable of comment texts
+            aspectos_keywords: Optional aspect keywords
+
+        Returns:
+            Iterator of per-comment results
+        """
+        for comentario in comentarios:
+            if comentario.strip():
+                yield self.analizar_comentario(comentario, aspectos_keywords)
+
+    def _analizar_en_paralelo(self, comentarios: List[str],
+                              aspectos_keywords: Optional[Dict[str, List[str]]],
+                              workers: int,
+                              tamano_chunk: Optional[int]) -> List[Dict]:
+        """Analyze comments across a process pool, preserving input order.
+
+        Each worker builds its own analyzer once through the pool initializer,
+        so the lexicon and aspect config are not pickled per task.
+
+        Args:
+            comentarios: Non-blank comment texts
+            aspectos_keywords: Optional aspect keywords
+            workers: Number of worker processes
+            tamano_chunk: Comments per task, or None for automatic sizing
+
+        Returns:
+            List of per-comment results in input order
+        """
+        if tamano_chunk is None:
+            tamano_chunk = max(1, -(-len(comentarios) // (workers * 4)))
+
+        chunks = [comentarios[i:i + tamano_chunk] for i in range(0, len(comentarios), tamano_chunk)]
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            initializer=_inicializar_worker,
+            initargs=(self.lexicon_path, self.cache_size, aspectos_keywords),
+        ) as executor:
+            resultados = []
+            for parcial in executor.map(_analizar_chunk, chunks):
+                resultados.extend(parcial)
+
+        return resultados
+
+    def analizar_lote(self, comentarios: List[str], tamano_bloque: int = 4096) -> Dict[str, np.ndarray]:
+        """Score a batch of comments with NumPy array operations.
+
+        Comments are encoded once into token-id arrays; the multiplier chain is a
+        row-wise cumulative product and the score a row-wise sequential sum, so
+        results match analizar_comentario exactly. Unlike analizar_multiples,
+        blank comments are kept (score 0.0, Neutro) so rows align with the input.
+
+        Args:
+            comentarios: List of comment texts
+            tamano_bloque: Number of comments scored per padded matrix
+
+        Returns:
+            Dict with 'score' (float64), 'etiqueta' (int8 index into ETIQUETAS)
+            and 'num_tokens' (int64) arrays, one entry per comment
+        """
+        return self._puntuar_lote([self.tokenizar(c) for c in comentarios], tamano_bloque)
+
+    def analizar_columnar(self, comentarios: List[str],
+                          aspectos_keywords: Optional[Dict[str, List[str]]] = None,
+                          tamano_bloque: int = 4096) -> 'ResultadosColumnares':
+        """Analyze comments into a compact columnar result set.
+
+        Scores and labels come from the batch path and equal those of
+        analizar_comentario; aspect scores fill one column per aspect, NaN
+        where the aspect is not mentioned. As in analizar_lote, rows align with
+        the input and blank comments are kept.
+
+        Args:
+            comentarios: List of comment texts
+            aspectos_keywords: Optional aspect keywords (column order follows its keys)
+            tamano_bloque: Number of comments scored per padded matrix
+
+        Returns:
+            ResultadosColumnares with dict-like row access
+        """
+        from .results import ResultadosColumnares
+
+        tokens_lista = [self.tokenizar(c) for c in comentarios]
+        lote = self._puntuar_lote(tokens_lista, tamano_bloque)
+        if not aspectos_keywords:
+            return ResultadosColumnares(lote['score'], lote['etiqueta'])
+
+        nombres = list(aspectos_keywords)
+        columnas = {nombre: j for j, nombre in enumerate(nombres)}
+        aspectos = np.full((len(tokens_lista), len(nombres)), np.nan)
+        for i, tokens in enumerate(tokens_lista):
+            if not tokens:
+                continue
+            detectados = self._detectar_aspectos_entradas(tokens, self._resolver(tokens), aspectos_keywords)
+            for aspecto, score in detectados.items():
+                aspectos[i, columnas[aspecto]] = score
+        return ResultadosColumnares(lote['score'], lote['etiqueta'], aspectos, nombres)
+
+    def _puntuar_lote(self, tokens_lista: List[List[str]], tamano_bloque: int) -> Dict[str, np.ndarray]:
+        """Score already tokenized comments; see analizar_lote."""
+        if self._vocabulario is None:
+            self._preparar_lote()
+
+        codificados = [self._codificar(tokens) for tokens in tokens_lista]
+        n = len(codificados)
+        longitudes = np.fromiter((len(ids) for ids in codificados), dtype=np.int64, count=n)
+        scores = np.zeros(n, dtype=np.float64)
+
+        orden = np.argsort(longitudes, kind='stable')
+        for inicio in range(0, n, tamano_bloque):
+            indices = orden[inicio:inicio + tamano_bloque]
+            largos = longitudes[indices]
+            ancho = int(largos[-1]) if len(largos) else 0
+            if ancho == 0:
+                continue
+
+            planos = np.fromiter(
+                (tid for i in indices for tid in codificados[i]),
+                dtype=np.int64, count=int(largos.sum())
+            )
+            filas = np.repeat(np.arange(len(indices)), largos)
+            desplazamientos = np.repeat(np.cumsum(largos) - largos, largos)
+            columnas = np.arange(len(planos)) - desplazamientos
+
+            matriz = np.zeros((len(indices), ancho), dtype=np.int64)
+            matriz[filas, columnas] = planos
+
+            multiplicadores = np.multiply.accumulate(self._factores_id[matriz], axis=1)
+            aportes = self._polaridad_id[matriz] * multiplicadores
+            crudos = np.add.accumulate(aportes, axis=1)[:, -1]
+
+            con_tokens = largos > 0
+            scores[indices[con_tokens]] = crudos[con_tokens] / (largos[con_tokens] * 2)
+
+        np.clip(scores, -1.0, 1.0, out=scores)
+
+        etiquetas = np.full(n, ETIQUETAS.index('Neutro'), dtype=np.int8)
+        etiquetas[scores <= -0.1] = ETIQUETAS.index('Negativo')
+        etiquetas[scores <= -0.5] = ETIQUETAS.index('Muy negativo')
+        etiquetas[scores >= 0.1] = ETIQUETAS.index('Positivo')
+        etiquetas[scores >= 0.5] = ETIQUETAS.index('Muy positivo')
+
+        return {'score': scores, 'etiqueta': etiquetas, 'num_tokens': longitudes}
+
+    def _preparar_lote(self):
+        """Bind the shared token-id vocabulary and weight arrays for batch scoring."""
+        self._vocabulario, self._factores_id, self._polaridad_id = self.lexico.arrays_lote()
+
+    def _codificar(self, tokens: List[str]) -> List[int]:
+        """Encode tokens as vocabulary ids (0 for unknown tokens).
+
+        A matched multi-word expression is encoded as the phrase id on its
+        first token and 0 on the rest, mirroring _resolver.
+
+        Args:
+            tokens: Normalized tokens
+
+        Returns:
+            List of token ids
+        """
+        vocabulario = self._vocabulario
+        ids = [vocabulario.get(token, 0) for token in tokens]
+        if self.frases is not None:
+            for inicio, largo, clave in self.frases.buscar(tokens):
+                ids[inicio:inicio + largo] = [vocabulario[clave]] + [0] * (largo - 1)
+        return ids
+
+
+_analizador_worker = None
+_aspectos_worker = None
+
+
+def _inicializar_worker(lexicon_path: str, cache_size: int,
+                        aspectos_keywords: Optional[Dict[str, List[str]]]):
+    """Build the per-process analyzer used by _analizar_chunk."""
+    global _analizador_worker, _aspectos_worker
+    _analizador_worker = AnalizadorSentimiento(lexicon_path, cache_size=cache_size)
+    _aspectos_worker = aspectos_keywords
+
+
+def _analizar_chunk(comentarios: List[str]) -> List[Dict]:
+    """Analyze a chunk of comments inside a worker process."""
+    return [_analizador_worker.analizar_comentario(c, _aspectos_worker) for c in comentarios]
@@ -0,0 +1,171 @@
+"""What-if simulation of expert rule thresholds over stored product scores."""
+
+import copy
+import itertools
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .expert import ProductExpert, _cumplen
+
+UMBRALES = ('sentimiento_min', 'sentimiento_max', 'aspecto_min', 'aspecto_max')
+_CELDAS_POR_BLOQUE = 1 << 22
+
+
+class SimuladorReglas:
+    """Grid-search rule thresholds against a fixed set of products.
+
+    Products are given as stored (sentiment, aspects) vectors, e.g. the
+    columns of a ResultadosColumnares. Rules keep ProductExpert semantics:
+    the fired rule with the highest confidence wins and ties go to the rule
+    listed first. The winner among the rules that are not swept is computed
+    once; each grid point only re-evaluates the swept rules, as whole
+    (grid points x products) arrays.
+    """
+
+    def __init__(self, config: Dict, sentimientos: np.ndarray,
+                 aspectos: Optional[np.ndarray] = None,
+                 nombres_aspectos: Optional[Sequence[str]] = None):
+        """Initialize simulator.
+
+        Args:
+            config: Category configuration (as in categoria_*.json)
+            sentimientos: Global sentiment score per product, shape (n,)
+            aspectos: Aspect score matrix, shape (n, len(nombres_aspectos)), NaN when absent
+            nombres_aspectos: Aspect per matrix column. Defaults to the
+                configured aspects in order.
+
+        Raises:
+            ValueError: If the configuration does not pass validar_config
+        """
+        # ProductExpert compiles rules on first use, so validation runs on the raw config.
+        self.experto = ProductExpert(config)
+        valida, errores = self.experto.validar_config()
+        if not valida:
+            raise ValueError("Invalid expert config: " + "; ".join(errores))
+
+        self.sentimientos = np.asarray(sentimientos, dtype=np.float64)
+        self._columna_aspecto = self.experto._columnas_aspectos(len(self.sentimientos), aspectos, nombres_aspectos)
+
+        reglas = self.experto._reglas_compiladas
+        self.etiquetas = tuple(dict.fromkeys(
+            [regla.recomendacion for regla in reglas] + [self.experto.regla_default['recomendacion']]
+        ))
+        # Label code per rule, with the default rule's code last so index -1 selects it.
+        self._codigos = np.array(
+            [self.etiquetas.index(regla.recomendacion) for regla in reglas]
+            + [self.etiquetas.index(self.experto.regla_default['recomendacion'])],
+            dtype=np.int64
+        )
+        self.base = self._codigos[self._ganadoras(range(len(reglas)))[1]]
+
+    def _ganadoras(self, indices: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return best confidence and winning rule index (-1 if none) among some rules."""
+        n = len(self.sentimientos)
+        mejor = np.full(n, -np.inf)
+        ganadora = np.full(n, -1, dtype=np.int64)
+        for i in indices:
+            regla = self.experto._reglas_compiladas[i]
+            cumple = _cumplen(self.sentimientos, self._columna_aspecto(regla.aspecto),
+                              regla.sentimiento_min, regla.sentimiento_max,
+                              regla.aspecto_min, regla.aspecto_max)
+            supera = cumple & (regla.confianza > mejor)
+            mejor[supera] = regla.confianza
+            ganadora[supera] = i
+        return mejor, ganadora
+
+    def barrer(self, grilla: Dict[Tuple[int, str], Sequence[float]]) -> Dict[str, Any]:
+        """Evaluate every combination of candidate thresholds.
+
+        Args:
+            grilla: Maps (rule index, threshold key) to candidate values. Keys
+                are 'sentimiento_min', 'sentimiento_max', 'aspecto_min' or
+                'aspecto_max'; aspect keys need a rule with an 'aspecto'.
+
+        Returns:
+            Dict with:
+            - 'parametros': list of (rule index, key), the columns of 'valores'
+            - 'valores': (combinations, parameters) array of thresholds
+            - 'etiquetas': recommendation labels, the columns of the distributions
+            - 'distribucion': (combinations, labels) product counts per recommendation
+            - 'base': baseline counts per recommendation with the config as given
+            - 'cambios': (combinations,) products whose recommendation differs from baseline
+
+        Raises:
+            ValueError: If a rule index or threshold key is invalid
+        """
+        reglas = self.experto._reglas_compiladas
+        parametros = list(grilla)
+        for indice, clave in parametros:
+            if not 0 <= indice < len(reglas):
+                raise ValueError(f"Rule index out of range: {indice}")
+            if clave not in UMBRALES:
+                raise ValueError(f"Unknown threshold key: {clave}")
+            if clave.startswith('aspecto') and reglas[indice].aspecto is None:
+                raise ValueError(f"Rule {indice} has no 'aspecto' to apply {clave} to")
+
+        valores = np.array(list(itertools.product(*(grilla[p] for p in parametros))), dtype=np.float64)
+        valores = valores.reshape(-1, len(parametros))
+        barridas = sorted({indice for indice, _ in parametros})
+        fijas = [i for i in range(len(reglas)) if i not in set(barridas)]
+        mejor_fijo, ganadora_fija = self._ganadoras(fijas)
+
+        n = len(self.sentimientos)
+        combinaciones = len(valores)
+        distribucion = np.zeros((combinaciones, len(self.etiquetas)), dtype=np.int64)
+        cambios = np.zeros(combinaciones, dtype=np.int64)
+        bloque = max(1, _CELDAS_POR_BLOQUE // max(n, 1))
+
+        for inicio in range(0, combinaciones, bloque):
+            valores_bloque = valores[inicio:inicio + bloque]
+            mejor = np.broadcast_to(mejor_fijo, (len(valores_bloque), n)).copy()
+            ganadora = np.broadcast_to(ganadora_fija, (len(valores_bloque), n)).copy()
+
+            for i in barridas:
+                regla = reglas[i]
+                limites = {clave: getattr(regla, clave) for clave in UMBRALES}
+                for j, (indice, clave) in enumerate(parametros):
+                    if indice == i:
+                        limites[clave] = valores_bloque[:, j:j + 1]
+                cumple = _cumplen(self.sentimientos, self._columna_aspecto(regla.aspecto), **limites)
+                # Order-independent merge: higher confidence wins, then the lower rule index.
+                supera = cumple & ((regla.confianza > mejor)
+                                   | ((regla.confianza == mejor) & ((ganadora < 0) | (i < ganadora))))
+                mejor[supera] = regla.confianza
+                ganadora[supera] = i
+
+            codigos = self._codigos[ganadora]
+            for k in range(len(self.etiquetas)):
+                distribucion[inicio:inicio + len(valores_bloque), k] = (codigos == k).sum(axis=1)
+            cambios[inicio:inicio + len(valores_bloque)] = (codigos != self.base).sum(axis=1)
+
+        return {
+            'parametros': parametros,
+            'valores': valores,
+            'etiquetas': list(self.etiquetas),
+            'distribucion': distribucion,
+            'base': np.bincount(self.base, minlength=len(self.etiquetas)),
+            'cambios': cambios,
+        }
+
+    def config_para(self, parametros: List[Tuple[int, str]], valores: Sequence[float]) -> Dict:
+        """Return a copy of the config with one grid point's thresholds applied.
+
+        Args:
+            parametros: (rule index, key) pairs, as returned by barrer
+            valores: One row of barrer's 'valores'
+
+        Returns:
+            New configuration dict, validated with validar_config
+
+        Raises:
+            ValueError: If the resulting configuration is invalid
+        """
+        config = copy.deepcopy(self.experto.config)
+        for (indice, clave), valor in zip(parametros, valores):
+            config['reglas'][indice]['si'][clave] = float(valor)
+
+        valida, errores = ProductExpert(config).validar_config()
+        if not valida:
+            raise ValueError("Invalid expert config: " + "; ".join(errores))
+        return config
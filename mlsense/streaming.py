@@ -0,0 +1,84 @@
+"""Streaming analysis over JSONL/CSV review dumps in constant memory."""
+
+import csv
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .aggregate import AgregadoSentimiento
+from .sentiment import AnalizadorSentimiento
+
+FORMATOS = ('jsonl', 'csv')
+
+
+def leer_reviews(ruta: str, campo: str = 'comentario', formato: Optional[str] = None) -> Iterator[str]:
+    """Lazily read review texts from a JSONL or CSV file.
+
+    JSONL lines may be JSON objects (text read from campo) or bare JSON
+    strings. CSV files must have a header row containing campo. Records
+    without text are skipped.
+
+    Args:
+        ruta: Path to review dump
+        campo: Field / column holding the review text
+        formato: 'jsonl' or 'csv'. If None, inferred from the file suffix.
+
+    Returns:
+        Iterator of review texts
+
+    Raises:
+        ValueError: If the format is unknown, the CSV lacks the column or a
+            JSONL line is not valid JSON (the message gives its line number)
+    """
+    if formato is None:
+        sufijo = Path(ruta).suffix.lower().lstrip('.')
+        formato = 'jsonl' if sufijo == 'ndjson' else sufijo
+    if formato not in FORMATOS:
+        raise ValueError(f"Unsupported review format: {formato}")
+
+    with open(ruta, 'r', encoding='utf-8', newline='') as f:
+        if formato == 'jsonl':
+            for numero, linea in enumerate(f, 1):
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except ValueError as error:
+                    raise ValueError(f"{ruta}:{numero}: invalid JSON record: {error}") from error
+                texto = registro.get(campo) if isinstance(registro, dict) else registro
+                if isinstance(texto, str):
+                    yield texto
+        else:
+            lector = csv.DictReader(f)
+            if lector.fieldnames is None or campo not in lector.fieldnames:
+                raise ValueError(f"CSV has no '{campo}' column")
+            for fila in lector:
+                texto = fila.get(campo)
+                if texto:
+                    yield texto
+
+
+def resumir_archivo(analizador: AnalizadorSentimiento, ruta: str,
+                    aspectos_keywords: Optional[Dict[str, List[str]]] = None,
+                    campo: str = 'comentario',
+                    formato: Optional[str] = None) -> AgregadoSentimiento:
+    """Score a review dump and return only running aggregates.
+
+    Per-comment results are discarded as soon as they are aggregated, so
+    memory stays constant regardless of file size.
+
+    Args:
+        analizador: Sentiment analyzer
+        ruta: Path to JSONL or CSV review dump
+        aspectos_keywords: Optional aspect keywords
+        campo: Field / column holding the review text
+        formato: 'jsonl' or 'csv'. If None, inferred from the file suffix.
+
+    Returns:
+        AgregadoSentimiento with mean, label histogram and per-aspect means
+    """
+    agregado = AgregadoSentimiento()
+    for resultado in analizador.analizar_stream(leer_reviews(ruta, campo, formato), aspectos_keywords):
+        agregado.agregar(resultado)
+    return agregado
@@ -12,6 +12,7 @@ setup(
     install_requires=[
         'streamlit>=1.28.0',
         'pandas>=1.5.0',
+        'numpy>=1.21.0',
         'plotly>=5.0.0',
     ],
     python_requires='>=3.8',
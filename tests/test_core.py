@@ -1,13 +1,51 @@
 """Core functionality tests for MLSENSE."""
 
+import io
 import json
+import os
+import ssl
+import urllib.error
+import numpy as np
 import pytest
 from pathlib import Path
 
-from mlsense.sentiment import AnalizadorSentimiento
+from mlsense.sentiment import AnalizadorSentimiento, ETIQUETAS
+from mlsense.cache import LRUCache
+from mlsense.lexicon import (
+    compilar_lexico, compilar_binario, LexiconBinario, AutomataFrases, ruta_binaria,
+    NEGADOR, INTENSIFICADOR, POSITIVO, NEGATIVO,
+)
 from mlsense.expert import ProductExpert
-from mlsense.parsers import parse_mercadolibre_html, _normalizar_precio
+from mlsense import parse_cache, parsers
+from mlsense.parse_cache import CacheParseo
+from mlsense.product import Product
+from mlsense.parsers import parse_mercadolibre_html, parse_many, merge_products, _normalizar_precio
+from mlsense import fetcher
 from mlsense.fetcher import build_search_url
+from mlsense.aggregate import AgregadoSentimiento, AgregadorProducto
+from mlsense.streaming import leer_reviews, resumir_archivo
+from mlsense.registry import RegistroRecursos, cargar_config
+from mlsense.normalize import normalizar_texto, quitar_diacriticos, slug_busqueda
+from mlsense.dedup import colapsar_duplicados, deduplicar_productos
+from mlsense.results import ResultadosColumnares
+from mlsense.simulator import SimuladorReglas
+
+
+LEXICON_PRUEBA = {
+    'positivos': {'excelente': 5, 'bueno': 3, 'barbaro': 4, 'recomiendo': 3, 'rapido': 2},
+    'negativos': {'horrible': -5, 'malo': -3, 'berreta': -4, 'trucho': -3, 'lento': -2},
+    'negadores': ['no', 'nunca', 'jamas'],
+    'intensificadores': {'muy': 1.5, 'super': 1.8},
+    'atenuadores': {'poco': 0.5, 'algo': 0.7},
+}
+
+
+@pytest.fixture
+def lexicon_path(tmp_path):
+    """Write the test lexicon to a temporary file."""
+    ruta = tmp_path / 'lexicon_prueba.json'
+    ruta.write_text(json.dumps(LEXICON_PRUEBA), encoding='utf-8')
+    return str(ruta)
 
 
 class TestAnalizadorSentimiento:
@@ -88,6 +126,611 @@ class TestAnalizadorSentimiento:
         assert texto_norm == "excelente muy bueno"
 
 
+class TestLexiconCompilado:
+    """Tests for the compiled single-lookup lexicon table."""
+
+    def test_compilar_clases_y_pesos(self):
+        """Test every lexicon list resolves to its class and weight."""
+        tabla = compilar_lexico(LEXICON_PRUEBA)
+        assert tabla['excelente'] == (POSITIVO, 5)
+        assert tabla['horrible'] == (NEGATIVO, -5)
+        assert tabla['muy'] == (INTENSIFICADOR, 1.5)
+        assert tabla['no'] == (NEGADOR, -1)
+
+    def test_precedencia_negador(self):
+        """Test negators win over other lists like the original elif chain."""
+        tabla = compilar_lexico({'negadores': ['nada'], 'negativos': {'nada': -2}})
+        assert tabla['nada'] == (NEGADOR, -1)
+
+    def test_puntuacion_con_modificadores(self, lexicon_path):
+        """Test multiplier chain over the compiled table."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        assert analizador._puntuar(['muy', 'bueno']) == pytest.approx(4.5)
+        assert analizador._puntuar(['no', 'muy', 'bueno']) == pytest.approx(-4.5)
+        assert analizador._puntuar(['poco', 'malo', 'objeto']) == pytest.approx(-1.5)
+
+    def test_analizar_con_lexicon_propio(self, lexicon_path):
+        """Test comment scoring with a custom lexicon file."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        resultado = analizador.analizar_comentario("Excelente, muy bueno")
+        assert resultado['score'] == pytest.approx(min(1.0, 9.5 / 6))
+        assert resultado['etiqueta'] == 'Muy positivo'
+
+
+class TestAnalisisLote:
+    """Tests for vectorized batch scoring."""
+
+    COMENTARIOS = [
+        "Excelente, muy bueno",
+        "No es muy bueno",
+        "",
+        "Horrible y berreta, nunca super malo",
+        "Algo lento pero poco malo",
+        "El producto es un objeto",
+    ]
+
+    def test_lote_identico_a_comentario(self, lexicon_path):
+        """Test batch results equal per-comment results."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        lote = analizador.analizar_lote(self.COMENTARIOS, tamano_bloque=2)
+        for i, comentario in enumerate(self.COMENTARIOS):
+            individual = analizador.analizar_comentario(comentario)
+            assert lote['score'][i] == individual['score']
+            assert ETIQUETAS[lote['etiqueta'][i]] == individual['etiqueta']
+
+    def test_lote_columnar(self, lexicon_path):
+        """Test batch output is columnar and aligned with input."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        lote = analizador.analizar_lote(self.COMENTARIOS)
+        assert len(lote['score']) == len(self.COMENTARIOS)
+        assert lote['num_tokens'][2] == 0
+        assert ETIQUETAS[lote['etiqueta'][2]] == 'Neutro'
+
+    def test_lote_vacio(self, lexicon_path):
+        """Test empty batch."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        assert len(analizador.analizar_lote([])['score']) == 0
+
+
+class TestIndiceAspectos:
+    """Tests for the precompiled keyword -> aspects index."""
+
+    ASPECTOS = {
+        'envio': ['envío', 'llegó', 'entrega'],
+        'calidad': ['calidad', 'material'],
+        'general': ['calidad', 'envío'],
+    }
+
+    def test_indice_normalizado(self, lexicon_path):
+        """Test keywords are normalized and mapped to every aspect using them."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        orden, indice = analizador._indice_aspectos(self.ASPECTOS)
+        assert orden == ('envio', 'calidad', 'general')
+        assert indice['envio'] == ('envio', 'general')
+        assert indice['llego'] == ('envio',)
+
+    def test_indice_compilado_una_vez(self, lexicon_path):
+        """Test the same config reuses its compiled index."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        primero = analizador._indice_aspectos(self.ASPECTOS)
+        segundo = analizador._indice_aspectos(dict(self.ASPECTOS))
+        assert primero is segundo
+
+    def test_misma_config_no_rehashea(self, lexicon_path, monkeypatch):
+        """Test repeated calls with the same config object skip fingerprinting."""
+        analizador = AnalizadorSentimiento(lexicon_path, cache_size=16)
+        config = dict(self.ASPECTOS)
+        analizador.analizar_comentario("Llegó rápido", config)
+
+        llamadas = []
+        original = AnalizadorSentimiento._huella_aspectos
+        monkeypatch.setattr(AnalizadorSentimiento, '_huella_aspectos',
+                            staticmethod(lambda c: llamadas.append(c) or original(c)))
+        for comentario in ("Excelente calidad", "Llegó tarde", "Llegó rápido"):
+            analizador.analizar_comentario(comentario, config)
+        assert llamadas == []
+
+        otro = {'envio': ['envío']}
+        assert analizador._indice_aspectos(otro)[0] == ('envio',)
+        assert analizador._indice_aspectos(config)[0] == ('envio', 'calidad', 'general')
+        assert len(llamadas) == 2
+
+    @pytest.mark.parametrize('cache_size', [0, 16])
+    def test_config_editada_en_sitio(self, lexicon_path, cache_size):
+        """Test in-place edits to a reused config change the detected aspects."""
+        analizador = AnalizadorSentimiento(lexicon_path, cache_size=cache_size)
+        config = {'bateria': ['bateria']}
+        tokens = ['bateria', 'excelente']
+        assert list(analizador.detectar_aspectos(tokens, config)) == ['bateria']
+        assert list(analizador.analizar_comentario("bateria excelente", config)['aspectos']) == ['bateria']
+
+        config['pantalla'] = ['excelente']
+        assert list(analizador.detectar_aspectos(tokens, config)) == ['bateria', 'pantalla']
+        assert list(analizador.analizar_comentario("bateria excelente", config)['aspectos']) == ['bateria', 'pantalla']
+
+        config['pantalla'][0] = 'pantalla'
+        assert list(analizador.detectar_aspectos(tokens, config)) == ['bateria']
+        assert list(analizador.analizar_comentario("bateria excelente", config)['aspectos']) == ['bateria']
+
+    def test_aspectos_por_ventana(self, lexicon_path):
+        """Test aspect scores come from each keyword window."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        tokens = analizador.tokenizar("El envío muy rápido. La calidad horrible y berreta")
+        aspectos = analizador.detectar_aspectos(tokens, self.ASPECTOS)
+        assert list(aspectos) == ['envio', 'calidad', 'general']
+        assert aspectos['envio'] > 0
+        assert aspectos['calidad'] < 0
+        assert aspectos['general'] == pytest.approx((aspectos['envio'] + aspectos['calidad']) / 2)
+
+
+class TestCacheAnalizador:
+    """Tests for the opt-in memoization layer."""
+
+    def test_lru_desaloja_mas_antiguo(self):
+        """Test LRU eviction order and counters."""
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert 'b' not in cache
+        assert cache.get('b') is None
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 1, 'size': 2, 'max_size': 2}
+
+    def test_cache_desactivado_por_defecto(self, lexicon_path):
+        """Test caching is opt-in."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        analizador.analizar_comentario("Muy bueno")
+        assert analizador.cache_stats() == {}
+
+    def test_cache_resultados(self, lexicon_path):
+        """Test repeated comments hit the result cache with identical output."""
+        analizador = AnalizadorSentimiento(lexicon_path, cache_size=16)
+        aspectos = {'envio': ['envío']}
+        primero = analizador.analizar_comentario("Envío muy rápido", aspectos)
+        segundo = analizador.analizar_comentario("Envío muy rápido", aspectos)
+        assert primero == segundo
+        stats = analizador.cache_stats()['resultados']
+        assert stats['hits'] == 1 and stats['misses'] == 1
+
+    def test_cache_distingue_config_aspectos(self, lexicon_path):
+        """Test the aspect config is part of the cache key."""
+        analizador = AnalizadorSentimiento(lexicon_path, cache_size=16)
+        con = analizador.analizar_comentario("Envío muy rápido", {'envio': ['envío']})
+        sin = analizador.analizar_comentario("Envío muy rápido")
+        assert 'envio' in con['aspectos']
+        assert 'aspectos' not in sin
+
+    def test_cache_devuelve_copias(self, lexicon_path):
+        """Test mutating a returned result does not corrupt the cache."""
+        analizador = AnalizadorSentimiento(lexicon_path, cache_size=16)
+        resultado = analizador.analizar_comentario("Muy bueno", {'general': ['bueno']})
+        resultado['aspectos']['general'] = 99
+        assert analizador.analizar_comentario("Muy bueno", {'general': ['bueno']})['aspectos']['general'] != 99
+
+
+class TestNormalizacion:
+    """Tests for the shared translate-table normalizer."""
+
+    def test_quitar_diacriticos_latinos(self):
+        """Test accented Latin letters via the translate table."""
+        assert quitar_diacriticos("ñandú àéîõü ÇÅ") == "nandu aeiou CA"
+
+    def test_quitar_diacriticos_combinantes(self):
+        """Test decomposed input falls back to NFD stripping."""
+        assert quitar_diacriticos("me\u0301dico") == "medico"
+
+    def test_ascii_sin_cambios(self):
+        """Test ASCII fast path returns input untouched."""
+        texto = "Muy bueno 100%"
+        assert quitar_diacriticos(texto) is texto
+
+    def test_normalizar_texto_compatible(self):
+        """Test sentiment normalization output."""
+        assert normalizar_texto("  ¡¡Llegóóó RÁPIDO!! 10/10  ") == "llego rapido"
+
+    def test_slug_busqueda(self):
+        """Test search slug output."""
+        assert slug_busqueda("  Televisión  Samsung 4K ") == "television-samsung-4k"
+
+
+class TestAnalisisParalelo:
+    """Tests for process-pool analysis."""
+
+    def test_paralelo_igual_a_serial(self, lexicon_path):
+        """Test parallel results match serial results and input order."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        comentarios = ["Excelente", "   ", "Horrible envío", "No es muy bueno", "Algo lento"] * 5
+        aspectos = {'envio': ['envío']}
+        serial = analizador.analizar_multiples(comentarios, aspectos)
+        paralelo = analizador.analizar_multiples(comentarios, aspectos, workers=2, tamano_chunk=3)
+        assert paralelo == serial
+        assert len(paralelo[1]) == 20
+
+
+class TestRegistroRecursos:
+    """Tests for the process-wide lexicon/config registry."""
+
+    def test_analizadores_comparten_lexico(self, lexicon_path):
+        """Test analyzers built from the same file share the compiled table."""
+        primero = AnalizadorSentimiento(lexicon_path)
+        segundo = AnalizadorSentimiento(lexicon_path)
+        assert primero.tabla is segundo.tabla
+
+    def test_recarga_si_cambia_contenido(self, tmp_path):
+        """Test a modified file is reloaded."""
+        registro = RegistroRecursos()
+        ruta = tmp_path / 'categoria.json'
+        ruta.write_text('{"categoria": "a"}', encoding='utf-8')
+        assert registro.obtener(str(ruta), 'config', json.loads)['categoria'] == 'a'
+
+        ruta.write_text('{"categoria": "bb"}', encoding='utf-8')
+        os.utime(ruta, ns=(1, 1))
+        assert registro.obtener(str(ruta), 'config', json.loads)['categoria'] == 'bb'
+        assert registro.cargas == 2
+
+    def test_mismo_contenido_no_reconstruye(self, tmp_path):
+        """Test a touched but unchanged file keeps the cached value."""
+        registro = RegistroRecursos()
+        ruta = tmp_path / 'categoria.json'
+        ruta.write_text('{"categoria": "a"}', encoding='utf-8')
+        primero = registro.obtener(str(ruta), 'config', json.loads)
+        os.utime(ruta, ns=(1, 1))
+        assert registro.obtener(str(ruta), 'config', json.loads) is primero
+        assert registro.cargas == 1
+
+    def test_cargar_config_por_instancia(self, tmp_path, monkeypatch):
+        """Test experts share the parse of a file but not its config, so edits stay local."""
+        registro = RegistroRecursos()
+        monkeypatch.setattr('mlsense.registry.REGISTRO', registro)
+        ruta = tmp_path / 'categoria_test.json'
+        ruta.write_text(json.dumps({'categoria': 'test', 'reglas': []}), encoding='utf-8')
+
+        editado = ProductExpert.cargar_desde_archivo(str(ruta))
+        editado.reglas.append({'si': {'sentimiento_min': -1.0},
+                               'entonces': {'recomendacion': 'COMPRAR', 'confianza': 0.9, 'razon': 'Editada'}})
+        editado.recompilar()
+        assert editado.inferir(0.0, {})['recomendacion'] == 'COMPRAR'
+
+        nuevo = ProductExpert.cargar_desde_archivo(str(ruta))
+        assert nuevo.config == {'categoria': 'test', 'reglas': []}
+        assert nuevo.inferir(0.0, {})['recomendacion'] == 'NEUTRAL'
+        assert registro.cargas == 1
+
+
+class TestLexiconBinario:
+    """Tests for the binary memory-mapped lexicon format."""
+
+    def test_binario_equivale_a_json(self, lexicon_path):
+        """Test the mapped table equals the JSON-compiled table."""
+        binario = LexiconBinario(compilar_binario(lexicon_path))
+        assert binario.a_tabla() == compilar_lexico(LEXICON_PRUEBA)
+        assert len(binario) == len(compilar_lexico(LEXICON_PRUEBA))
+
+    def test_busqueda_binaria(self, lexicon_path):
+        """Test single lookups over the sorted string table."""
+        binario = LexiconBinario(compilar_binario(lexicon_path))
+        assert binario.get('muy') == (INTENSIFICADOR, 1.5)
+        assert binario.get('no') == (NEGADOR, -1.0)
+        assert 'inexistente' not in binario
+
+    def test_analizador_prefiere_binario(self, lexicon_path):
+        """Test the loader picks an up-to-date binary and scores identically."""
+        desde_json = AnalizadorSentimiento(lexicon_path).analizar_comentario("No es muy bueno")
+        compilar_binario(lexicon_path)
+        Path(lexicon_path).write_text('no es json', encoding='utf-8')
+        os.utime(lexicon_path, ns=(1, 1))
+        analizador = AnalizadorSentimiento(lexicon_path)
+        assert analizador.analizar_comentario("No es muy bueno") == desde_json
+        assert analizador.positivos == LEXICON_PRUEBA['positivos']
+
+    def test_binario_desde_bytes(self, lexicon_path):
+        """Test the file contents decode to the same table as the mapped file."""
+        ruta_bin = compilar_binario(lexicon_path)
+        binario = LexiconBinario(Path(ruta_bin).read_bytes())
+        assert binario.a_tabla() == LexiconBinario(ruta_bin).a_tabla()
+        assert binario.get('muy') == (INTENSIFICADOR, 1.5)
+        with pytest.raises(ValueError):
+            LexiconBinario(b'MLS')
+
+    def test_recompilar_no_afecta_mapeos_abiertos(self, lexicon_path):
+        """Test recompiling replaces the file instead of rewriting a mapped one."""
+        ruta_bin = compilar_binario(lexicon_path)
+        abierto = LexiconBinario(ruta_bin)
+        compilar_binario(lexicon_path)
+        assert abierto.get('muy') == (INTENSIFICADOR, 1.5)
+        assert abierto.a_tabla() == LexiconBinario(ruta_bin).a_tabla()
+        assert [p.name for p in Path(ruta_bin).parent.iterdir() if p.suffix == '.tmp'] == []
+
+    def test_binario_desactualizado_usa_json(self, lexicon_path):
+        """Test a binary older than its JSON is ignored."""
+        ruta_bin = compilar_binario(lexicon_path)
+        os.utime(ruta_bin, ns=(1, 1))
+        assert ruta_binaria(lexicon_path) is None
+
+    def test_archivo_no_binario(self, lexicon_path):
+        """Test a non-binary file is rejected."""
+        with pytest.raises(ValueError):
+            LexiconBinario(lexicon_path)
+
+
+class TestAnalisisStream:
+    """Tests for streaming analysis and running aggregates."""
+
+    COMENTARIOS = ["Excelente envío", "Horrible", "", "No es muy bueno", "Envío lento"]
+    ASPECTOS = {'envio': ['envío']}
+
+    def test_stream_es_perezoso(self, lexicon_path):
+        """Test results are produced on demand."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        stream = analizador.analizar_stream(iter(self.COMENTARIOS))
+        assert next(stream) == analizador.analizar_comentario("Excelente envío")
+
+    def test_agregado_igual_a_multiples(self, lexicon_path):
+        """Test running aggregates match analizar_multiples."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        agregado = AgregadoSentimiento()
+        for resultado in analizador.analizar_stream(self.COMENTARIOS, self.ASPECTOS):
+            agregado.agregar(resultado)
+
+        media, resultados = analizador.analizar_multiples(self.COMENTARIOS, self.ASPECTOS)
+        assert agregado.n == len(resultados) == 4
+        assert agregado.media == media
+        assert sum(agregado.histograma.values()) == 4
+        esperado = [r['aspectos']['envio'] for r in resultados if 'envio' in r['aspectos']]
+        assert agregado.medias_aspectos()['envio'] == pytest.approx(sum(esperado) / len(esperado))
+
+    def test_leer_jsonl(self, tmp_path):
+        """Test JSONL reader with objects and bare strings."""
+        ruta = tmp_path / 'reviews.jsonl'
+        ruta.write_text('{"comentario": "Muy bueno"}\n\n"Malo"\n{"otro": 1}\n', encoding='utf-8')
+        assert list(leer_reviews(str(ruta))) == ["Muy bueno", "Malo"]
+
+    def test_leer_jsonl_linea_invalida(self, tmp_path):
+        """Test a malformed JSONL line raises ValueError with its line number."""
+        ruta = tmp_path / 'reviews.jsonl'
+        ruta.write_text('{"comentario": "Muy bueno"}\n\n{"comentario": "Malo\n', encoding='utf-8')
+        lector = leer_reviews(str(ruta))
+        assert next(lector) == "Muy bueno"
+        with pytest.raises(ValueError, match=r'reviews\.jsonl:3:'):
+            next(lector)
+
+    def test_leer_csv(self, tmp_path):
+        """Test CSV reader by column name."""
+        ruta = tmp_path / 'reviews.csv'
+        ruta.write_text('id,texto\n1,"Muy bueno, gracias"\n2,Malo\n', encoding='utf-8')
+        assert list(leer_reviews(str(ruta), campo='texto')) == ["Muy bueno, gracias", "Malo"]
+        with pytest.raises(ValueError):
+            list(leer_reviews(str(ruta)))
+
+    def test_resumir_archivo(self, lexicon_path, tmp_path):
+        """Test scoring a dump into aggregates only."""
+        ruta = tmp_path / 'reviews.jsonl'
+        ruta.write_text('\n'.join(json.dumps({'comentario': c}) for c in self.COMENTARIOS), encoding='utf-8')
+        agregado = resumir_archivo(AnalizadorSentimiento(lexicon_path), str(ruta), self.ASPECTOS)
+        assert agregado.resumen()['n'] == 4
+        assert 'envio' in agregado.resumen()['aspectos']
+
+
+class TestAgregadorProducto:
+    """Tests for incremental per-product aggregation."""
+
+    ASPECTOS = {'envio': ['envío']}
+    HISTORIA = ["Excelente envío", "Horrible", "No es muy bueno", "Envío lento"]
+
+    def test_incremental_igual_a_recalculo(self, lexicon_path):
+        """Test adding new reviews matches re-analyzing the full list."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        agregador = AgregadorProducto(analizador, self.ASPECTOS)
+        agregador.extender(self.HISTORIA[:2])
+        agregador.extender(self.HISTORIA[2:])
+
+        media, resultados = analizador.analizar_multiples(self.HISTORIA, self.ASPECTOS)
+        assert agregador.score == pytest.approx(media)
+        assert agregador.n == len(resultados)
+        scores = [r['score'] for r in resultados]
+        varianza = sum((x - media) ** 2 for x in scores) / len(scores)
+        assert agregador.agregado.varianza == pytest.approx(varianza)
+
+    def test_quitar_revierte_agregar(self, lexicon_path):
+        """Test removing a review restores the previous aggregate."""
+        agregador = AgregadorProducto(AnalizadorSentimiento(lexicon_path), self.ASPECTOS)
+        agregador.extender(self.HISTORIA[:2])
+        antes = agregador.agregado.resumen()
+        agregador.agregar("Envío super rápido")
+        agregador.quitar("Envío super rápido")
+        despues = agregador.agregado.resumen()
+        assert despues['n'] == antes['n']
+        assert despues['media'] == pytest.approx(antes['media'])
+        assert despues['histograma'] == antes['histograma']
+        assert despues['aspectos'] == pytest.approx(antes['aspectos'])
+
+    def test_quitar_ultimo_aspecto(self, lexicon_path):
+        """Test an aspect disappears when its last review is removed."""
+        agregador = AgregadorProducto(AnalizadorSentimiento(lexicon_path), self.ASPECTOS)
+        agregador.agregar("Envío lento")
+        agregador.quitar("Envío lento")
+        assert agregador.medias_aspectos() == {}
+        assert agregador.score == 0.0
+
+    def test_serializacion(self, lexicon_path):
+        """Test compact round trip through JSON."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        agregador = AgregadorProducto(analizador, self.ASPECTOS)
+        agregador.extender(self.HISTORIA)
+        datos = json.loads(json.dumps(agregador.a_dict()))
+        restaurado = AgregadorProducto.desde_dict(datos, analizador, self.ASPECTOS)
+        assert restaurado.agregado.resumen() == agregador.agregado.resumen()
+
+    def test_quitar_vacio(self):
+        """Test removing from an empty aggregate fails."""
+        with pytest.raises(ValueError):
+            AgregadoSentimiento().quitar({'score': 0.5, 'etiqueta': 'Positivo'})
+
+
+class TestFrasesLexico:
+    """Tests for multi-word expressions matched with Aho-Corasick."""
+
+    @pytest.fixture
+    def analizador(self, tmp_path):
+        """Analyzer with phrase entries in the lexicon."""
+        lexicon = json.loads(json.dumps(LEXICON_PRUEBA))
+        lexicon['positivos'].update({'de diez': 6, 'vale cada peso': 5})
+        lexicon['negativos'].update({'nunca más': -6})
+        ruta = tmp_path / 'lexicon_frases.json'
+        ruta.write_text(json.dumps(lexicon), encoding='utf-8')
+        return AnalizadorSentimiento(str(ruta))
+
+    def test_automata_mas_largo_y_sin_solapes(self):
+        """Test leftmost-longest non-overlapping matching."""
+        automata = AutomataFrases({('a', 'b'): 'a b', ('a', 'b', 'c'): 'a b c', ('c', 'd'): 'c d'})
+        assert automata.buscar(['x', 'a', 'b', 'c', 'd', 'c', 'd']) == [(1, 3, 'a b c'), (5, 2, 'c d')]
+
+    def test_automata_con_fallos(self):
+        """Test matches found after a failed partial match."""
+        automata = AutomataFrases({('a', 'a', 'b'): 'a a b'})
+        assert automata.buscar(['a', 'a', 'a', 'b']) == [(1, 3, 'a a b')]
+
+    def test_sin_frases_no_hay_automata(self, lexicon_path):
+        """Test single-word lexicons skip phrase matching."""
+        assert AnalizadorSentimiento(lexicon_path).frases is None
+
+    def test_frase_reemplaza_palabras(self, analizador):
+        """Test a phrase scores as one unit instead of word by word."""
+        assert analizador._puntuar(['de', 'diez']) == 6
+        assert analizador._puntuar(['nunca', 'mas', 'bueno']) == pytest.approx(-6 + 3)
+        assert analizador.analizar_comentario("Vale cada peso")['etiqueta'] == 'Muy positivo'
+
+    def test_frases_en_lote(self, analizador):
+        """Test batch scoring encodes phrases like the per-comment path."""
+        comentarios = ["De diez, muy bueno", "Nunca más, horrible", "Vale cada peso no"]
+        lote = analizador.analizar_lote(comentarios)
+        for i, comentario in enumerate(comentarios):
+            assert lote['score'][i] == analizador.analizar_comentario(comentario)['score']
+
+
+class TestDeduplicacion:
+    """Tests for exact and near-duplicate review collapsing."""
+
+    RESENAS = [
+        "Excelente producto, llegó rápido y bien embalado",
+        "EXCELENTE producto!! llegó rápido y bien embalado",
+        "Excelente producto, llegó rápido y bien embalado, recomendado",
+        "Horrible, se rompió a la semana",
+        "   ",
+    ]
+
+    def test_colapsa_exactos_y_cercanos(self):
+        """Test exact duplicates always collapse and near duplicates only with a shared key."""
+        unicos, pesos, colapsados = colapsar_duplicados(self.RESENAS)
+        assert unicos == [self.RESENAS[0], self.RESENAS[2], self.RESENAS[3]]
+        assert pesos == [2, 1, 1]
+        assert colapsados == 1
+
+        unicos, pesos, colapsados = colapsar_duplicados(self.RESENAS, clave_cercanos=lambda c: 'Horrible' in c)
+        assert unicos == [self.RESENAS[0], self.RESENAS[3]]
+        assert pesos == [3, 1]
+        assert colapsados == 2
+
+    def test_cercanos_con_sentimiento_opuesto_no_colapsan(self):
+        """Test near duplicates that differ in their sentiment word stay apart."""
+        relleno = " ".join(["el", "paquete", "llego", "en", "tiempo", "y", "forma", "con", "todo"] * 4)
+        resenas = [f"producto excelente {relleno}", f"producto horrible {relleno}"]
+        assert colapsar_duplicados(resenas) == (resenas, [1, 1], 0)
+
+        def clave(comentario):
+            return 'excelente' in comentario
+
+        assert colapsar_duplicados(resenas, clave_cercanos=clave) == (resenas, [1, 1], 0)
+        assert colapsar_duplicados(resenas, umbral=0.5, clave_cercanos=lambda c: 0) == (resenas[:1], [2], 1)
+
+    def test_textos_distintos_no_colapsan(self):
+        """Test unrelated reviews are kept apart."""
+        resenas = ["Muy buena calidad", "Tardó un mes en llegar", "No funciona el cargador"]
+        unicos, pesos, colapsados = colapsar_duplicados(resenas)
+        assert unicos == resenas
+        assert pesos == [1, 1, 1]
+        assert colapsados == 0
+
+    def test_media_ponderada_igual_a_original(self, lexicon_path):
+        """Test weighted analysis of collapsed reviews matches the full list."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        media, _ = analizador.analizar_multiples(self.RESENAS)
+        unicos, pesos, _ = colapsar_duplicados(self.RESENAS, umbral=1.0)
+        media_ponderada, resultados = analizador.analizar_multiples(unicos, pesos=pesos)
+        assert len(resultados) == len(unicos)
+        assert media_ponderada == pytest.approx(media)
+
+        agregador = AgregadorProducto(analizador)
+        agregador.extender(unicos, pesos)
+        assert agregador.n == 4
+        assert agregador.score == pytest.approx(media)
+
+    def test_deduplicar_productos_idempotente(self):
+        """Test products merge by id and repeated calls keep weights."""
+        productos = [
+            {'id': 'MLA1', 'nombre': 'A', 'comentarios': ["Muy bueno", "muy bueno!"]},
+            {'id': 'MLA1', 'nombre': 'A', 'comentarios': ["Muy bueno"]},
+            {'id': '', 'url': 'https://x/2', 'nombre': 'B', 'comentarios': []},
+        ]
+        resultado, productos_colapsados, comentarios_colapsados = deduplicar_productos(productos)
+        assert [p['nombre'] for p in resultado] == ['A', 'B']
+        assert productos_colapsados == 1
+        assert comentarios_colapsados == 2
+        assert resultado[0]['comentarios'] == ["Muy bueno"]
+        assert resultado[0]['pesos_comentarios'] == [3]
+
+        otra_vez, _, colapsados = deduplicar_productos(resultado)
+        assert otra_vez[0]['pesos_comentarios'] == [3]
+        assert colapsados == 0
+
+
+class TestResultadosColumnares:
+    """Tests for the columnar result set."""
+
+    ASPECTOS = {'envio': ['envío'], 'calidad': ['calidad']}
+    COMENTARIOS = ["Excelente envío", "Mala calidad", "   ", "No es muy bueno", "Envío lento, buena calidad"]
+
+    def test_filas_iguales_a_analizar_comentario(self, lexicon_path):
+        """Test each row reads like the per-comment result dict."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        columnar = analizador.analizar_columnar(self.COMENTARIOS, self.ASPECTOS)
+        assert len(columnar) == len(self.COMENTARIOS)
+        assert columnar.scores.dtype == np.float64
+        assert columnar.codigos.dtype == np.int8
+        for fila, comentario in zip(columnar, self.COMENTARIOS):
+            assert fila.a_dict() == analizador.analizar_comentario(comentario, self.ASPECTOS)
+        assert np.isnan(columnar.columna_aspecto('calidad')[0])
+
+    def test_desde_resultados_y_agregados(self, lexicon_path):
+        """Test packing result dicts and the vectorized aggregates."""
+        analizador = AnalizadorSentimiento(lexicon_path)
+        media, resultados = analizador.analizar_multiples(self.COMENTARIOS, self.ASPECTOS)
+        columnar = ResultadosColumnares.desde_resultados(resultados)
+        assert columnar.a_dicts() == resultados
+        assert columnar.media() == pytest.approx(media)
+
+        agregado = AgregadoSentimiento()
+        for fila in columnar:
+            agregado.agregar(fila)
+        assert columnar.histograma() == agregado.histograma
+        assert columnar.medias_aspectos() == pytest.approx(agregado.medias_aspectos())
+
+    def test_acceso_tipo_dict(self):
+        """Test dict-style accessors and slicing."""
+        columnar = ResultadosColumnares(np.array([0.6, -0.2]), np.array([4, 1]))
+        fila = columnar[-1]
+        assert fila['etiqueta'] == 'Negativo'
+        assert fila.get('aspectos', {}) == {}
+        assert 'aspectos' not in fila
+        assert list(fila) == ['score', 'etiqueta']
+        assert len(columnar[:1]) == 1
+        with pytest.raises(KeyError):
+            fila['aspectos']
+        with pytest.raises(IndexError):
+            columnar[2]
+
+
 class TestProductExpert:
     """Tests for expert system."""
 
@@ -156,6 +799,95 @@ class TestProductExpert:
         resultado = self.experto.inferir(0.2, {'sabor': 0.5})
         assert resultado['recomendacion'] == 'COMPRAR'
 
+    def test_inferir_razon_compartida(self):
+        """Test confidence comes from the fired rule even when reasons repeat."""
+        config = {
+            'reglas': [
+                {'si': {'sentimiento_max': 0.0}, 'entonces': {'recomendacion': 'EVITAR', 'confianza': 0.6, 'razon': 'Mixto'}},
+                {'si': {'sentimiento_min': 0.0}, 'entonces': {'recomendacion': 'COMPRAR', 'confianza': 0.9, 'razon': 'Mixto'}},
+                {'si': {'sentimiento_min': 0.5}, 'entonces': {'recomendacion': 'ESPERAR', 'confianza': 0.9, 'razon': 'Empate'}},
+            ]
+        }
+        experto = ProductExpert(config)
+        resultado = experto.inferir(0.2, {})
+        assert resultado['recomendacion'] == 'COMPRAR'
+        assert resultado['confianza'] == 0.9
+
+        resultado = experto.inferir(0.7, {})
+        assert resultado['recomendacion'] == 'COMPRAR'
+        assert len(resultado['reglas_disparadas']) == 2
+
+    def test_inferir_lote_igual_a_inferir(self):
+        """Test batch inference matches per-product inference row by row."""
+        sentimientos = np.array([0.7, -0.7, 0.1, 0.2, 0.2, np.nan])
+        aspectos = np.array([[np.nan, 0.0], [0.9, 0.0], [0.1, 0.0], [0.5, 0.0], [np.nan, 0.5], [np.nan, np.nan]])
+        lote = self.experto.inferir_lote(sentimientos, aspectos, ['sabor', 'aroma'], con_disparadas=True)
+
+        for i, sentimiento in enumerate(sentimientos):
+            dict_aspectos = {
+                nombre: aspectos[i, j]
+                for j, nombre in enumerate(['sabor', 'aroma'])
+                if not np.isnan(aspectos[i, j])
+            }
+            resultado = self.experto.inferir(sentimiento, dict_aspectos)
+            assert lote['recomendacion'][i] == resultado['recomendacion']
+            assert lote['confianza'][i] == resultado['confianza']
+            assert lote['disparadas'][i].sum() == len(resultado['reglas_disparadas'])
+        assert list(lote['regla'][:3]) == [0, 1, -1]
+
+    def test_indice_umbrales_igual_a_fuerza_bruta(self):
+        """Test indexed inference on a large rule set matches checking every rule."""
+        reglas = []
+        for i in range(80):
+            si = {'sentimiento_min': round(-1 + (i % 20) * 0.1, 1), 'sentimiento_max': round(-0.5 + (i % 15) * 0.1, 1)}
+            if i % 3:
+                si.update(aspecto=['sabor', 'aroma'][i % 2], aspecto_min=round((i % 7) * 0.2 - 0.6, 1))
+            reglas.append({'si': si, 'entonces': {'recomendacion': f'R{i % 4}', 'confianza': (i % 5) / 10, 'razon': f'r{i}'}})
+
+        indexado = ProductExpert({'reglas': reglas})
+        fuerza_bruta = ProductExpert({'reglas': reglas})
+        fuerza_bruta.MIN_REGLAS_INDICE = len(reglas) + 1
+        assert fuerza_bruta._indice is None
+        assert indexado._indice is not None
+
+        valores = [-1.0, -0.35, 0.0, 0.2, 0.5, 1.0, float('nan')]
+        for sentimiento in valores:
+            for sabor in valores:
+                aspectos = {'sabor': sabor, 'aroma': 0.1}
+                assert indexado.inferir(sentimiento, aspectos) == fuerza_bruta.inferir(sentimiento, aspectos)
+            assert indexado.inferir(sentimiento, {}) == fuerza_bruta.inferir(sentimiento, {})
+
+    def test_config_invalida_se_puede_validar(self):
+        """Test malformed rules do not break construction and are reported by validar_config."""
+        experto = ProductExpert({'reglas': [{'si': {'sentimiento_min': 0.5}, 'entonces': {'razon': 'x'}}, {'si': {}}]})
+        valida, errores = experto.validar_config()
+        assert not valida
+        assert len(errores) == 2
+
+    def test_metricas_reglas(self):
+        """Test per-rule counters, snapshot/reset and Prometheus export."""
+        metricas = self.experto.activar_metricas()
+        self.experto.inferir(0.7, {'sabor': 0.5})
+        self.experto.inferir(0.1, {})
+        self.experto.inferir_lote(np.array([-0.7, 0.0]))
+
+        datos = metricas.snapshot(reset=True)
+        assert datos['inferencias'] == 4
+        assert datos['por_defecto'] == 2
+        assert [r['evaluaciones'] for r in datos['reglas']] == [4, 4, 4]
+        assert [r['disparos'] for r in datos['reglas']] == [1, 1, 1]
+        assert [r['ganadas'] for r in datos['reglas']] == [1, 1, 0]
+        assert metricas.snapshot()['inferencias'] == 0
+
+        self.experto.inferir(0.1, {})
+        assert metricas.reglas_muertas() == [0, 1, 2]
+        texto = metricas.a_prometheus()
+        assert 'mlsense_regla_disparos_total{categoria="test",regla="2",razon="Sabor excelente"} 0' in texto
+        assert '# TYPE mlsense_regla_tiempo_segundos_total counter' in texto
+
+        self.experto.desactivar_metricas()
+        assert self.experto.inferir(0.7, {})['recomendacion'] == 'COMPRAR'
+
     def test_evaluar_condicion_sentimiento_min(self):
         """Test condition evaluation with sentiment_min."""
         assert self.experto._evaluar_regla(
@@ -192,6 +924,59 @@ class TestProductExpert:
             assert experto.config['categoria'] == 'vinos'
 
 
+class TestSimuladorReglas:
+    """Tests for the rule threshold simulator."""
+
+    CONFIG = {
+        'aspectos': {'sabor': ['sabor'], 'precio': ['precio']},
+        'reglas': [
+            {'si': {'sentimiento_min': 0.5}, 'entonces': {'recomendacion': 'COMPRAR', 'confianza': 0.9, 'razon': 'Muy positivo'}},
+            {'si': {'sentimiento_max': -0.5}, 'entonces': {'recomendacion': 'EVITAR', 'confianza': 0.9, 'razon': 'Muy negativo'}},
+            {'si': {'aspecto': 'precio', 'aspecto_max': -0.2}, 'entonces': {'recomendacion': 'ESPERAR OFERTA', 'confianza': 0.9, 'razon': 'Caro'}},
+        ],
+        'regla_default': {'recomendacion': 'NEUTRAL', 'confianza': 0.5, 'razon': 'Sin evidencia'},
+    }
+
+    def setup_method(self):
+        """Build a small product set."""
+        rng = np.random.default_rng(0)
+        self.sentimientos = np.round(rng.uniform(-1, 1, 200), 2)
+        self.aspectos = np.round(rng.uniform(-1, 1, (200, 2)), 2)
+        self.aspectos[::3, 1] = np.nan
+
+    def test_barrido_igual_a_inferir_lote(self):
+        """Test every grid point matches batch inference on the edited config."""
+        simulador = SimuladorReglas(self.CONFIG, self.sentimientos, self.aspectos)
+        barrido = simulador.barrer({
+            (0, 'sentimiento_min'): [0.3, 0.5, 0.7],
+            (2, 'aspecto_max'): [-0.2, 0.0],
+        })
+        assert barrido['valores'].shape == (6, 2)
+
+        base = ProductExpert(self.CONFIG).inferir_lote(self.sentimientos, self.aspectos)['recomendacion']
+        assert list(barrido['base']) == [int((base == e).sum()) for e in barrido['etiquetas']]
+        for fila, valores in enumerate(barrido['valores']):
+            config = simulador.config_para(barrido['parametros'], valores)
+            recomendaciones = ProductExpert(config).inferir_lote(self.sentimientos, self.aspectos)['recomendacion']
+            assert list(barrido['distribucion'][fila]) == [int((recomendaciones == e).sum()) for e in barrido['etiquetas']]
+            assert barrido['cambios'][fila] == int((recomendaciones != base).sum())
+        assert barrido['cambios'][2] == 0
+
+    def test_config_invalida(self):
+        """Test an invalid config is rejected with ValueError, not KeyError."""
+        config = {'reglas': [{'si': {'sentimiento_min': 0.5}, 'entonces': {'razon': 'sin recomendacion'}}]}
+        with pytest.raises(ValueError, match="recomendacion"):
+            SimuladorReglas(config, np.zeros(3))
+
+    def test_parametro_invalido(self):
+        """Test aspect thresholds require a rule with an aspect."""
+        simulador = SimuladorReglas(self.CONFIG, self.sentimientos, self.aspectos)
+        with pytest.raises(ValueError):
+            simulador.barrer({(0, 'aspecto_min'): [0.1]})
+        with pytest.raises(ValueError):
+            simulador.barrer({(5, 'sentimiento_min'): [0.1]})
+
+
 class TestParsers:
     """Tests for HTML parsers."""
 
@@ -244,6 +1029,288 @@ class TestParsers:
         assert len(productos) > 0
         assert 'Producto Test' in productos[0]['nombre']
 
+    def test_preloaded_state_con_cierre_en_string(self):
+        """Test the state object is decoded whole even with '};' inside strings."""
+        html = """
+        <script>
+        window.__PRELOADED_STATE__ = {"nota": "if (x) {};", "results": [{"title": "Completo", "price": 10}]};
+        </script>
+        """
+        productos, warnings = parse_mercadolibre_html(html)
+        assert [p['nombre'] for p in productos] == ['Completo']
+        assert warnings == []
+
+    def test_preloaded_ruta_conocida_y_aprendida(self):
+        """Test known paths win over the full walk and paths are learned only on request."""
+        listado = {'title': 'Listado', 'results': [{'title': 'Anidado'}]}
+        estado = {'otro': {'results': [{'title': 'Lateral'}]}, 'initialState': {'results': [listado]}}
+        assert [p['nombre'] for p in parsers._extraer_de_preloaded(estado)] == ['Listado']
+
+        estado = {'pagina': [{'busqueda': {'results': [listado]}}]}
+        assert [p['nombre'] for p in parsers._extraer_de_preloaded(estado)] == ['Listado']
+        aprendidas = []
+        assert [p['nombre'] for p in parsers._extraer_de_preloaded(estado, aprendidas)] == ['Listado']
+        assert aprendidas == [('pagina', 0, 'busqueda', 'results')]
+
+    def test_preloaded_no_depende_de_paginas_anteriores(self):
+        """Test a page parses the same whether or not another page was parsed first."""
+        def pagina(estado):
+            return '<script>window.__PRELOADED_STATE__ = ' + json.dumps(estado) + ';</script>'
+
+        ambas = pagina({'a': {'results': [{'title': 'x1'}]}, 'b': {'results': [{'title': 'y1'}]}})
+        solo_b = pagina({'b': {'results': [{'title': 'y2'}]}})
+
+        primero = [p['nombre'] for p in parse_mercadolibre_html(ambas)[0]]
+        parse_mercadolibre_html(solo_b)
+        despues = [p['nombre'] for p in parse_mercadolibre_html(ambas)[0]]
+        assert primero == despues == ['x1', 'y1']
+
+    def test_preloaded_profundo_sin_recursion(self):
+        """Test very deep states are walked without RecursionError."""
+        estado = nodo = {}
+        for _ in range(5000):
+            nodo['hijo'] = {}
+            nodo = nodo['hijo']
+        nodo['results'] = [{'title': 'Profundo'}]
+        productos, rutas = parsers._recorrer_estado(estado)
+        assert [p['nombre'] for p in productos] == ['Profundo']
+        assert len(rutas[0]) == 5001
+
+    def test_escaneo_por_estrategia(self):
+        """Test each strategy finds its own blocks, case-insensitively, and the DOM fallback runs."""
+        html = """
+        <SCRIPT TYPE="application/ld+json">{roto</script>
+        <ol>
+        <li class="ui-search-layout__item ui-search-result"><h2>Uno</h2>
+            <span class="andes-money-amount__fraction">1500</span></li>
+        <li class="ui-search-result"><h2>Dos</h2></li>
+        </ol>
+        <script src="app.js">window.__PRELOADED_STATE__ = {"site": "MLA"};</script>
+        """
+        json_ld = parsers._bloques(html, parsers._apertura_json_ld, parsers._RE_CIERRE_SCRIPT)
+        assert json_ld == ['{roto']
+        assert [html[i:i + 15] for i in parsers._inicios_estado(html)] == ['{"site": "MLA"}']
+        assert len(parsers._bloques(html, parsers._apertura_item, parsers._RE_CIERRE_ITEM)) == 2
+
+        productos, warnings = parse_mercadolibre_html(html)
+        assert [p['nombre'] for p in productos] == ['Uno', 'Dos']
+        assert productos[0]['precio'] == 1500.0
+        assert warnings
+
+    def test_parser_incremental_emite_por_bloque(self):
+        """Test chunk-fed parsing emits products as blocks close, across split characters."""
+        producto = {"@type": "Product", "name": "Cámara ñandú", "price": "1500", "sku": "MLA1"}
+        cabecera = '<html><head><script type="application/ld+json">' + json.dumps(producto, ensure_ascii=False) + '</script>'
+        html = cabecera + '<style>' + 'p{color:red}' * 500 + '</style></head><body>' + 'x' * 5000 + '</body></html>'
+        datos = html.encode('utf-8')
+        corte = len(cabecera.encode('utf-8'))
+
+        parser = parsers.IncrementalParser()
+        emitidos = []
+        for i in range(0, corte, 3):
+            emitidos.extend(parser.feed_bytes(datos[i:min(i + 3, corte)]))
+        assert [p['nombre'] for p in emitidos] == ['Cámara ñandú']
+
+        for i in range(corte, len(datos), 64):
+            assert parser.feed_bytes(datos[i:i + 64]) == []
+        parser.close()
+        assert parser.result() == parse_mercadolibre_html(html)
+
+        productos, _, leidos = parsers.parse_stream(io.BytesIO(datos), tamano_bloque=256, parar_en_json_ld=True)
+        assert productos == emitidos
+        assert leidos < len(datos)
+
+    def test_parser_incremental_retiene_cuerpos_de_script(self, monkeypatch):
+        """Test chunks inside a long <script> are held back instead of fed one by one.
+
+        The hold-back relies on HTMLParser internals; if they change, this
+        fails rather than silently rescanning the script on every chunk.
+        """
+        llamadas = []
+        original = parsers.HTMLParser.feed
+        monkeypatch.setattr(parsers.HTMLParser, 'feed',
+                            lambda self, data: llamadas.append(len(data)) or original(self, data))
+
+        parser = parsers.IncrementalParser()
+        parser.feed('<html><script>')
+        assert getattr(parser, 'cdata_elem', None) == 'script'
+        for _ in range(200):
+            parser.feed('var x = "<b>";' * 20)
+        parser.feed('</script></html>')
+        parser.close()
+        assert len(llamadas) <= 4
+
+    def test_parser_incremental_igual_a_parse_completo(self):
+        """Test stream parsing matches whole-document parsing for each strategy."""
+        items = ''.join(
+            f'<li class="ui-search-result"><h2>Item {i}<br/></h2>'
+            f'<span class="andes-money-amount__fraction">{i}00</span>'
+            f'<a href="https://x/MLA{i}">ver</a> Env&iacute;o gratis 4,5 de 5</li>'
+            for i in range(5)
+        )
+        estado = {"initialState": {"results": [{"id": "MLA9", "title": "Del estado", "price": 10}]}}
+        pagina_items = '<ol>' + items + '</ol>'
+        pagina_estado = pagina_items + '<script>window.__PRELOADED_STATE__ = ' + json.dumps(estado) + ';</script>'
+
+        for html in (pagina_items, pagina_estado, '<html></html>'):
+            productos, warnings, leidos = parsers.parse_stream(io.BytesIO(html.encode('utf-8')), tamano_bloque=50)
+            assert (productos, warnings) == parse_mercadolibre_html(html)
+            assert leidos == len(html.encode('utf-8'))
+
+
+class TestProduct:
+    """Tests for the compact product record."""
+
+    def test_campos_numericos_e_internados(self):
+        """Test numeric conversion, interning and optional keys."""
+        producto = Product(nombre='Mate', precio='1500.0', estrellas='4.5', calificaciones='12',
+                           envio=''.join(['Gra', 'tis']))
+        assert producto['precio'] == 1500.0 and isinstance(producto['precio'], float)
+        assert producto['calificaciones'] == 12 and isinstance(producto['calificaciones'], int)
+        assert producto.envio is Product(envio='Gratis').envio
+        assert 'moneda' not in producto
+        assert producto.get('moneda', 'ARS') == 'ARS'
+        assert Product(precio='no es precio')['precio'] == 0.0
+
+        producto['pesos_comentarios'] = [1]
+        assert producto.pop('pesos_comentarios') == [1]
+        with pytest.raises(KeyError):
+            producto['inexistente'] = 1
+
+    def test_compatible_con_dict(self):
+        """Test dict round trip, equality, copies and pickling."""
+        import pickle
+
+        producto = Product(nombre='Mate', precio=100, moneda='ARS', comentarios=['Rico'])
+        datos = producto.to_dict()
+        assert datos == dict(producto)
+        assert datos['precio'] == 100.0
+        assert producto == datos
+        assert Product.from_dict(datos) == producto
+        assert pickle.loads(pickle.dumps(producto)) == producto
+
+        copia = producto.copy()
+        copia['nombre'] = 'Otro'
+        assert producto['nombre'] == 'Mate'
+
+    def test_extractores_producen_product(self):
+        """Test every extraction strategy returns Product records."""
+        estado = {"initialState": {"results": [
+            {"id": "MLA2", "title": "Estado", "price": 2500, "reviews": {"rating_average": 4.2, "total": 7}}
+        ]}}
+        paginas = [
+            ('<script type="application/ld+json">{"@type": "Product", "name": "LD", "price": "1.500,50", '
+             '"aggregateRating": {"ratingValue": "4.8", "reviewCount": "31"}}</script>'),
+            '<script>window.__PRELOADED_STATE__ = ' + json.dumps(estado) + ';</script>',
+            '<li class="ui-search-result"><h2>DOM</h2><span class="andes-money-amount__fraction">300</span> 4,5 de 5</li>',
+        ]
+        esperados = [(1500.5, 4.8, 31), (2500.0, 4.2, 7), (300.0, 4.5, 0)]
+        for html, (precio, estrellas, calificaciones) in zip(paginas, esperados):
+            productos, _ = parse_mercadolibre_html(html)
+            assert isinstance(productos[0], Product)
+            assert (productos[0].precio, productos[0].estrellas, productos[0].calificaciones) == (precio, estrellas, calificaciones)
+
+
+class TestParseMany:
+    """Tests for multi-document parsing."""
+
+    def test_parse_many_aisla_fallos(self, tmp_path):
+        """Test per-document results, failures and merging, serial and in a pool."""
+        pagina = ('<script type="application/ld+json">'
+                  '{"@type": "Product", "name": "Mate", "price": "100", "sku": "MLA1"}</script>')
+        ruta = tmp_path / 'pagina.html'
+        ruta.write_text(pagina, encoding='utf-8')
+        documentos = [('a', pagina), ('b', pagina.encode('utf-8')), ruta, tmp_path / 'falta.html']
+
+        for workers in (1, 2):
+            resultados = {r['fuente']: r for r in parse_many(documentos, workers=workers, en_vuelo=2)}
+            assert set(resultados) == {'a', 'b', str(ruta), str(tmp_path / 'falta.html')}
+            for fuente in ('a', 'b', str(ruta)):
+                assert resultados[fuente]['error'] is None
+                assert (resultados[fuente]['productos'], resultados[fuente]['warnings']) == parse_mercadolibre_html(pagina)
+                assert resultados[fuente]['segundos'] >= 0
+            assert resultados[str(tmp_path / 'falta.html')]['error'].startswith('FileNotFoundError')
+
+            productos, colapsados, _ = merge_products(resultados.values())
+            assert [p['id'] for p in productos] == ['MLA1']
+            assert colapsados == 2
+
+    def test_parse_many_rutas_str_y_entradas_invalidas(self, tmp_path):
+        """Test str paths are read and malformed entries yield errors without stopping the batch."""
+        pagina = ('<script type="application/ld+json">'
+                  '{"@type": "Product", "name": "Mate", "price": "100", "sku": "MLA1"}</script>')
+        ruta = tmp_path / 'pagina.html'
+        ruta.write_text(pagina, encoding='utf-8')
+        documentos = [str(ruta), ('a', 'b', 'c'), ('d', None), 42, ('e', pagina)]
+
+        for workers in (1, 2):
+            resultados = list(parse_many(documentos, workers=workers))
+            errores = {repr(r['fuente']): r['error'] for r in resultados}
+            assert errores[repr(str(ruta))] is None
+            assert errores[repr('e')] is None
+            assert errores[repr(('a', 'b', 'c'))].startswith('ValueError')
+            assert errores[repr(('d', None))].startswith('TypeError')
+            assert errores['42'].startswith('TypeError')
+            assert len(resultados) == 5
+
+
+class TestCacheParseo:
+    """Tests for the content-addressed parse cache."""
+
+    HTML = ('<script type="application/ld+json">'
+            '{"@type": "Product", "name": "Mate", "price": "100", "sku": "MLA1"}</script>')
+
+    def test_parsea_una_vez_por_contenido(self, monkeypatch):
+        """Test identical bytes or text hit the cache and hits return fresh copies."""
+        llamadas = []
+        original = parse_cache.parse_mercadolibre_html
+        monkeypatch.setattr(parse_cache, 'parse_mercadolibre_html',
+                            lambda html: llamadas.append(html) or original(html))
+        cache = CacheParseo(max_size=4)
+
+        primero = cache.parse(self.HTML.encode('utf-8'))
+        assert primero == parse_mercadolibre_html(self.HTML)
+        primero[0][0]['nombre'] = 'modificado'
+
+        assert cache.parse(self.HTML)[0][0]['nombre'] == 'Mate'
+        assert len(llamadas) == 1
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_clave_incluye_version(self, monkeypatch):
+        """Test a parser version bump changes every key."""
+        clave = CacheParseo.clave(self.HTML)
+        monkeypatch.setattr(parse_cache, 'PARSER_VERSION', parsers.PARSER_VERSION + 1)
+        assert CacheParseo.clave(self.HTML) != clave
+        assert CacheParseo.clave(self.HTML).startswith(f'{parsers.PARSER_VERSION + 1}-')
+
+    def test_nivel_disco(self, tmp_path):
+        """Test the disk tier survives a new instance and ignores corrupt files."""
+        CacheParseo(directorio=tmp_path).parse(self.HTML)
+        assert len(list(tmp_path.glob('*.json'))) == 1
+
+        cache = CacheParseo(directorio=tmp_path)
+        assert cache.parse(self.HTML) == parse_mercadolibre_html(self.HTML)
+        assert cache.stats()['disk_hits'] == 1
+        assert cache.stats()['misses'] == 0
+
+        otro = '<html></html>'
+        (tmp_path / f"{CacheParseo.clave(otro)}.json").write_text('{roto', encoding='utf-8')
+        assert cache.parse(otro) == parse_mercadolibre_html(otro)
+        assert cache.stats()['misses'] == 1
+
+        cache.clear(disco=True)
+        assert not list(tmp_path.glob('*.json'))
+
+    def test_put_desde_otro_parseo(self):
+        """Test results stored with put are served by get and parse."""
+        cache = CacheParseo()
+        assert cache.get(self.HTML) is None
+        productos, warnings = parse_mercadolibre_html(self.HTML)
+        cache.put(self.HTML.encode('utf-8'), productos, warnings)
+        assert cache.get(self.HTML) == (productos, warnings)
+        assert cache.parse(self.HTML) == (productos, warnings)
+
 
 class TestIntegracion:
     """Integration tests."""
@@ -327,3 +1394,47 @@ class TestBuildSearchUrl:
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
+
+
+class TestFetcherErrores:
+    """Tests for the request error handling shared by the fetchers."""
+
+    @pytest.fixture
+    def errores(self, monkeypatch):
+        """Make urlopen raise queued errors and record the SSL context of each call."""
+        cola, contextos = [], []
+
+        def urlopen(req, timeout, context):
+            contextos.append(context.verify_mode)
+            raise cola.pop(0)
+
+        monkeypatch.setattr(fetcher.urllib.request, 'urlopen', urlopen)
+        return cola, contextos
+
+    @staticmethod
+    def _http(codigo):
+        return urllib.error.HTTPError('https://x', codigo, 'Motivo', {}, None)
+
+    def test_403_reintenta_sin_verificacion(self, errores):
+        """Test both fetchers retry a 403 unverified and map the final error alike."""
+        cola, contextos = errores
+        cola.extend([self._http(403), self._http(429)])
+        exito, _, mensaje = fetcher.fetch_products_streaming('https://x')
+        assert not exito and mensaje.startswith("Too many requests")
+        assert contextos == [ssl.CERT_REQUIRED, ssl.CERT_NONE]
+
+        cola.extend([self._http(403), self._http(429)])
+        exito, contenido, mensaje_url = fetcher.fetch_product_url('https://x')
+        assert not exito and contenido is None
+        assert mensaje_url == mensaje
+        assert contextos == [ssl.CERT_REQUIRED, ssl.CERT_NONE] * 2
+
+    def test_mismos_mensajes(self, errores):
+        """Test non-retried errors give the same message from both fetchers."""
+        cola, _ = errores
+        for error in (self._http(404), self._http(500), urllib.error.URLError('caido'), RuntimeError('x')):
+            cola.append(error)
+            _, _, streaming = fetcher.fetch_products_streaming('https://x')
+            cola.append(error)
+            _, _, completo = fetcher.fetch_product_url('https://x')
+            assert streaming == completo == fetcher._mensaje_error(error)